@@ -0,0 +1,247 @@
+# app/benchmarks/corpus.py
+import json
+import os
+import random
+
+from docx import Document
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+# Number of pages generated for each size preset. Non-paged formats get the
+# same amount of text so results are comparable across file types.
+SIZE_PRESETS = {
+    "small": 5,
+    "medium": 50,
+    "large": 250,
+}
+
+WORDS_PER_PAGE = 400
+WORDS_PER_PARAGRAPH = 80
+
+VOCABULARY = (
+    "contract agreement party clause term payment invoice delivery schedule "
+    "warranty liability notice termination renewal license software service "
+    "customer supplier data privacy security audit report revenue quarter "
+    "growth forecast budget expense margin asset equity capital market risk "
+    "compliance regulation policy employee benefit training project milestone "
+    "requirement design architecture deployment network storage compute "
+    "latency throughput capacity model embedding retrieval document query "
+    "answer research experiment result analysis method dataset evaluation"
+).split()
+
+
+def generate_pages(pages, seed=0):
+    """
+    Generate deterministic pseudo-random pages of prose.
+
+    Args:
+        pages (int): Number of pages to generate.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        list: One list of paragraphs (str) per page.
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(pages):
+        paragraphs = []
+        for _ in range(WORDS_PER_PAGE // WORDS_PER_PARAGRAPH):
+            words = [rng.choice(VOCABULARY) for _ in range(WORDS_PER_PARAGRAPH)]
+            words[0] = words[0].capitalize()
+            paragraphs.append(" ".join(words) + ".")
+        result.append(paragraphs)
+    return result
+
+
+def _escape_pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text, width=95):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def write_pdf(path, pages):
+    """
+    Write a text-based PDF without any third-party PDF library.
+
+    Each page becomes a content stream of Helvetica text lines, which
+    pdfminer.six extracts without falling back to OCR.
+    """
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    for paragraphs in pages:
+        lines = []
+        for paragraph in paragraphs:
+            lines.extend(_wrap(paragraph))
+            lines.append("")
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td\n"
+        stream += "\n".join(f"({_escape_pdf_text(line)}) Tj T*" for line in lines)
+        stream += "\nET"
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        page_ids.append(page_id)
+        objects.append((
+            page_id,
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>",
+        ))
+        objects.append((
+            content_id,
+            f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream",
+        ))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects = [
+        (1, "<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"),
+        (font_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+    ] + objects
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = {}
+        for obj_id, body in objects:
+            offsets[obj_id] = f.tell()
+            f.write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n".encode())
+        f.write(b"0000000000 65535 f \n")
+        for obj_id in range(1, len(objects) + 1):
+            f.write(f"{offsets[obj_id]:010d} 00000 n \n".encode())
+        f.write(
+            f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+
+
+def write_scanned_pdf(path, pages, dpi=150, font_points=10, seed=0):
+    """
+    Write an image-only PDF that looks like a scan: every page is a noisy,
+    slightly blurred grayscale A4 bitmap of the text, with no text layer, so
+    ingest has to fall back to OCR.
+    """
+    rng = random.Random(seed)
+    font = ImageFont.load_default(size=font_points * dpi / 72)
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    line_height = int(font_points * 1.3 * dpi / 72)
+    # About 7 inches of text per line at an average glyph width of 0.55 em.
+    line_chars = int(7 * 72 / (font_points * 0.55))
+    images = []
+    for paragraphs in pages:
+        image = Image.new("L", (width, height), 240)
+        draw = ImageDraw.Draw(image)
+        y = dpi // 2
+        for paragraph in paragraphs:
+            for line in _wrap(paragraph, width=line_chars):
+                draw.text((dpi // 2, y), line, font=font, fill=30)
+                y += line_height
+            y += line_height
+        noise = Image.effect_noise((width, height), 12).point(lambda value: value - 128)
+        image = Image.blend(image, noise.convert("L"), 0.1).filter(ImageFilter.GaussianBlur(0.6))
+        images.append(image.rotate(rng.uniform(-0.5, 0.5), fillcolor=240))
+    images[0].save(path, "PDF", resolution=dpi, save_all=True, append_images=images[1:])
+
+
+def write_docx(path, pages):
+    document = Document()
+    for page_number, paragraphs in enumerate(pages, start=1):
+        document.add_heading(f"Section {page_number}", level=1)
+        for paragraph in paragraphs:
+            document.add_paragraph(paragraph)
+    document.save(path)
+
+
+def write_txt(path, pages):
+    with open(path, "w", encoding="utf-8") as f:
+        for paragraphs in pages:
+            f.write("\n\n".join(paragraphs))
+            f.write("\n\n")
+
+
+def write_json(path, pages):
+    records = [
+        {"page": page_number, "paragraph": i, "body": paragraph}
+        for page_number, paragraphs in enumerate(pages, start=1)
+        for i, paragraph in enumerate(paragraphs)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"records": records}, f)
+
+
+WRITERS = {
+    "pdf": write_pdf,
+    "docx": write_docx,
+    "txt": write_txt,
+    "json": write_json,
+}
+
+
+def build_scanned_corpus(directory, sizes, font_points=(8, 10, 12), seed=0):
+    """
+    Generate scanned-PDF fixtures for the OCR benchmark, one per size preset and font size.
+
+    Returns:
+        list: Dicts with the name, path, page count, font size and byte size
+        of every document, plus ``pages_text``, the ground truth per page.
+    """
+    os.makedirs(directory, exist_ok=True)
+    documents = []
+    for size in sizes:
+        pages = generate_pages(SIZE_PRESETS[size], seed=seed)
+        for points in font_points:
+            name = f"{size}-{points}pt.scanned.pdf"
+            path = os.path.join(directory, name)
+            write_scanned_pdf(path, pages, font_points=points, seed=seed)
+            documents.append({
+                "name": name,
+                "path": path,
+                "pages": len(pages),
+                "font_points": points,
+                "bytes": os.path.getsize(path),
+                "pages_text": ["\n".join(paragraphs) for paragraphs in pages],
+            })
+    return documents
+
+
+def build_corpus(directory, sizes, file_types, seed=0):
+    """
+    Generate one synthetic document per (size, file type) combination.
+
+    Args:
+        directory (str): Directory the documents are written to.
+        sizes (list[str]): Keys of SIZE_PRESETS.
+        file_types (list[str]): Keys of WRITERS.
+        seed (int): Seed so repeated runs produce identical files.
+
+    Returns:
+        list: Dicts with the name, path, file type, size preset, page count and byte size
+        of every generated document.
+    """
+    os.makedirs(directory, exist_ok=True)
+    documents = []
+    for size in sizes:
+        pages = generate_pages(SIZE_PRESETS[size], seed=seed)
+        for file_type in file_types:
+            name = f"{size}.{file_type}"
+            path = os.path.join(directory, name)
+            WRITERS[file_type](path, pages)
+            documents.append({
+                "name": name,
+                "path": path,
+                "file_type": file_type,
+                "size": size,
+                "pages": len(pages),
+                "bytes": os.path.getsize(path),
+            })
+    return documents
@@ -0,0 +1,173 @@
+# app/benchmarks/fake_services.py
+import base64
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+EMBEDDING_DIMENSIONS = 1536
+WORD_RE = re.compile(r"\w+")
+
+
+def fake_embedding(text, dimensions=EMBEDDING_DIMENSIONS):
+    """
+    Deterministic bag-of-words embedding using the hashing trick.
+
+    Texts sharing words get similar vectors, so similarity search over the
+    fake embeddings still returns meaningful neighbours.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in WORD_RE.findall(text.lower()):
+        vector[zlib.crc32(word.encode()) % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeServices/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # Serve corpus documents, standing in for the public S3 URLs.
+        if not self.path.startswith("/files/"):
+            return self._send_json({"error": "not found"}, status=404)
+        name = os.path.basename(self.path[len("/files/"):])
+        path = os.path.join(self.server.files_dir, name)
+        if not os.path.isfile(path):
+            return self._send_json({"error": "not found"}, status=404)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                self.wfile.write(chunk)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/embeddings"):
+            self._embeddings(payload)
+        elif self.path.endswith("/chat/completions"):
+            self._chat_completion(payload)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _embeddings(self, payload):
+        time.sleep(self.server.embedding_latency)
+        inputs = payload["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = []
+        tokens = 0
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(text)
+            tokens += len(WORD_RE.findall(text))
+            if payload.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode()
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        with self.server.lock:
+            self.server.embedding_requests += 1
+        self._send_json({
+            "object": "list",
+            "data": data,
+            "model": payload.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _chat_completion(self, payload):
+        time.sleep(self.server.llm_latency)
+        prompt = payload["messages"][-1]["content"]
+        if not isinstance(prompt, str):
+            prompt = json.dumps(prompt)
+        content = (
+            "<div><h1>Answer</h1>"
+            f"<p>Synthetic answer generated from a {len(prompt)} character prompt.</p></div>"
+        )
+        with self.server.lock:
+            self.server.llm_requests += 1
+        self._send_json({
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake-llm"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 20, "total_tokens": len(prompt) // 4 + 20},
+        })
+
+
+class FakeServices:
+    """
+    Local HTTP server standing in for OpenAI and the S3 document bucket.
+
+    It implements the OpenAI ``/v1/embeddings`` and ``/v1/chat/completions``
+    endpoints with deterministic responses and serves files from
+    ``files_dir`` under ``/files/<name>``. Optional latencies emulate the
+    round trip to the real APIs.
+
+    Usage:
+        with FakeServices(files_dir) as services:
+            os.environ["OPENAI_BASE_URL"] = services.openai_base_url
+    """
+
+    def __init__(self, files_dir, embedding_latency=0.0, llm_latency=0.0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.files_dir = files_dir
+        self.httpd.embedding_latency = embedding_latency
+        self.httpd.llm_latency = llm_latency
+        self.httpd.embedding_requests = 0
+        self.httpd.llm_requests = 0
+        self.httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self):
+        return f"{self.base_url}/v1"
+
+    def file_url(self, name):
+        return f"{self.base_url}/files/{name}"
+
+    @property
+    def embedding_requests(self):
+        return self.httpd.embedding_requests
+
+    @property
+    def llm_requests(self):
+        return self.httpd.llm_requests
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
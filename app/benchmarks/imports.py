@@ -0,0 +1,74 @@
+# app/benchmarks/imports.py
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+
+# "import time: self [us] | cumulative | imported package", nested by indentation.
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def _import_once(modules):
+    statement = "import django; django.setup(); " + "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            rows.append((match[4], int(match[1]), int(match[2]), len(match[3]) // 2))
+    return rows
+
+
+def measure_imports(modules=None, runs=3):
+    """
+    Measure what a fresh process imports to load ``modules``, with ``python -X importtime``.
+
+    Each run is a new interpreter, so nothing is cached in sys.modules;
+    bytecode is, as in production. The median run is reported.
+
+    Args:
+        modules (list, optional): Modules to import after django.setup().
+            Defaults to the web process: the WSGI application and URLconf.
+        runs (int): Interpreters to start.
+
+    Returns:
+        dict: ``total_ms`` (median), ``runs_ms``, ``modules`` (every module
+        imported) and ``packages``: cumulative ms per top-level package, slowest first.
+    """
+    if modules is None:
+        modules = [settings.WSGI_APPLICATION.rsplit(".", 1)[0], settings.ROOT_URLCONF]
+    runs_ms, samples = [], []
+    for _ in range(runs):
+        rows = _import_once(modules)
+        runs_ms.append(sum(self_us for _, self_us, _, _ in rows) / 1000)
+        samples.append(rows)
+    rows = samples[runs_ms.index(sorted(runs_ms)[len(runs_ms) // 2])]
+
+    packages = {}
+    for name, _, cumulative_us, _ in rows:
+        package = name.split(".")[0]
+        # The outermost import of a package carries its whole cost.
+        packages[package] = max(packages.get(package, 0), cumulative_us / 1000)
+    return {
+        "statement": modules,
+        "total_ms": statistics.median(runs_ms),
+        "runs_ms": runs_ms,
+        "modules": sorted({name for name, _, _, _ in rows}),
+        "packages": dict(sorted(packages.items(), key=lambda item: -item[1])),
+    }
+
+
+def forbidden_imports(report, forbidden=None):
+    """
+    Top-level packages of ``forbidden`` (default WEB_FORBIDDEN_IMPORTS) that the measured import loaded.
+    """
+    forbidden = set(settings.WEB_FORBIDDEN_IMPORTS if forbidden is None else forbidden) - {""}
+    return sorted({module.split(".")[0] for module in report["modules"]} & forbidden)
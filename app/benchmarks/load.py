@@ -0,0 +1,135 @@
+# app/benchmarks/load.py
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.test import override_settings
+
+from app.benchmarks.corpus import VOCABULARY, build_corpus
+from app.benchmarks.fake_services import FakeServices
+from app.benchmarks.runner import peak_rss_mb, percentile
+from app.models.files import File
+from app.tasks.generate_embeddings import process_file_for_embeddings
+from app.tasks.query import generate_response
+from app.utils.local_vector_store import reset_local_vector_store
+
+
+def current_rss_mb():
+    """
+    Resident set size of this process in MB, from /proc; the peak where /proc is missing.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+class _RssSampler:
+    """
+    Track the highest RSS seen while a load level runs.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_mb())
+
+
+def _query(query, file_id):
+    start = time.perf_counter()
+    try:
+        generate_response(query, file_id)
+    finally:
+        # Each pool thread has its own connection, as in a threads-pool worker.
+        connections.close_all()
+    return time.perf_counter() - start
+
+
+def run_query_load(concurrency_levels, queries_per_level=200,
+                   embedding_latency=0.05, llm_latency=0.5, seed=0):
+    """
+    Measure how many concurrent queries one worker process sustains and what they cost in memory.
+
+    A small corpus is ingested, then each concurrency level runs
+    ``queries_per_level`` generate_response calls on that many threads, as
+    ``celery worker --pool threads --concurrency N`` does, against
+    FakeServices with the given API latencies. A prefork pool pays the
+    warmed-up process RSS for every concurrent query; the threads pool pays
+    it once.
+
+    Returns:
+        dict: ``baseline_rss_mb`` (one warmed-up process),
+        ``prefork_concurrency_per_gb`` and ``rows``, one per level with
+        queries per second, p50/p95 latency, peak RSS and concurrency per GB.
+    """
+    report = {"rows": []}
+    previous_env = {key: os.environ.get(key) for key in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "VECTOR_STORE")}
+
+    with tempfile.TemporaryDirectory() as corpus_dir, tempfile.TemporaryDirectory() as cache_dir, \
+            override_settings(PARSE_CACHE_STORAGE="local", PARSE_CACHE_DIR=cache_dir):
+        documents = build_corpus(corpus_dir, ["small"], ["txt"], seed=seed)
+        with FakeServices(corpus_dir, embedding_latency, llm_latency) as services:
+            os.environ["OPENAI_BASE_URL"] = services.openai_base_url
+            os.environ["OPENAI_API_KEY"] = "benchmark"
+            os.environ["VECTOR_STORE"] = "local"
+            reset_local_vector_store()
+            try:
+                file_ids = []
+                for document in documents:
+                    file_instance = File.objects.create(
+                        name=document["name"], url=services.file_url(document["name"]), file_type=document["file_type"]
+                    )
+                    process_file_for_embeddings(file_instance.id)
+                    file_ids.append(file_instance.id)
+
+                queries = [
+                    " ".join(VOCABULARY[(i * 7 + j) % len(VOCABULARY)] for j in range(8))
+                    for i in range(queries_per_level)
+                ]
+                # Warm up: imports, shared clients and connections.
+                generate_response(queries[0], file_ids[0])
+                report["baseline_rss_mb"] = current_rss_mb()
+                report["prefork_concurrency_per_gb"] = 1024 / report["baseline_rss_mb"]
+
+                for concurrency in concurrency_levels:
+                    with _RssSampler() as sampler, ThreadPoolExecutor(max_workers=concurrency) as pool:
+                        start = time.perf_counter()
+                        latencies = list(pool.map(
+                            _query, queries, [file_ids[i % len(file_ids)] for i in range(len(queries))]
+                        ))
+                        elapsed = time.perf_counter() - start
+                    report["rows"].append({
+                        "concurrency": concurrency,
+                        "queries_per_second": len(latencies) / elapsed,
+                        "p50_seconds": percentile(latencies, 50),
+                        "p95_seconds": percentile(latencies, 95),
+                        "rss_mb": sampler.peak,
+                        "concurrency_per_gb": concurrency / (sampler.peak / 1024),
+                    })
+            finally:
+                reset_local_vector_store()
+                for key, value in previous_env.items():
+                    if value is None:
+                        os.environ.pop(key, None)
+                    else:
+                        os.environ[key] = value
+    return report
@@ -0,0 +1,73 @@
+# app/benchmarks/ocr.py
+import re
+import tempfile
+import time
+from collections import Counter
+
+import pytesseract
+from pdf2image import convert_from_path
+
+from app.benchmarks.corpus import build_scanned_corpus
+from app.utils import ocr
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def word_recall(expected, recognized):
+    """
+    Fraction of the expected words (with multiplicity) found in the recognized text.
+    """
+    expected_words = Counter(_WORD.findall(expected.lower()))
+    recognized_words = Counter(_WORD.findall(recognized.lower()))
+    total = sum(expected_words.values())
+    if not total:
+        return 1.0
+    return sum((expected_words & recognized_words).values()) / total
+
+
+def _baseline(path):
+    # What extract_text_ocr did before the OCR engine: every page rasterized
+    # at pdf2image's default DPI up front, one tesseract process per page.
+    return [pytesseract.image_to_string(image) for image in convert_from_path(path)]
+
+
+def _engine(path):
+    return ocr.ocr_pdf(path)
+
+
+MODES = {
+    "baseline": _baseline,
+    "engine": _engine,
+}
+
+
+def run_ocr_benchmark(sizes, modes=tuple(MODES), seed=0):
+    """
+    OCR a set of scanned-PDF fixtures with each mode and compare speed and accuracy.
+
+    Returns:
+        dict: ``engine`` (the OCR engine in use) and ``rows``, one per
+        (document, mode) with seconds, seconds per page and word recall
+        against the text the fixture was rendered from.
+    """
+    report = {"engine": ocr.engine_name(), "rows": []}
+    with tempfile.TemporaryDirectory() as directory:
+        for document in build_scanned_corpus(directory, sizes, seed=seed):
+            for mode in modes:
+                start = time.perf_counter()
+                texts = MODES[mode](document["path"])
+                seconds = time.perf_counter() - start
+                recall = sum(
+                    word_recall(expected, recognized)
+                    for expected, recognized in zip(document["pages_text"], texts)
+                ) / document["pages"]
+                report["rows"].append({
+                    "name": document["name"],
+                    "mode": mode,
+                    "pages": document["pages"],
+                    "font_points": document["font_points"],
+                    "seconds": seconds,
+                    "seconds_per_page": seconds / document["pages"],
+                    "word_recall": recall,
+                })
+    return report
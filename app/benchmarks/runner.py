@@ -0,0 +1,147 @@
+# app/benchmarks/runner.py
+import os
+import resource
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.test import override_settings
+
+from app.benchmarks.corpus import VOCABULARY, build_corpus
+from app.benchmarks.fake_services import FakeServices
+from app.models.files import File
+from app.tasks.generate_embeddings import process_file_for_embeddings
+from app.tasks.query import generate_response
+from app.utils.local_vector_store import reset_local_vector_store
+from app.utils.metrics import add_span_listener, remove_span_listener
+
+INGEST_STAGES = ("download", "parse", "chunk", "embed", "store")
+QUERY_STAGES = ("embed_query", "retrieve", "llm", "total")
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB (ru_maxrss is in KB on Linux).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+class _SpanCollector:
+    """
+    Collect the stage spans emitted by the tasks while a document is processed.
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def __call__(self, span):
+        self.spans.append(span)
+
+    def take(self):
+        spans, self.spans = self.spans, []
+        return spans
+
+
+def run_benchmark(sizes, file_types, queries_per_file=5, embedding_model=None,
+                  embedding_latency=0.0, llm_latency=0.0, seed=0):
+    """
+    Ingest and query a synthetic corpus against local stand-in services.
+
+    OpenAI is replaced by FakeServices and Weaviate by the in-process
+    vector store, so the numbers reflect only our own parsing, chunking and
+    storage code plus the configured fake latencies. ``embedding_model``
+    (e.g. ``onnx/all-MiniLM-L6-v2``) embeds with a local model instead. Stage timings and
+    counts come from the spans the tasks emit (app.utils.metrics), so they
+    line up with the production metrics.
+
+    Returns:
+        dict: ``ingest`` (one row per document), ``query`` (latency summary)
+        and ``peak_rss_mb`` for the whole run.
+    """
+    report = {"ingest": [], "query": {}}
+    query_latencies = []
+    query_stage_latencies = {stage: [] for stage in QUERY_STAGES}
+    collector = _SpanCollector()
+    previous_env = {key: os.environ.get(key) for key in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "VECTOR_STORE")}
+
+    # The corpus is deterministic, so a shared parse cache would hide parse time on reruns.
+    with tempfile.TemporaryDirectory() as corpus_dir, tempfile.TemporaryDirectory() as cache_dir, \
+            override_settings(PARSE_CACHE_STORAGE="local", PARSE_CACHE_DIR=cache_dir,
+                              EMBEDDING_MODEL=embedding_model or settings.EMBEDDING_MODEL):
+        documents = build_corpus(corpus_dir, sizes, file_types, seed=seed)
+        with FakeServices(corpus_dir, embedding_latency, llm_latency) as services:
+            os.environ["OPENAI_BASE_URL"] = services.openai_base_url
+            os.environ["OPENAI_API_KEY"] = "benchmark"
+            os.environ["VECTOR_STORE"] = "local"
+            reset_local_vector_store()
+            add_span_listener(collector)
+            try:
+                for document in documents:
+                    url = services.file_url(document["name"])
+                    file_instance = File.objects.create(
+                        name=document["name"], url=url, file_type=document["file_type"]
+                    )
+                    start = time.perf_counter()
+                    process_file_for_embeddings(file_instance.id)
+                    total = time.perf_counter() - start
+
+                    timings, counts = {}, {}
+                    for span in collector.take():
+                        timings[span.stage] = timings.get(span.stage, 0.0) + span.duration
+                        if span.stage in ("parse", "chunk", "store"):
+                            counts.update(span.counts)
+                    chunk_count = counts.get("chunks", 0)
+
+                    report["ingest"].append({
+                        **{key: document[key] for key in ("name", "file_type", "size", "pages", "bytes")},
+                        "chunks": chunk_count,
+                        "tokens": counts.get("tokens", 0),
+                        "stages": timings,
+                        "total_seconds": total,
+                        "mb_per_second": document["bytes"] / (1024 * 1024) / total if total else 0.0,
+                        "chunks_per_second": chunk_count / total if total else 0.0,
+                        "peak_rss_mb": peak_rss_mb(),
+                    })
+
+                    for i in range(queries_per_file):
+                        query = " ".join(VOCABULARY[(i * 7 + j) % len(VOCABULARY)] for j in range(8))
+                        start = time.perf_counter()
+                        generate_response(query, file_instance.id)
+                        query_latencies.append(time.perf_counter() - start)
+                        for span in collector.take():
+                            if span.stage in query_stage_latencies:
+                                query_stage_latencies[span.stage].append(span.duration)
+            finally:
+                remove_span_listener(collector)
+                reset_local_vector_store()
+                for key, value in previous_env.items():
+                    if value is None:
+                        os.environ.pop(key, None)
+                    else:
+                        os.environ[key] = value
+
+            report["embedding_requests"] = services.embedding_requests
+            report["llm_requests"] = services.llm_requests
+
+    total_query_time = sum(query_latencies)
+    report["query"] = {
+        "count": len(query_latencies),
+        "p50_seconds": percentile(query_latencies, 50),
+        "p95_seconds": percentile(query_latencies, 95),
+        "queries_per_second": len(query_latencies) / total_query_time if total_query_time else 0.0,
+        "stages": {
+            stage: {"p50_seconds": percentile(values, 50), "p95_seconds": percentile(values, 95)}
+            for stage, values in query_stage_latencies.items()
+        },
+    }
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from app.benchmarks.corpus import SIZE_PRESETS, WRITERS
+from app.benchmarks.runner import INGEST_STAGES, QUERY_STAGES, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark ingest and query end to end on a synthetic corpus, using local "
+        "stand-ins for OpenAI and Weaviate and a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated presets: {', '.join(SIZE_PRESETS)}.")
+        parser.add_argument("--types", default=",".join(WRITERS), help="Comma-separated file types.")
+        parser.add_argument("--queries", type=int, default=5, help="Queries to run per ingested file.")
+        parser.add_argument("--embedding-model", help="Embedding model to use instead of EMBEDDING_MODEL, e.g. onnx/all-MiniLM-L6-v2.")
+        parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Simulated latency per embedding call.")
+        parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency per LLM call.")
+        parser.add_argument("--output", help="Write the full report as JSON to this path.")
+
+    def handle(self, *args, **options):
+        sizes = [size for size in options["sizes"].split(",") if size]
+        file_types = [file_type for file_type in options["types"].split(",") if file_type]
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = run_benchmark(
+                sizes,
+                file_types,
+                queries_per_file=options["queries"],
+                embedding_model=options["embedding_model"],
+                embedding_latency=options["embedding_latency_ms"] / 1000,
+                llm_latency=options["llm_latency_ms"] / 1000,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        header = ["file", "pages", "KB", "chunks"] + list(INGEST_STAGES) + ["total s", "MB/s", "chunks/s", "peak RSS MB"]
+        self.stdout.write(" | ".join(header))
+        for row in report["ingest"]:
+            cells = [row["name"], str(row["pages"]), f"{row['bytes'] / 1024:.0f}", str(row["chunks"])]
+            cells += [f"{row['stages'].get(stage, 0.0):.3f}" for stage in INGEST_STAGES]
+            cells += [
+                f"{row['total_seconds']:.3f}",
+                f"{row['mb_per_second']:.2f}",
+                f"{row['chunks_per_second']:.1f}",
+                f"{row['peak_rss_mb']:.0f}",
+            ]
+            self.stdout.write(" | ".join(cells))
+
+        query = report["query"]
+        self.stdout.write(
+            f"queries: {query['count']}  p50 {query['p50_seconds'] * 1000:.1f} ms  "
+            f"p95 {query['p95_seconds'] * 1000:.1f} ms  {query['queries_per_second']:.1f} q/s"
+        )
+        for stage in QUERY_STAGES:
+            timing = query["stages"][stage]
+            self.stdout.write(
+                f"  {stage}: p50 {timing['p50_seconds'] * 1000:.1f} ms  p95 {timing['p95_seconds'] * 1000:.1f} ms"
+            )
+        self.stdout.write(f"peak RSS: {report['peak_rss_mb']:.0f} MB")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
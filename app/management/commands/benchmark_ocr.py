@@ -0,0 +1,47 @@
+import json
+import shutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.benchmarks.corpus import SIZE_PRESETS
+from app.benchmarks.ocr import MODES, run_ocr_benchmark
+from app.utils.ocr import engine_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark OCR on synthetic scanned PDFs: the OCR engine (adaptive DPI, "
+        "preprocessing, in-process Tesseract when available) against the old fixed-DPI path."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="small", help=f"Comma-separated presets: {', '.join(SIZE_PRESETS)}.")
+        parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to compare.")
+        parser.add_argument("--output", help="Write the full report as JSON to this path.")
+
+    def handle(self, *args, **options):
+        if not shutil.which("pdftoppm"):
+            raise CommandError("pdftoppm (poppler-utils) is required to rasterize PDFs.")
+        if engine_name() == "pytesseract" and not shutil.which("tesseract"):
+            raise CommandError("tesseract is not installed, and neither is tesserocr.")
+        sizes = [size for size in options["sizes"].split(",") if size]
+        modes = [mode for mode in options["modes"].split(",") if mode]
+
+        report = run_ocr_benchmark(sizes, modes)
+
+        self.stdout.write(f"engine: {report['engine']}")
+        self.stdout.write(" | ".join(["file", "mode", "pages", "total s", "s/page", "word recall"]))
+        for row in report["rows"]:
+            self.stdout.write(" | ".join([
+                row["name"],
+                row["mode"],
+                str(row["pages"]),
+                f"{row['seconds']:.2f}",
+                f"{row['seconds_per_page']:.2f}",
+                f"{row['word_recall']:.3f}",
+            ]))
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.benchmarks.load import run_query_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the query path on threads, as the queries worker runs it with "
+        "--pool threads, and report throughput, latency and concurrency per GB of RAM."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated concurrency levels.")
+        parser.add_argument("--queries", type=int, default=200, help="Queries per concurrency level.")
+        parser.add_argument("--embedding-latency-ms", type=float, default=50.0, help="Simulated latency per embedding call.")
+        parser.add_argument("--llm-latency-ms", type=float, default=500.0, help="Simulated latency per LLM call.")
+        parser.add_argument("--output", help="Write the full report as JSON to this path.")
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options["concurrency"].split(",") if level]
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency needs positive integers.")
+
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = run_query_load(
+                levels,
+                queries_per_level=options["queries"],
+                embedding_latency=options["embedding_latency_ms"] / 1000,
+                llm_latency=options["llm_latency_ms"] / 1000,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"one warmed-up process: {report['baseline_rss_mb']:.0f} MB "
+            f"(prefork: {report['prefork_concurrency_per_gb']:.1f} concurrent queries per GB)"
+        )
+        self.stdout.write(" | ".join(["threads", "q/s", "p50 ms", "p95 ms", "RSS MB", "concurrency/GB"]))
+        for row in report["rows"]:
+            self.stdout.write(" | ".join([
+                str(row["concurrency"]),
+                f"{row['queries_per_second']:.1f}",
+                f"{row['p50_seconds'] * 1000:.0f}",
+                f"{row['p95_seconds'] * 1000:.0f}",
+                f"{row['rss_mb']:.0f}",
+                f"{row['concurrency_per_gb']:.1f}",
+            ]))
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
@@ -0,0 +1,47 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.benchmarks.imports import forbidden_imports, measure_imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the web process's import time with `python -X importtime` and fail "
+        "if it exceeds WEB_IMPORT_BUDGET_MS or loads a worker-only package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modules", help="Comma-separated modules to import instead of the WSGI app and URLconf.")
+        parser.add_argument("--budget-ms", type=float, default=settings.WEB_IMPORT_BUDGET_MS)
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time; the median is used.")
+        parser.add_argument("--top", type=int, default=10, help="Slowest top-level packages to list.")
+        parser.add_argument("--output", help="Write the full report as JSON to this path.")
+
+    def handle(self, *args, **options):
+        modules = [module for module in (options["modules"] or "").split(",") if module] or None
+        report = measure_imports(modules, runs=max(options["runs"], 1))
+        forbidden = forbidden_imports(report)
+
+        self.stdout.write(
+            f"import {', '.join(report['statement'])}: {report['total_ms']:.0f} ms "
+            f"(budget {options['budget_ms']:.0f} ms, runs {', '.join(f'{ms:.0f}' for ms in report['runs_ms'])})"
+        )
+        self.stdout.write(" | ".join(["package", "cumulative ms"]))
+        for package, ms in list(report["packages"].items())[:options["top"]]:
+            self.stdout.write(f"{package} | {ms:.1f}")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump({**report, "forbidden": forbidden}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        errors = []
+        if forbidden:
+            errors.append(f"worker-only packages imported: {', '.join(forbidden)}")
+        if report["total_ms"] > options["budget_ms"]:
+            errors.append(f"{report['total_ms']:.0f} ms is over the {options['budget_ms']:.0f} ms budget")
+        if errors:
+            raise CommandError("; ".join(errors))
+        self.stdout.write(self.style.SUCCESS("Within the import budget."))
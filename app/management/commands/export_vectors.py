@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app.models.files import File
+from app.utils.vector_snapshots import SnapshotError, export_collection, write_manifest
+
+
+def _export(snapshot, file_instance):
+    try:
+        return export_collection(snapshot, file_instance), None
+    except SnapshotError as exc:
+        return None, str(exc)
+    except Exception as exc:
+        return None, f"{file_instance.vector_key}: {exc!r}"
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Export every processed File's chunks and vectors to a snapshot (.npy + JSONL per "
+        "collection, see app.utils.vector_snapshots), checked against the Chunk rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--snapshot", help="Snapshot name. Defaults to the current UTC time.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Collections exported at once.")
+        parser.add_argument("--tenant", help="Only export this tenant's files.")
+        parser.add_argument("--allow-errors", action="store_true",
+                            help="Write the manifest even if some collections failed, leaving them out.")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        snapshot = options["snapshot"] or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+        files = File.objects.filter(processed=True)
+        if options["tenant"] is not None:
+            files = files.filter(tenant=options["tenant"])
+        # Files with the same content share a collection; export it once.
+        owners = {}
+        for file_instance in files.order_by("id").only("id", "content_hash", "embedding_model").iterator():
+            owners.setdefault(file_instance.vector_key, file_instance)
+
+        entries, errors = [], []
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = pool.map(lambda file_instance: _export(snapshot, file_instance), owners.values())
+            for done, (entry, error) in enumerate(results, 1):
+                if error:
+                    errors.append(error)
+                    self.stderr.write(error)
+                else:
+                    entries.append(entry)
+                if done % 100 == 0:
+                    self.stdout.write(f"{done}/{len(owners)} collections")
+
+        if errors and not options["allow_errors"]:
+            raise CommandError(f"{len(errors)} of {len(owners)} collections failed; no manifest written.")
+        write_manifest(snapshot, entries)
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {snapshot}: {len(entries)} collections, {sum(entry['count'] for entry in entries)} vectors."
+        ))
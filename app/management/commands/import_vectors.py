@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app.utils.vector_snapshots import SnapshotError, import_collection, read_manifest
+
+
+def _import(snapshot, entry):
+    try:
+        return import_collection(snapshot, entry), None
+    except SnapshotError as exc:
+        return 0, str(exc)
+    except Exception as exc:
+        return 0, f"{entry['vector_key']}: {exc!r}"
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a snapshot written by export_vectors back into the vector store, replacing "
+        "the collections it holds, without re-parsing or re-embedding."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("snapshot", help="Snapshot name.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Collections imported at once.")
+        parser.add_argument("--only", help="Comma-separated vector keys to import instead of the whole snapshot.")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        try:
+            manifest = read_manifest(options["snapshot"])
+        except SnapshotError as exc:
+            raise CommandError(str(exc))
+        entries = manifest["collections"]
+        if options["only"]:
+            only = set(options["only"].split(","))
+            entries = [entry for entry in entries if entry["vector_key"] in only]
+
+        stored, errors = 0, []
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = pool.map(lambda entry: _import(options["snapshot"], entry), entries)
+            for done, (count, error) in enumerate(results, 1):
+                stored += count
+                if error:
+                    errors.append(error)
+                    self.stderr.write(error)
+                if done % 100 == 0:
+                    self.stdout.write(f"{done}/{len(entries)} collections")
+
+        self.stdout.write(f"Imported {len(entries) - len(errors)} collections, {stored} vectors.")
+        if errors:
+            raise CommandError(f"{len(errors)} of {len(entries)} collections failed.")
+        self.stdout.write(self.style.SUCCESS("Snapshot restored."))
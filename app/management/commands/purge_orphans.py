@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.models.files import File
+from app.utils.embeddings import delete_collections, list_collections, uuid_to_weaviate_class
+from app.utils.parse_cache import cached_content_hashes, delete_parsed_pages
+from app.utils.s3 import delete_files_from_s3, key_from_url, list_objects
+
+
+class Command(BaseCommand):
+    help = (
+        "Find and delete vector store collections, S3 objects and cached parses that "
+        "no File references any more, e.g. left behind by deletes before cleanup existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+        parser.add_argument(
+            "--min-age-hours", type=float, default=settings.DIRECT_UPLOAD_SESSION_MAX_AGE / 3600,
+            help="Keep S3 objects younger than this; they may belong to an upload not completed yet.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Collections or cached parses deleted per call.")
+        parser.add_argument("--skip-vectors", action="store_true", help="Do not check vector store collections.")
+        parser.add_argument("--skip-s3", action="store_true", help="Do not check S3 objects.")
+        parser.add_argument("--skip-parse-cache", action="store_true", help="Do not check cached parses.")
+
+    def handle(self, *args, **options):
+        vector_keys, urls, content_hashes = set(), set(), set()
+        for file_id, content_hash, url in File.objects.values_list("id", "content_hash", "url").iterator():
+            vector_keys.add(content_hash or str(file_id))
+            urls.add(url)
+            if content_hash:
+                content_hashes.add(content_hash)
+
+        if not options["skip_vectors"]:
+            live = {uuid_to_weaviate_class(key) for key in vector_keys}
+            orphans = sorted(list_collections() - live)
+            self._purge("collections", orphans, options, self._delete_collections)
+
+        if not options["skip_s3"]:
+            live = {key_from_url(url) for url in urls}
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=options["min_age_hours"])
+            # Cached parses and vector snapshots are keyed by content hash, not by a File's URL.
+            internal = (f"{settings.PARSE_CACHE_PREFIX}/", f"{settings.VECTOR_SNAPSHOT_PREFIX}/")
+            orphans = [
+                key
+                for key, last_modified in list_objects()
+                if key not in live and last_modified < cutoff and not key.startswith(internal)
+            ]
+            self._purge("S3 objects", orphans, options, delete_files_from_s3)
+
+        if not options["skip_parse_cache"]:
+            orphans = sorted(cached_content_hashes() - content_hashes)
+            self._purge("cached parses", orphans, options, self._delete_parse_caches)
+
+    def _purge(self, label, orphans, options, delete):
+        self.stdout.write(f"{len(orphans)} orphaned {label}.")
+        if options["dry_run"] or not orphans:
+            for name in orphans[:20]:
+                self.stdout.write(f"  {name}")
+            return
+        failed = []
+        for start in range(0, len(orphans), options["batch_size"]):
+            failed += delete(orphans[start:start + options["batch_size"]]) or []
+        self.stdout.write(self.style.SUCCESS(f"Deleted {len(orphans) - len(failed)} orphaned {label}."))
+        if failed:
+            self.stderr.write(f"Could not delete {len(failed)} {label}; run again to retry.")
+
+    def _delete_collections(self, names):
+        # delete_collections takes File.vector_key values and adds the "Cls_" prefix itself.
+        delete_collections([name[len("Cls_"):] for name in names])
+
+    def _delete_parse_caches(self, content_hashes):
+        delete_parsed_pages(content_hashes)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.models.files import File
+from app.tasks.generate_embeddings import rechunk_file
+from app.utils.parse_cache import has_parsed_pages
+from app.utils.scheduling import INGEST_CLASS_PRIORITIES
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-chunk and re-embed processed files from their cached parse artifacts, "
+        "without downloading or re-parsing them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-tokens", type=int, default=settings.CHUNK_MAX_TOKENS, help="Maximum tokens per chunk.")
+        parser.add_argument("--file-id", action="append", dest="file_ids", help="Only re-chunk this file. Repeatable.")
+        parser.add_argument("--sync", action="store_true", help="Run in this process instead of queueing tasks.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report which files would be re-chunked.")
+
+    def handle(self, *args, **options):
+        files = File.objects.filter(processed=True).order_by("uploaded_at")
+        if options["file_ids"]:
+            files = files.filter(id__in=options["file_ids"])
+
+        # Files with the same content share one collection, so each content is re-chunked once.
+        targets, seen, unhashed, missing = [], set(), 0, 0
+        for file_instance in files.only("id", "content_hash", "file_type"):
+            if not file_instance.content_hash:
+                unhashed += 1
+                continue
+            if file_instance.content_hash in seen:
+                continue
+            seen.add(file_instance.content_hash)
+            if has_parsed_pages(file_instance.content_hash, file_instance.file_type):
+                targets.append(file_instance)
+            else:
+                missing += 1
+
+        self.stdout.write(
+            f"{len(targets)} documents to re-chunk at {options['max_tokens']} tokens; "
+            f"{missing} without a cached parse and {unhashed} files ingested before content hashing "
+            "need a full re-ingest."
+        )
+        if options["dry_run"]:
+            return
+
+        for file_instance in targets:
+            if options["sync"]:
+                result = rechunk_file(file_instance.id, options["max_tokens"])
+                self.stdout.write(f"{file_instance.id}: {result['status']}")
+            else:
+                # Background work: queue behind interactive and small uploads.
+                rechunk_file.apply_async(
+                    args=[file_instance.id, options["max_tokens"]],
+                    queue="embeddings",
+                    priority=INGEST_CLASS_PRIORITIES["large"],
+                    headers={"task_class": "rechunk"},
+                )
+        if not options["sync"]:
+            self.stdout.write(self.style.SUCCESS(f"Queued {len(targets)} rechunk tasks."))
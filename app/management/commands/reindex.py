@@ -0,0 +1,271 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from celery.result import AsyncResult
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from app.models.files import File
+from app.tasks.generate_embeddings import process_file_for_embeddings
+from app.utils.chunk_generator import count_tokens
+from app.utils.embedding_backends import get_backend
+from app.utils.parse_cache import load_parsed_pages
+from app.utils.scheduling import INGEST_CLASS_PRIORITIES
+
+# text-embedding-3-small, USD per million tokens.
+DEFAULT_PRICE_PER_MILLION = 0.02
+
+
+def estimate_tokens(file_instance):
+    """
+    Estimate the embedding tokens needed to re-index a file.
+
+    Exact when the parse is cached; otherwise an upper bound from the
+    previous chunk count.
+
+    Returns:
+        tuple: (tokens, whether the estimate is exact).
+    """
+    texts = load_parsed_pages(file_instance.content_hash, file_instance.file_type)
+    if texts is not None:
+        return count_tokens(texts), True
+    return file_instance.chunks_total * settings.CHUNK_MAX_TOKENS, False
+
+
+def _run_inline(file_id):
+    try:
+        return process_file_for_embeddings(file_id, force=True)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-index every File (e.g. after switching embedding model or chunk size) with "
+        "bounded parallelism, an embedding-token budget and resume after interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Files read per keyset page.")
+        parser.add_argument("--concurrency", type=int, default=4, help="Maximum files re-indexing at once.")
+        parser.add_argument("--token-budget", type=int, help="Stop once this many embedding tokens have been dispatched.")
+        parser.add_argument("--tokens-per-minute", type=int, help="Throttle dispatch to this many embedding tokens per minute.")
+        parser.add_argument("--file-type", help="Only re-index files of this type.")
+        parser.add_argument("--tenant", help="Only re-index this tenant's files.")
+        parser.add_argument("--outdated", action="store_true", help="Only re-index files embedded with another model than EMBEDDING_MODEL.")
+        parser.add_argument("--include-unprocessed", action="store_true", help="Also re-index files that never finished ingesting.")
+        parser.add_argument("--sync", action="store_true", help="Run in this process on a thread pool instead of queueing tasks.")
+        parser.add_argument("--dry-run", action="store_true", help="Only estimate tokens and cost.")
+        parser.add_argument("--price-per-million", type=float, default=DEFAULT_PRICE_PER_MILLION, help="Embedding price in USD per million tokens.")
+        parser.add_argument("--state-file", default=".reindex-state.json", help="Progress file used to resume an interrupted run.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the state file and start from the beginning.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1.")
+        if options["dry_run"]:
+            return self._estimate()
+
+        self.state = self._load_state()
+        self.window = deque()  # (dispatch time, tokens) for --tokens-per-minute
+        if self.state["pending"]:
+            self.stdout.write(f"Resuming: {len(self.state['pending'])} files were in flight when the last run stopped.")
+
+        if options["sync"]:
+            self._run_sync()
+        else:
+            self._run_async()
+
+        finished = self.state["cursor"] is None and not self.state["pending"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Dispatched {self.state['dispatched']} files, {self.state['tokens']} tokens "
+            f"(~${self.state['tokens'] * options['price_per_million'] / 1_000_000:.4f})."
+        ))
+        if finished and not self.state["budget_exhausted"]:
+            os.remove(options["state_file"])
+        else:
+            self.stdout.write(f"Progress saved to {options['state_file']}; run again to continue.")
+
+    # Selection
+
+    def _queryset(self):
+        files = File.objects.all()
+        if not self.options["include_unprocessed"]:
+            files = files.filter(processed=True)
+        if self.options["file_type"]:
+            files = files.filter(file_type=self.options["file_type"])
+        if self.options["tenant"] is not None:
+            files = files.filter(tenant=self.options["tenant"])
+        if self.options["outdated"]:
+            files = files.exclude(embedding_model=get_backend().model_id)
+        return files.only("id", "content_hash", "file_type", "chunks_total")
+
+    def _iter_files(self, after=None):
+        """
+        Yield one File per distinct content in keyset-paginated batches, ordered by id.
+
+        Files with the same content share a collection; re-indexing one
+        updates the others, so the rest are skipped.
+        """
+        queryset = self._queryset().order_by("id")
+        while True:
+            batch = queryset.filter(id__gt=after) if after else queryset
+            batch = list(batch[:self.options["batch_size"]])
+            if not batch:
+                return
+            hashes = {f.content_hash for f in batch if f.content_hash}
+            owners = {}
+            for file_id, content_hash in (
+                self._queryset().filter(content_hash__in=hashes).order_by("-id").values_list("id", "content_hash")
+            ):
+                owners[content_hash] = file_id
+            for file_instance in batch:
+                if not file_instance.content_hash or owners[file_instance.content_hash] == file_instance.id:
+                    yield file_instance
+            after = batch[-1].id
+
+    # Dry run
+
+    def _estimate(self):
+        files = exact = 0
+        tokens = 0
+        for file_instance in self._iter_files():
+            file_tokens, is_exact = estimate_tokens(file_instance)
+            files += 1
+            exact += is_exact
+            tokens += file_tokens
+        cost = tokens * self.options["price_per_million"] / 1_000_000
+        self.stdout.write(
+            f"{files} documents, ~{tokens} embedding tokens (exact for {exact} with a cached parse), "
+            f"~${cost:.4f} at ${self.options['price_per_million']}/M tokens."
+        )
+        if self.options["token_budget"] and tokens > self.options["token_budget"]:
+            self.stdout.write(f"The token budget of {self.options['token_budget']} would stop the run early.")
+
+    # State
+
+    def _load_state(self):
+        path = self.options["state_file"]
+        if os.path.exists(path) and not self.options["restart"]:
+            with open(path) as f:
+                state = json.load(f)
+            state["budget_exhausted"] = False
+            return state
+        return {"cursor": "", "pending": {}, "dispatched": 0, "tokens": 0, "budget_exhausted": False}
+
+    def _save_state(self):
+        path = self.options["state_file"]
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.state, f)
+        os.replace(path + ".tmp", path)
+
+    # Dispatch
+
+    def _files_to_dispatch(self):
+        """
+        Yield (file id, estimated tokens): files in flight when the last run stopped
+        first, then the rest after the saved cursor, until the token budget runs out.
+        """
+        for file_id, entry in list(self.state["pending"].items()):
+            yield file_id, entry["tokens"]
+        cursor = self.state["cursor"]
+        if cursor is None:
+            return
+        for file_instance in self._iter_files(after=cursor or None):
+            tokens, _ = estimate_tokens(file_instance)
+            budget = self.options["token_budget"]
+            if budget is not None and self.state["tokens"] + tokens > budget:
+                self.stdout.write(self.style.WARNING("Token budget reached; stopping."))
+                self.state["budget_exhausted"] = True
+                return
+            self._throttle(tokens)
+            self.state["tokens"] += tokens
+            self.state["dispatched"] += 1
+            self.state["cursor"] = str(file_instance.id)
+            yield str(file_instance.id), tokens
+        self.state["cursor"] = None
+
+    def _throttle(self, tokens):
+        limit = self.options["tokens_per_minute"]
+        if not limit:
+            return
+        while True:
+            now = time.monotonic()
+            while self.window and now - self.window[0][0] >= 60:
+                self.window.popleft()
+            used = sum(spent for _, spent in self.window)
+            # A single file above the limit still runs, alone in its window.
+            if not self.window or used + tokens <= limit:
+                self.window.append((now, tokens))
+                return
+            time.sleep(60 - (now - self.window[0][0]))
+
+    def _prepare(self, file_id):
+        # Checkpoints from an earlier attempt may hold vectors from the old model.
+        File.objects.get(id=file_id).chunk_checkpoints.all().delete()
+
+    def _run_async(self):
+        in_flight = {}
+        for file_id, tokens in self._files_to_dispatch():
+            entry = self.state["pending"].get(file_id)
+            if entry and entry.get("task_id") and AsyncResult(entry["task_id"]).status not in ("FAILURE", "REVOKED"):
+                # Still queued or running from the last run (or done): just wait for it.
+                in_flight[file_id] = AsyncResult(entry["task_id"])
+            else:
+                self._prepare(file_id)
+                result = process_file_for_embeddings.apply_async(
+                    args=[file_id],
+                    kwargs={"force": True},
+                    queue="embeddings",
+                    priority=INGEST_CLASS_PRIORITIES["large"],
+                    headers={"task_class": "reindex"},
+                )
+                self.state["pending"][file_id] = {"task_id": result.id, "tokens": tokens}
+                in_flight[file_id] = result
+            self._save_state()
+            while len(in_flight) >= self.options["concurrency"]:
+                self._collect(in_flight)
+                time.sleep(1)
+        while in_flight:
+            self._collect(in_flight)
+            time.sleep(1)
+        self._save_state()
+
+    def _collect(self, in_flight):
+        for file_id, result in list(in_flight.items()):
+            if result.ready():
+                del in_flight[file_id]
+                del self.state["pending"][file_id]
+                if result.failed():
+                    self.stderr.write(f"{file_id}: {result.result}")
+        self._save_state()
+
+    def _run_sync(self):
+        with ThreadPoolExecutor(max_workers=self.options["concurrency"]) as pool:
+            futures = {}
+            for file_id, tokens in self._files_to_dispatch():
+                self._prepare(file_id)
+                self.state["pending"][file_id] = {"task_id": None, "tokens": tokens}
+                self._save_state()
+                futures[pool.submit(_run_inline, file_id)] = file_id
+                if len(futures) >= self.options["concurrency"]:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    self._finish_sync(futures, done)
+            self._finish_sync(futures, list(futures))
+        self._save_state()
+
+    def _finish_sync(self, futures, done):
+        for future in done:
+            file_id = futures.pop(future)
+            try:
+                future.result()
+            except Exception as exc:
+                self.stderr.write(f"{file_id}: {exc}")
+            del self.state["pending"][file_id]
+            self.stdout.write(f"{file_id}: done")
+        self._save_state()
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_processed_files_done(apps, schema_editor):
+    File = apps.get_model("app", "File")
+    File.objects.filter(processed=True).update(ingest_stage="done")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_alter_file_sample_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='chunks_embedded',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='chunks_stored',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='chunks_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='ingest_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='ingest_stage',
+            field=models.CharField(choices=[('queued', 'Queued'), ('parsing', 'Parsing'), ('chunking', 'Chunking'), ('embedding', 'Embedding'), ('storing', 'Storing'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ChunkCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordinal', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('vector', models.BinaryField(null=True)),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunk_checkpoints', to='app.file')),
+            ],
+            options={
+                'ordering': ['ordinal'],
+                'constraints': [models.UniqueConstraint(fields=('file', 'ordinal'), name='unique_checkpoint_ordinal')],
+            },
+        ),
+        migrations.RunPython(mark_processed_files_done, migrations.RunPython.noop),
+    ]
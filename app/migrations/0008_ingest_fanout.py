@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_file_ingest_progress'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='chunkcheckpoint',
+            options={'ordering': ['segment', 'ordinal']},
+        ),
+        migrations.RemoveConstraint(
+            model_name='chunkcheckpoint',
+            name='unique_checkpoint_ordinal',
+        ),
+        migrations.AddField(
+            model_name='chunkcheckpoint',
+            name='segment',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='chunkcheckpoint',
+            constraint=models.UniqueConstraint(fields=('file', 'segment', 'ordinal'), name='unique_checkpoint_segment_ordinal'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_ingest_fanout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='size_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='tenant',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['tenant', 'processed'], name='file_tenant_processed_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_file_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['-uploaded_at'], name='file_uploaded_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['processed', '-uploaded_at'], name='file_processed_uploaded_idx'),
+        ),
+    ]
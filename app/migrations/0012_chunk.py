@@ -0,0 +1,82 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_weaviate_ids_to_chunks(apps, schema_editor):
+    File = apps.get_model("app", "File")
+    Chunk = apps.get_model("app", "Chunk")
+    batch = []
+    for file_id, weaviate_ids in File.objects.values_list("id", "weaviate_ids").iterator():
+        for ordinal, vector_id in (weaviate_ids or {}).items():
+            batch.append(Chunk(file_id=file_id, ordinal=int(ordinal), content_hash="", vector_id=vector_id))
+        if len(batch) >= 1000:
+            Chunk.objects.bulk_create(batch)
+            batch = []
+    Chunk.objects.bulk_create(batch)
+
+
+def copy_chunks_to_weaviate_ids(apps, schema_editor):
+    File = apps.get_model("app", "File")
+    Chunk = apps.get_model("app", "Chunk")
+    for file_instance in File.objects.filter(chunks__isnull=False).distinct().iterator():
+        file_instance.weaviate_ids = {
+            str(ordinal): str(vector_id)
+            for ordinal, vector_id in Chunk.objects.filter(file=file_instance).values_list("ordinal", "vector_id")
+        }
+        file_instance.save(update_fields=["weaviate_ids"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_file_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunkcheckpoint',
+            name='end_offset',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='chunkcheckpoint',
+            name='page',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='chunkcheckpoint',
+            name='start_offset',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='chunkcheckpoint',
+            name='token_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Chunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordinal', models.PositiveIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('token_count', models.PositiveIntegerField(default=0)),
+                ('page', models.PositiveIntegerField(blank=True, null=True)),
+                ('start_offset', models.PositiveIntegerField(blank=True, null=True)),
+                ('end_offset', models.PositiveIntegerField(blank=True, null=True)),
+                ('vector_id', models.UUIDField()),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='app.file')),
+            ],
+            options={
+                'ordering': ['file', 'ordinal'],
+                'indexes': [models.Index(fields=['file', 'content_hash'], name='chunk_file_hash_idx'), models.Index(fields=['content_hash'], name='chunk_hash_idx')],
+                'constraints': [models.UniqueConstraint(fields=('file', 'ordinal'), name='unique_chunk_file_ordinal')],
+            },
+        ),
+        migrations.RunPython(copy_weaviate_ids_to_chunks, copy_chunks_to_weaviate_ids),
+        migrations.RemoveField(
+            model_name='file',
+            name='weaviate_ids',
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-19 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_chunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='boilerplate_blocks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='boilerplate_chars',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='boilerplate_lines',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='BlockSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.BigIntegerField()),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='block_signatures', to='app.file')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band'], name='block_signature_band_idx')],
+                'constraints': [models.UniqueConstraint(fields=('file', 'band'), name='unique_block_signature_file_band')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+LEGACY_EMBEDDING_MODEL = "openai/text-embedding-3-small"
+
+
+def tag_existing_vectors(apps, schema_editor):
+    # Every vector stored so far came from text-embedding-3-small.
+    apps.get_model("app", "File").objects.update(embedding_model=LEGACY_EMBEDDING_MODEL)
+    apps.get_model("app", "ChunkCheckpoint").objects.filter(vector__isnull=False).update(
+        embedding_model=LEGACY_EMBEDDING_MODEL
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_boilerplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunkcheckpoint',
+            name='embedding_model',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='embedding_model',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.RunPython(tag_existing_vectors, migrations.RunPython.noop),
+    ]
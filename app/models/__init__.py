@@ -1 +1,4 @@
-from .files import File
\ No newline at end of file
+from .files import File
+from .checkpoints import ChunkCheckpoint
+from .chunks import Chunk
+from .boilerplate import BlockSignature
@@ -0,0 +1,28 @@
+from django.db import models
+
+from app.models.files import File
+
+
+class BlockSignature(models.Model):
+    """
+    One MinHash LSH band of a text block (paragraph) seen in a File.
+
+    Blocks of different files that share a band are probably near-duplicates,
+    so counting the files behind a block's bands finds boilerplate (legal
+    disclaimers, cover letters, templates) repeated across the corpus. See
+    app.utils.boilerplate.
+    """
+
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name="block_signatures")
+    band = models.BigIntegerField()  # Hash of the band index and its MinHash rows
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["file", "band"], name="unique_block_signature_file_band"),
+        ]
+        indexes = [
+            models.Index(fields=["band"], name="block_signature_band_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.file_id}:{self.band}"
@@ -0,0 +1,44 @@
+from array import array
+
+from django.db import models
+
+from app.models.files import File
+
+
+class ChunkCheckpoint(models.Model):
+    """
+    A chunk produced by an in-progress ingest, with its vector once embedded.
+
+    Rows are written after chunking (per page-range segment when a large
+    document is fanned out) and filled in batch by batch during
+    embedding, so a retried ingest task skips download, parsing and every
+    chunk that was already paid for. They are deleted once the vectors are
+    stored in the vector store.
+    """
+
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name="chunk_checkpoints")
+    segment = models.PositiveIntegerField(default=0)  # Page-range sub-task that produced the chunk
+    ordinal = models.PositiveIntegerField()  # Position within the segment
+    text = models.TextField()
+    token_count = models.PositiveIntegerField(default=0)
+    page = models.PositiveIntegerField(null=True)  # Zero-based page of the document
+    start_offset = models.PositiveIntegerField(null=True)  # Character span within the page
+    end_offset = models.PositiveIntegerField(null=True)
+    vector = models.BinaryField(null=True)  # float32 bytes, NULL until embedded
+    embedding_model = models.CharField(max_length=200, blank=True, default="")  # Model of the vector
+
+    class Meta:
+        ordering = ["segment", "ordinal"]
+        constraints = [
+            models.UniqueConstraint(fields=["file", "segment", "ordinal"], name="unique_checkpoint_segment_ordinal"),
+        ]
+
+    def set_vector(self, vector):
+        # The stdlib array keeps numpy out of every process that loads the models.
+        self.vector = array("f", vector).tobytes()
+
+    def get_vector(self):
+        return array("f", bytes(self.vector)).tolist()
+
+    def __str__(self):
+        return f"{self.file_id}:{self.segment}:{self.ordinal}"
@@ -0,0 +1,37 @@
+from django.db import models
+
+from app.models.files import File
+
+
+class Chunk(models.Model):
+    """
+    A stored chunk of a processed File and the ID of its vector.
+
+    One row per chunk, written with bulk_create when an ingest finishes, so
+    chunk metadata (source page and character span, token count) can be read
+    or updated without loading every vector ID of the file. Files with the
+    same content share one collection, so their rows point at the same
+    vectors.
+    """
+
+    file = models.ForeignKey(File, on_delete=models.CASCADE, related_name="chunks")
+    ordinal = models.PositiveIntegerField()  # Position within the document
+    content_hash = models.CharField(max_length=64)  # SHA-256 of the chunk text
+    token_count = models.PositiveIntegerField(default=0)
+    page = models.PositiveIntegerField(null=True, blank=True)  # Zero-based page or parser section
+    start_offset = models.PositiveIntegerField(null=True, blank=True)  # Character span within the page
+    end_offset = models.PositiveIntegerField(null=True, blank=True)
+    vector_id = models.UUIDField()  # Object UUID in the vector store
+
+    class Meta:
+        ordering = ["file", "ordinal"]
+        constraints = [
+            models.UniqueConstraint(fields=["file", "ordinal"], name="unique_chunk_file_ordinal"),
+        ]
+        indexes = [
+            models.Index(fields=["file", "content_hash"], name="chunk_file_hash_idx"),
+            models.Index(fields=["content_hash"], name="chunk_hash_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.file_id}:{self.ordinal}"
@@ -15,14 +15,57 @@ class File(models.Model):
         ("txt", "TXT"),
     ]
 
+    INGEST_STAGES = [
+        ("queued", "Queued"),
+        ("parsing", "Parsing"),
+        ("chunking", "Chunking"),
+        ("embedding", "Embedding"),
+        ("storing", "Storing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     url = models.CharField(blank=False, max_length=500)
     file_type = models.CharField(max_length=10, choices=FILE_FORMATS)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     processed = models.BooleanField(default=False)  # Flag to track processing status
-    weaviate_ids = models.JSONField(default=dict)  # Store Weaviate IDs for the file
     sample_questions = models.JSONField(default=list, blank=True, null=True) # Store sample questions to be displayed in UI
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)  # SHA-256 of the document bytes
+    tenant = models.CharField(max_length=100, blank=True, default="")  # Uploader's tenant, from the X-Tenant-ID header
+    size_bytes = models.BigIntegerField(null=True, blank=True)  # Size hint from the upload, used for scheduling
+    page_count = models.PositiveIntegerField(null=True, blank=True)  # Known for PDFs once downloaded
+    ingest_stage = models.CharField(max_length=20, choices=INGEST_STAGES, default="queued")
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_embedded = models.PositiveIntegerField(default=0)
+    chunks_stored = models.PositiveIntegerField(default=0)
+    ingest_error = models.TextField(blank=True, default="")
+    # "<backend>/<model>" that produced the stored vectors (app.utils.embedding_backends).
+    embedding_model = models.CharField(max_length=200, blank=True, default="")
+    # Text stripped as boilerplate before chunking (app.utils.boilerplate).
+    boilerplate_lines = models.PositiveIntegerField(default=0)  # Repeated header/footer lines
+    boilerplate_blocks = models.PositiveIntegerField(default=0)  # Blocks seen in other files
+    boilerplate_chars = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Counting a tenant's waiting files when scheduling ingests.
+            models.Index(fields=["tenant", "processed"], name="file_tenant_processed_idx"),
+            # Listing: cursor pagination on uploaded_at, optionally filtered by processed.
+            models.Index(fields=["-uploaded_at"], name="file_uploaded_at_idx"),
+            models.Index(fields=["processed", "-uploaded_at"], name="file_processed_uploaded_idx"),
+        ]
+
+    @property
+    def vector_key(self):
+        """
+        Identifier of the vector store collection holding this file's chunks.
+
+        Files with the same content share one content-addressed collection;
+        files ingested before hashing keep their per-file collection.
+        """
+        return self.content_hash or str(self.id)
 
     def __str__(self):
         return self.name
@@ -1 +1 @@
-from .files import FileSerializer
\ No newline at end of file
+from .files import FileListSerializer, FileSerializer
@@ -1,11 +1,78 @@
+from django.core import signing
 from rest_framework import serializers
 from app.models.files import File
+from app.utils.upload_tokens import read_upload_token
 
 class FileSerializer(serializers.ModelSerializer):
-    # Mark weaviate_ids as read_only so it's excluded from input data.
-    weaviate_ids = serializers.JSONField(read_only=True)
+    # Chunk position -> vector UUID, the shape the old weaviate_ids field had.
+    weaviate_ids = serializers.SerializerMethodField()
+    # Token returned by the upload endpoint, carrying the signed content hash.
+    upload_token = serializers.CharField(write_only=True, required=False)
     
     class Meta:
         model = File
         fields = "__all__"
-        read_only_fields = ("weaviate_ids", "uploaded_at")
\ No newline at end of file
+        read_only_fields = (
+            "uploaded_at",
+            "content_hash",
+            "tenant",
+            "page_count",
+            "ingest_stage",
+            "chunks_total",
+            "chunks_embedded",
+            "chunks_stored",
+            "ingest_error",
+            "boilerplate_lines",
+            "boilerplate_blocks",
+            "boilerplate_chars",
+            "embedding_model",
+        )
+
+    def validate(self, attrs):
+        token = attrs.pop("upload_token", None)
+        url = attrs.get("url", getattr(self.instance, "url", None))
+        if token:
+            try:
+                upload = read_upload_token(token)
+            except signing.BadSignature:
+                raise serializers.ValidationError({"upload_token": "Invalid upload token."})
+            if upload["url"] != url:
+                raise serializers.ValidationError({"upload_token": "Upload token does not match the file URL."})
+            attrs["content_hash"] = upload["sha256"]
+            attrs.setdefault("size_bytes", upload["size"])
+        elif self.instance is not None and url != self.instance.url:
+            # New content: the hash is recomputed when the file is ingested.
+            attrs["content_hash"] = ""
+        return attrs
+
+    def get_weaviate_ids(self, obj):
+        return {
+            str(ordinal): str(vector_id)
+            for ordinal, vector_id in obj.chunks.order_by("ordinal").values_list("ordinal", "vector_id")
+        }
+
+
+class FileListSerializer(serializers.ModelSerializer):
+    """
+    Lightweight representation for listings. Leaves out weaviate_ids (one
+    Chunk row per chunk) and sample_questions, which the list queryset defers.
+    """
+
+    class Meta:
+        model = File
+        fields = (
+            "id",
+            "name",
+            "url",
+            "file_type",
+            "uploaded_at",
+            "processed",
+            "tenant",
+            "size_bytes",
+            "page_count",
+            "ingest_stage",
+            "chunks_total",
+            "ingest_error",
+            "embedding_model",
+        )
+        read_only_fields = fields
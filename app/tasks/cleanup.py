@@ -0,0 +1,86 @@
+# app/tasks/cleanup.py
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+from app.models.files import File
+from app.utils.embeddings import delete_collections
+from app.utils.metrics import metric_labels, span
+from app.utils.parse_cache import delete_parsed_pages
+from app.utils.s3 import delete_files_from_s3, key_from_url
+from app.utils.scheduling import INGEST_CLASS_PRIORITIES
+from config.celery import app
+
+logger = logging.getLogger(__name__)
+
+
+def _unreferenced(vector_keys, urls, content_hashes):
+    """
+    Drop the artifacts that a remaining File still uses, e.g. content shared with a duplicate.
+
+    A File without a content hash only holds the collection named after its
+    id while it is processed; a re-pointed File is re-ingested under the
+    hash of its new content.
+    """
+    vector_keys, urls, content_hashes = set(vector_keys), set(urls), set(content_hashes)
+    live = File.objects.filter(
+        Q(content_hash__in=vector_keys | content_hashes)
+        | Q(id__in=[key for key in vector_keys if len(key) == 36], content_hash="", processed=True)
+        | Q(url__in=urls)
+    ).values_list("id", "content_hash", "url")
+    for file_id, content_hash, url in live:
+        vector_keys.discard(content_hash or str(file_id))
+        content_hashes.discard(content_hash)
+        urls.discard(url)
+    return vector_keys, urls, content_hashes
+
+
+# Nothing polls cleanup, so its result is not stored.
+@app.task(bind=True, queue="embeddings", acks_late=True, max_retries=5, ignore_result=True)
+def cleanup_file_artifacts(self, vector_keys, urls, content_hashes):
+    """
+    Delete the vector collections, S3 objects and cached parses left behind by deleted Files.
+
+    Collections are deleted over one vector store connection and S3 objects
+    with batched delete_objects calls. Anything a remaining File still
+    references is kept, so this is safe to run late or twice.
+    """
+    vector_keys, urls, content_hashes = _unreferenced(vector_keys, urls, content_hashes)
+    s3_keys = [key for key in map(key_from_url, urls) if key]
+    try:
+        with metric_labels(task="cleanup"), span("total") as stage:
+            if vector_keys:
+                delete_collections(sorted(vector_keys))
+                stage.count("collections", len(vector_keys))
+            if content_hashes:
+                delete_parsed_pages(sorted(content_hashes))
+            failed = delete_files_from_s3(s3_keys) if s3_keys else []
+            stage.count("objects", len(s3_keys) - len(failed))
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries * 30)
+    if failed:
+        # Collections are gone already; only the failed objects are retried.
+        raise self.retry(args=[[], [url for url in urls if key_from_url(url) in failed], []],
+                         countdown=2 ** self.request.retries * 30)
+    return {"collections": len(vector_keys), "objects": len(s3_keys), "parse_caches": len(content_hashes)}
+
+
+def schedule_cleanup(files):
+    """
+    Queue cleanup of the given Files' artifacts once the current transaction commits.
+
+    Call it inside the transaction that deletes (or re-points) the Files,
+    before deleting them, since deleted instances lose their primary key.
+    """
+    vector_keys = [file_instance.vector_key for file_instance in files]
+    urls = [file_instance.url for file_instance in files if file_instance.url]
+    content_hashes = [file_instance.content_hash for file_instance in files if file_instance.content_hash]
+    if not vector_keys:
+        return
+    transaction.on_commit(lambda: cleanup_file_artifacts.apply_async(
+        args=[vector_keys, urls, content_hashes],
+        queue="embeddings",
+        priority=INGEST_CLASS_PRIORITIES["large"],
+        headers={"task_class": "cleanup"},
+    ))
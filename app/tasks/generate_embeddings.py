@@ -1,42 +1,616 @@
 # app/generate_embeddings.py
-from celery import shared_task
+import hashlib
+import logging
+import os
+
+from celery import chord
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from app.models.checkpoints import ChunkCheckpoint
+from app.models.chunks import Chunk
 from app.models.files import File
-from app.utils.embeddings import generate_embeddings, store_embeddings
-from app.utils.parsers import parse_file_from_url
-from app.utils.chunk_generator import generate_chunks
+from app.utils.embedding_backends import get_backend
+from app.utils.embeddings import store_embeddings
+from app.utils.metrics import metric_labels, span
+from app.utils.parse_cache import (
+    delete_source_segments, load_parsed_pages, load_source_segment, save_parsed_pages, save_source_segments,
+)
+from app.utils.parsers import download_file, file_sha256, get_pdf_page_count, parse_file, parse_file_from_url
+from app.utils.scheduling import ingest_priority
+from app.utils.chunk_generator import generate_chunk_spans
 from config.celery import app
 
+logger = logging.getLogger(__name__)
+
+MAX_TOKENS_PER_CHUNK = settings.CHUNK_MAX_TOKENS
+CHUNK_BATCH_SIZE = 1000
+
+
+def _set_progress(file_instance, **fields):
+    """
+    Update ingest progress fields on the File and save only those columns.
+    """
+    for name, value in fields.items():
+        setattr(file_instance, name, value)
+    file_instance.save(update_fields=list(fields))
+
+
+def _add_progress(file_instance, **increments):
+    """
+    Atomically add to progress counters, which several sub-tasks may update at once.
+    """
+    File.objects.filter(pk=file_instance.pk).update(
+        **{name: F(name) + value for name, value in increments.items()}
+    )
+
+
+def _load_cached_parse(file_instance, page_numbers=None):
+    """
+    Return cached parser output for the file, recording the page count of a cached PDF.
+    """
+    if not file_instance.content_hash:
+        return None
+    with span("parse_cache") as stage:
+        texts = load_parsed_pages(file_instance.content_hash, file_instance.file_type, page_numbers)
+        stage.count("hits" if texts is not None else "misses")
+    if texts is not None and page_numbers is None and file_instance.file_type == "pdf":
+        _set_progress(file_instance, page_count=len(texts))
+    return texts
+
+
+def _parsed_completely(texts):
+    """
+    Whether a parse can be cached: the supervised parser marks results that
+    lost pages to its time or memory budgets, which a retry might recover.
+    """
+    return getattr(texts, "complete", True) and not getattr(texts, "skipped", None)
+
+
+def _download_and_parse(file_instance):
+    """
+    Download the file, hash it and parse it unless it turns out to be known content.
+
+    A PDF that will be fanned out is split into page-range segments in the
+    parse cache storage instead, so its sub-tasks do not download it again.
+
+    Returns:
+        tuple: (parsed texts, or None if the file is a duplicate, is cached,
+        or will be fanned out; whether it was linked to a duplicate).
+    """
+    with span("download") as stage:
+        temp_file_path = download_file(file_instance.url, file_instance.file_type)
+        stage.count("bytes", os.path.getsize(temp_file_path))
+    try:
+        if not file_instance.content_hash:
+            # Uploads without a token (e.g. external URLs) are hashed here.
+            _set_progress(file_instance, content_hash=file_sha256(temp_file_path))
+            if link_duplicate_content(file_instance):
+                return None, True
+            texts = _load_cached_parse(file_instance)
+            if texts is not None:
+                return texts, False
+        if file_instance.file_type == "pdf":
+            with span("pdf_page_count"):
+                _set_progress(file_instance, page_count=get_pdf_page_count(temp_file_path))
+        if _should_fan_out(file_instance):
+            with span("split") as stage:
+                ranges = [pages for _, pages in _page_ranges(file_instance.page_count)]
+                if save_source_segments(file_instance.vector_key, temp_file_path, ranges):
+                    stage.count("segments", len(ranges))
+            return None, False
+        with span("parse") as stage:
+            texts, ext = parse_file(temp_file_path, file_instance.file_type)
+            stage.count("pages", len(texts))
+        if _parsed_completely(texts):
+            save_parsed_pages(file_instance.content_hash, file_instance.file_type, texts)
+        return texts, False
+    finally:
+        os.remove(temp_file_path)
+
+
+def _parse_source_segment(file_instance, first_page):
+    """
+    Parse the source segment of a fanned-out PDF that starts at ``first_page``.
+
+    Returns:
+        list | None: Text per page of the segment, or None if it was not saved.
+    """
+    with span("download") as stage:
+        temp_file_path = load_source_segment(file_instance.vector_key, first_page)
+        if temp_file_path is None:
+            return None
+        stage.count("bytes", os.path.getsize(temp_file_path))
+    try:
+        with span("parse") as stage:
+            texts, ext = parse_file(temp_file_path, file_instance.file_type)
+            stage.count("pages", len(texts))
+        return texts
+    finally:
+        os.remove(temp_file_path)
+
+
+def _should_fan_out(file_instance):
+    return (file_instance.page_count or 0) > settings.INGEST_FANOUT_PAGE_THRESHOLD
+
+
+def _page_ranges(page_count):
+    """
+    Split a document into (segment, range of zero-based pages) sub-task inputs.
+    """
+    size = settings.INGEST_FANOUT_PAGES_PER_TASK
+    return [
+        (segment, range(first, min(first + size, page_count)))
+        for segment, first in enumerate(range(0, page_count, size))
+    ]
+
+
+def _checkpoint_chunks(file_instance, texts, segment=0, max_tokens=MAX_TOKENS_PER_CHUNK, first_page=0):
+    """
+    Chunk parsed texts and persist every chunk, with its source page and span, as a checkpoint row.
+
+    Boilerplate is stripped first (see app.utils.boilerplate); chunk spans
+    still refer to the parsed pages, and blank chunks are dropped.
+    """
+    # Pulls in numpy; imported here so enqueueing from the web process stays light.
+    from app.utils.boilerplate import original_offset, strip_boilerplate
+
+    _set_progress(file_instance, ingest_stage="chunking")
+    offset_maps, removed = None, {}
+    if settings.BOILERPLATE_STRIP:
+        with span("boilerplate") as stage:
+            texts, offset_maps, removed = strip_boilerplate(file_instance, texts)
+            for item, value in removed.items():
+                stage.count(item, value)
+    with span("chunk") as stage:
+        chunks = [chunk for chunk in generate_chunk_spans(texts, max_tokens=max_tokens) if chunk["text"].strip()]
+        stage.count("chunks", len(chunks))
+    if offset_maps is not None:
+        for chunk in chunks:
+            offset_map = offset_maps[chunk["page"]]
+            chunk["start"] = original_offset(offset_map, chunk["start"])
+            chunk["end"] = original_offset(offset_map, chunk["end"])
+    with transaction.atomic():
+        ChunkCheckpoint.objects.bulk_create(
+            [
+                ChunkCheckpoint(
+                    file=file_instance,
+                    segment=segment,
+                    ordinal=i,
+                    text=chunk["text"],
+                    token_count=chunk["token_count"],
+                    page=first_page + chunk["page"],
+                    start_offset=chunk["start"],
+                    end_offset=chunk["end"],
+                )
+                for i, chunk in enumerate(chunks)
+            ],
+            batch_size=500,
+        )
+        _add_progress(
+            file_instance,
+            chunks_total=len(chunks),
+            **{f"boilerplate_{item}": value for item, value in removed.items()},
+        )
+
+
+def _embed_pending_chunks(file_instance, checkpoints):
+    """
+    Embed the checkpointed chunks that have no vector from EMBEDDING_MODEL yet, one batch at a time.
+    """
+    _set_progress(file_instance, ingest_stage="embedding")
+    backend = get_backend()
+    # Vectors from another model (EMBEDDING_MODEL changed mid-ingest) are redone.
+    stale = checkpoints.filter(vector__isnull=False).exclude(embedding_model=backend.model_id).count()
+    if stale:
+        _add_progress(file_instance, chunks_embedded=-stale)
+    pending = list(
+        checkpoints.filter(Q(vector__isnull=True) | ~Q(embedding_model=backend.model_id)).defer("vector")
+    )
+    with span("embed") as stage:
+        for start in range(0, len(pending), settings.EMBEDDING_BATCH_SIZE):
+            batch = pending[start:start + settings.EMBEDDING_BATCH_SIZE]
+            vectors = backend.embed([checkpoint.text for checkpoint in batch])
+            for checkpoint, vector in zip(batch, vectors):
+                checkpoint.set_vector(vector)
+                checkpoint.embedding_model = backend.model_id
+            with transaction.atomic():
+                ChunkCheckpoint.objects.bulk_update(batch, ["vector", "embedding_model"])
+                _add_progress(file_instance, chunks_embedded=len(batch))
+            stage.count("vectors", len(batch))
+
+
+def _store_checkpointed_chunks(file_instance):
+    """
+    Write every checkpointed chunk and vector to the vector store, in document order.
+
+    The collection is recreated on each call, so repeating this step after a
+    crash is safe.
+    """
+    _set_progress(file_instance, ingest_stage="storing")
+    checkpoints = list(file_instance.chunk_checkpoints.all())
+    models = {checkpoint.embedding_model for checkpoint in checkpoints}
+    if len(models) > 1:
+        raise ValueError(f"Chunks of {file_instance.id} were embedded with several models: {sorted(models)}.")
+    file_instance.embedding_model = models.pop() if models else get_backend().model_id
+    with span("store") as stage:
+        response = store_embeddings(
+            file_instance.vector_key,
+            [checkpoint.text for checkpoint in checkpoints],
+            [checkpoint.get_vector() for checkpoint in checkpoints],
+            [
+                {"page": checkpoint.page, "start_offset": checkpoint.start_offset, "end_offset": checkpoint.end_offset}
+                for checkpoint in checkpoints
+            ],
+        )
+        stage.count("vectors", len(response.uuids))
+    return response
+
+
+def link_duplicate_content(file_instance):
+    """
+    Reuse the vectors of an already processed File with the same content.
+
+    Files with equal content_hash share one vector store collection, so a
+    duplicate upload is marked processed without parsing or embedding.
+
+    Returns:
+        bool: True if a processed duplicate was found and linked.
+    """
+    if not file_instance.content_hash:
+        return False
+    source = (
+        File.objects.filter(content_hash=file_instance.content_hash, processed=True)
+        .exclude(pk=file_instance.pk)
+        .order_by("uploaded_at")
+        .first()
+    )
+    if source is None:
+        return False
+    with transaction.atomic():
+        _set_progress(
+            file_instance,
+            processed=True,
+            ingest_stage="done",
+            ingest_error="",
+            page_count=source.page_count,
+            chunks_total=source.chunks_total,
+            chunks_embedded=source.chunks_embedded,
+            chunks_stored=source.chunks_stored,
+            embedding_model=source.embedding_model,
+        )
+        file_instance.chunk_checkpoints.all().delete()
+        _copy_chunks(source, [file_instance])
+    logger.info("Linked %s to the vectors of duplicate %s.", file_instance.id, source.id)
+    return True
+
+
+def _ingest_owner(file_instance):
+    """
+    Return the File that ingests this content, the oldest one not yet failed.
+
+    Concurrent Files with the same content wait for it instead of writing
+    to the shared collection at the same time.
+    """
+    if not file_instance.content_hash:
+        return file_instance
+    return (
+        File.objects.filter(content_hash=file_instance.content_hash)
+        .exclude(ingest_stage="failed")
+        .order_by("uploaded_at", "id")
+        .first()
+    ) or file_instance
+
 
-@app.task(queue="embeddings")
-def process_file_for_embeddings(file_id):
+def _dedup_result(file_instance):
+    return {
+        "status": "SUCCESS",
+        "file_id": str(file_instance.id),
+        "chunks": file_instance.chunks_stored,
+        "deduplicated": True,
+    }
+
+
+def _copy_chunks(source, targets):
+    """
+    Replace the Chunk rows of ``targets`` with copies of the rows of ``source``.
+    """
+    Chunk.objects.filter(file__in=targets).delete()
+    rows = list(source.chunks.values(
+        "ordinal", "content_hash", "token_count", "page", "start_offset", "end_offset", "vector_id"
+    ))
+    Chunk.objects.bulk_create(
+        [Chunk(file=target, **row) for target in targets for row in rows],
+        batch_size=CHUNK_BATCH_SIZE,
+    )
+
+
+def _sync_duplicates(file_instance):
+    """
+    Point the other processed Files sharing this content at its new vectors.
+    """
+    if not file_instance.content_hash:
+        return
+    duplicates = File.objects.filter(content_hash=file_instance.content_hash, processed=True).exclude(
+        pk=file_instance.pk
+    )
+    duplicates.update(
+        chunks_total=file_instance.chunks_total,
+        chunks_embedded=file_instance.chunks_embedded,
+        chunks_stored=file_instance.chunks_stored,
+        embedding_model=file_instance.embedding_model,
+    )
+    _copy_chunks(file_instance, list(duplicates))
+
+
+def _finish_ingest(file_instance, response):
+    """
+    Record a Chunk row per stored vector, mark the File processed and drop its checkpoints.
+    """
+    # UUIDs of the objects stored in Weaviate, keyed by position in the batch.
+    uuids = response.uuids
+    checkpoints = file_instance.chunk_checkpoints.defer("vector")
+
+    with transaction.atomic():
+        file_instance.chunks.all().delete()
+        Chunk.objects.bulk_create(
+            (
+                Chunk(
+                    file=file_instance,
+                    ordinal=i,
+                    content_hash=hashlib.sha256(checkpoint.text.encode("utf-8")).hexdigest(),
+                    token_count=checkpoint.token_count,
+                    page=checkpoint.page,
+                    start_offset=checkpoint.start_offset,
+                    end_offset=checkpoint.end_offset,
+                    vector_id=uuids[i],
+                )
+                for i, checkpoint in enumerate(checkpoints.iterator())
+                if i in uuids
+            ),
+            batch_size=CHUNK_BATCH_SIZE,
+        )
+        file_instance.processed = True
+        file_instance.ingest_stage = "done"
+        file_instance.ingest_error = ""
+        file_instance.chunks_stored = len(uuids)
+        # Counters other than chunks_stored may have been advanced by sub-tasks.
+        file_instance.save(
+            update_fields=["processed", "ingest_stage", "ingest_error", "chunks_stored", "embedding_model"]
+        )
+        file_instance.refresh_from_db(fields=["chunks_total", "chunks_embedded"])
+        file_instance.chunk_checkpoints.all().delete()
+        _sync_duplicates(file_instance)
+
+    return {
+        "status": "SUCCESS",
+        "file_id": str(file_instance.id),
+        "chunks": len(uuids),
+    }
+
+
+def _handle_failure(task, file_instance, exc):
+    """
+    Retry the task with exponential backoff, or mark the File failed once retries run out.
+    """
+    if task.request.retries >= task.max_retries:
+        _set_progress(file_instance, ingest_stage="failed", ingest_error=str(exc))
+        raise exc
+    logger.exception("Ingest of %s failed, retrying.", file_instance.id)
+    raise task.retry(exc=exc, countdown=2 ** task.request.retries * 10)
+
+
+def _task_options(task):
+    """
+    Options that keep the priority and class the file was scheduled with on follow-up tasks.
+    """
+    return {
+        "priority": (task.request.delivery_info or {}).get("priority"),
+        "headers": {"task_class": getattr(task.request, "task_class", None)},
+    }
+
+
+def _wait_for_owner(task, file_instance, owner, waited):
+    """
+    Re-queue the task until ``owner``, which ingests the same content, is done.
+
+    The task is replaced rather than retried, so waiting does not use up its
+    retries and the client keeps polling the same task id. After
+    INGEST_DUPLICATE_MAX_WAIT seconds the File is marked as failed: ingesting
+    it alongside the owner would write the shared collection twice.
+    """
+    if waited >= settings.INGEST_DUPLICATE_MAX_WAIT or task.request.called_directly:
+        error = f"File {owner.id} with the same content is still being ingested."
+        _set_progress(file_instance, ingest_stage="failed", ingest_error=error)
+        raise RuntimeError(error)
+    countdown = settings.INGEST_DUPLICATE_POLL_SECONDS
+    logger.info("Waiting for %s, which ingests the same content as %s.", owner.id, file_instance.id)
+    raise task.replace(
+        process_file_for_embeddings.si(str(file_instance.id), waited=waited + countdown)
+        .set(countdown=countdown, **_task_options(task))
+    )
+
+
+def _fan_out(task, file_instance):
+    """
+    Replace the task with a chord of page-range sub-tasks and a final store callback.
+    """
+    options = _task_options(task)
+    header = [
+        ingest_page_range.si(str(file_instance.id), segment, pages.start, pages.stop).set(**options)
+        for segment, pages in _page_ranges(file_instance.page_count)
+    ]
+    callback = finalize_file_ingest.si(str(file_instance.id)).set(**options)
+    logger.info("Fanning out %s into %d page-range sub-tasks.", file_instance.id, len(header))
+
+    if task.request.called_directly:
+        # Outside a worker (e.g. the benchmark) run the same sub-tasks inline.
+        for signature in header:
+            signature.apply(throw=True)
+        return callback.apply(throw=True).get()
+    # The client polls this task's id, so the chord result replaces ours.
+    raise task.replace(chord(header, callback))
+
+
+@app.task(bind=True, queue="embeddings", acks_late=True, reject_on_worker_lost=True,
+          max_retries=settings.INGEST_MAX_RETRIES)
+def process_file_for_embeddings(self, file_id, force=False, waited=0):
     """
     Celery task to process a file and generate its embeddings.
     This task will be routed to the 'embedding_queue'.
+
+    Progress is tracked on the File (ingest_stage, chunks_*) and chunks and
+    their vectors are checkpointed in ChunkCheckpoint, so a retried or
+    redelivered task resumes where the previous attempt stopped. PDFs longer
+    than INGEST_FANOUT_PAGE_THRESHOLD pages are split into page-range
+    sub-tasks that parse, chunk and embed in parallel. A file whose content
+    hash matches an already processed File reuses its vectors, unless
+    ``force`` is set to rebuild them (used by ``manage.py reindex``). While
+    another File is ingesting the same content, the task waits for it
+    (``waited`` counts the seconds so far); see _wait_for_owner.
     """
     try:
         file_instance = File.objects.get(id=file_id)
-        texts, ext = parse_file_from_url(file_instance.url, file_instance.file_type)
-        MAX_TOKENS_PER_CHUNK = 800
-        chunks = generate_chunks(texts, max_tokens=MAX_TOKENS_PER_CHUNK)
-        embeddings = [generate_embeddings(chunk) for chunk in chunks]
-        response = store_embeddings(str(file_instance.id), texts, embeddings)
-
-        # Store UUID of embeddings stored in Weaviate.
-        uuids_dict = response.uuids
-        for key in uuids_dict.keys():
-            uuids_dict[key] = str(uuids_dict[key])
-
-        file_instance.weaviate_ids = uuids_dict
-        file_instance.processed = True
-        file_instance.save()
-
-        return {
-            "status": "SUCCESS",
-            "file_id": str(file_instance.id),
-            "weaviate_ids": uuids_dict
-        }
-        
-        
     except File.DoesNotExist:
         # Optionally log or handle the error.
-        pass
+        return None
+
+    if not force and link_duplicate_content(file_instance):
+        return _dedup_result(file_instance)
+    owner = _ingest_owner(file_instance)
+    if not force and owner.pk != file_instance.pk:
+        # Identical content is already being ingested; reuse it once done.
+        _wait_for_owner(self, file_instance, owner, waited)
+
+    duplicate = False
+    try:
+        with metric_labels(task="ingest", file_type=file_instance.file_type), span("total"):
+            checkpoints = file_instance.chunk_checkpoints.all()
+            resuming = checkpoints.exists()
+            if resuming:
+                logger.info("Resuming ingest of %s from %d/%d embedded chunks.",
+                            file_instance.id, file_instance.chunks_embedded, file_instance.chunks_total)
+            else:
+                _set_progress(file_instance, ingest_stage="parsing", chunks_total=0, chunks_embedded=0, chunks_stored=0,
+                          boilerplate_lines=0, boilerplate_blocks=0, boilerplate_chars=0)
+
+            if not resuming:
+                # Fanned-out PDFs are downloaded here too, once, to split them for the sub-tasks.
+                texts = _load_cached_parse(file_instance)
+                if texts is None:
+                    texts, duplicate = _download_and_parse(file_instance)
+                if texts is not None and not _should_fan_out(file_instance):
+                    _checkpoint_chunks(file_instance, texts)
+
+            fan_out = not duplicate and _should_fan_out(file_instance)
+            if not duplicate and not fan_out:
+                _embed_pending_chunks(file_instance, checkpoints)
+                response = _store_checkpointed_chunks(file_instance)
+    except Exception as exc:
+        _handle_failure(self, file_instance, exc)
+
+    if duplicate:
+        return _dedup_result(file_instance)
+    if fan_out:
+        return _fan_out(self, file_instance)
+    return _finish_ingest(file_instance, response)
+
+
+@app.task(bind=True, queue="embeddings", acks_late=True, reject_on_worker_lost=True,
+          max_retries=settings.INGEST_MAX_RETRIES)
+def ingest_page_range(self, file_id, segment, first_page, last_page):
+    """
+    Parse, chunk and embed pages [first_page, last_page) of a fanned-out PDF.
+
+    Checkpoints are written under ``segment`` so the final callback can
+    restore document order. A segment that already has checkpoints only
+    embeds its missing vectors.
+    """
+    file_instance = File.objects.get(id=file_id)
+    checkpoints = file_instance.chunk_checkpoints.filter(segment=segment)
+    try:
+        with metric_labels(task="ingest", file_type=file_instance.file_type), span("segment"):
+            if not checkpoints.exists():
+                _set_progress(file_instance, ingest_stage="parsing")
+                pages = range(first_page, last_page)
+                texts = _load_cached_parse(file_instance, pages)
+                if texts is None:
+                    texts = _parse_source_segment(file_instance, first_page)
+                    if texts is None:
+                        # No segment was saved (e.g. the split failed); read the original.
+                        texts, ext = parse_file_from_url(file_instance.url, file_instance.file_type, pages)
+                    if _parsed_completely(texts):
+                        save_parsed_pages(
+                            file_instance.content_hash, file_instance.file_type, texts,
+                            first_page=first_page, document_pages=file_instance.page_count,
+                        )
+                _checkpoint_chunks(file_instance, texts, segment, first_page=first_page)
+            _embed_pending_chunks(file_instance, checkpoints)
+    except Exception as exc:
+        _handle_failure(self, file_instance, exc)
+    return {"segment": segment, "chunks": checkpoints.count()}
+
+
+@app.task(bind=True, queue="embeddings", acks_late=True, reject_on_worker_lost=True,
+          max_retries=settings.INGEST_MAX_RETRIES)
+def finalize_file_ingest(self, file_id):
+    """
+    Chord callback: store all segments' vectors in document order and mark the File processed.
+    """
+    file_instance = File.objects.get(id=file_id)
+    try:
+        with metric_labels(task="ingest", file_type=file_instance.file_type):
+            # Normally a no-op; covers a segment whose last batch was lost.
+            _embed_pending_chunks(file_instance, file_instance.chunk_checkpoints.all())
+            response = _store_checkpointed_chunks(file_instance)
+    except Exception as exc:
+        _handle_failure(self, file_instance, exc)
+    result = _finish_ingest(file_instance, response)
+    delete_source_segments(file_instance.vector_key)
+    return result
+
+
+@app.task(bind=True, queue="embeddings", acks_late=True, reject_on_worker_lost=True,
+          max_retries=settings.INGEST_MAX_RETRIES)
+def rechunk_file(self, file_id, max_tokens=None):
+    """
+    Re-chunk and re-embed a processed File from its cached parse artifact.
+
+    Nothing is downloaded or parsed. The old vectors keep serving queries
+    until the new ones are stored, and Files sharing the content are
+    updated as well.
+    """
+    file_instance = File.objects.get(id=file_id)
+    try:
+        with metric_labels(task="rechunk", file_type=file_instance.file_type), span("total"):
+            checkpoints = file_instance.chunk_checkpoints.all()
+            if not checkpoints.exists():
+                texts = _load_cached_parse(file_instance)
+                if texts is None:
+                    logger.warning("No cached parse for %s; re-ingest it instead.", file_instance.id)
+                    return {"status": "MISSING_ARTIFACT", "file_id": str(file_instance.id)}
+                _set_progress(file_instance, chunks_total=0, chunks_embedded=0, chunks_stored=0,
+                          boilerplate_lines=0, boilerplate_blocks=0, boilerplate_chars=0)
+                _checkpoint_chunks(file_instance, texts, max_tokens=max_tokens or MAX_TOKENS_PER_CHUNK)
+            _embed_pending_chunks(file_instance, checkpoints)
+            response = _store_checkpointed_chunks(file_instance)
+    except Exception as exc:
+        _handle_failure(self, file_instance, exc)
+    return _finish_ingest(file_instance, response)
+
+
+def enqueue_ingest(file_instance):
+    """
+    Queue process_file_for_embeddings for a file at its scheduling priority.
+
+    Returns:
+        AsyncResult: The queued task.
+    """
+    priority, task_class = ingest_priority(file_instance)
+    return process_file_for_embeddings.apply_async(
+        args=[file_instance.id],
+        queue="embeddings",
+        priority=priority,
+        headers={"task_class": task_class},
+    )
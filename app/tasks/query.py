@@ -1,36 +1,94 @@
 # app/tasks/query.py
 from celery import shared_task
-from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 
 from app.models.files import File
+from app.utils.clients import chat_model
+from app.utils.context import build_context
 from app.utils.embeddings import query_from_entries
+from app.utils.metrics import metric_labels, span
 from config.celery import app
 
+CITATION_SNIPPET_CHARS = 200
+
+
+def build_citations(file_instance, objects):
+    """
+    Describe where each retrieved chunk came from.
+
+    Locations are read from the vector properties. Collections stored before
+    they carried locations have none (their Chunk rows were migrated without
+    pages either), so their citations have ``page``, ``start`` and ``end``
+    set to None until the file is re-indexed.
+
+    Args:
+        file_instance (File): The queried file.
+        objects (list): The chunks used as context, hits and their neighbors
+            (which have no distance), most relevant passage first.
+
+    Returns:
+        list[dict]: One citation per object with ``file_id``, ``file_name``,
+        ``chunk`` (position in the document), ``page`` (1-based; the
+        paragraph or section for non-PDF files), ``start``/``end`` character
+        offsets within that page, ``distance`` and a short ``snippet``.
+    """
+    citations = []
+    for obj in objects:
+        page = obj.properties.get("page")
+        citations.append({
+            "file_id": str(file_instance.id),
+            "file_name": file_instance.name,
+            "chunk": obj.properties.get("index"),
+            "page": page + 1 if page is not None else None,
+            "start": obj.properties.get("start_offset"),
+            "end": obj.properties.get("end_offset"),
+            "distance": obj.metadata.distance,
+            "snippet": obj.properties["text"][:CITATION_SNIPPET_CHARS],
+        })
+    return citations
+
 
 @app.task(queue="queries")
 def generate_response(query, file_id):
     """
-    Celery task to process a file and generate its embeddings.
-    This task will be routed to the 'embedding_queue'.
+    Celery task to answer a query from a file's most similar chunks and
+    their neighbors (see app.utils.context).
+    This task will be routed to the 'queries' queue.
+
+    Returns:
+        dict: ``answer`` (HTML) and ``citations``, the source location of
+        each chunk used as context (see build_citations).
     """
+    # Imported here so the web process can enqueue queries without loading LangChain.
+    from langchain_core.prompts import PromptTemplate
+
     try:
         file_instance = File.objects.get(id=file_id)
-        response = query_from_entries(query, str(file_instance.id), limit=3)
-        context = ""
-        for object in response.objects:
-            context += object.properties["text"].replace("\n", "") + "\n"
-
-        query = query + "\n" + context
-
-        # Initialize the OpenAI model
-        llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
-        template = PromptTemplate.from_template(
-            "Generate the response in a <></> tag with headings and subsections. {query}: {content}"
-        )
-        prompt = template.format(query=query, content=context)
-        response = llm.invoke(prompt)
-        return response.content.replace("\n", "").replace("```html", "").replace("```", "")
+        with metric_labels(task="query", file_type=file_instance.file_type), span("total"):
+            response = query_from_entries(
+                query, file_instance.vector_key, limit=3, embedding_model=file_instance.embedding_model
+            )
+            with span("expand") as stage:
+                passages, tokens = build_context(file_instance.vector_key, response.objects)
+                stage.count("chunks", sum(len(passage["objects"]) for passage in passages))
+                stage.count("context_tokens", tokens)
+            context = ""
+            for passage in passages:
+                context += passage["text"].replace("\n", "") + "\n"
+            citations = build_citations(file_instance, [obj for passage in passages for obj in passage["objects"]])
+
+            query = query + "\n" + context
+
+            with span("llm") as stage:
+                # Shared by every query of this worker process.
+                llm = chat_model("gpt-4o", 0.7)
+                template = PromptTemplate.from_template(
+                    "Generate the response in a <></> tag with headings and subsections. {query}: {content}"
+                )
+                prompt = template.format(query=query, content=context)
+                stage.count("prompt_chars", len(prompt))
+                response = llm.invoke(prompt)
+        answer = response.content.replace("\n", "").replace("```html", "").replace("```", "")
+        return {"answer": answer, "citations": citations}
 
         
     except File.DoesNotExist:
@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from app.models.files import File
+from app.utils.boilerplate import original_offset, repeated_lines, strip_boilerplate
+
+
+def _page(number, body):
+    return f"ACME Annual Report\n{body}\nPage {number} of 5\n"
+
+
+@override_settings(BOILERPLATE_EDGE_LINES=1, BOILERPLATE_MIN_PAGES=3, BOILERPLATE_PAGE_FRACTION=0.5)
+class RepeatedLinesTests(SimpleTestCase):
+    def test_finds_headers_and_page_numbers(self):
+        pages = [_page(i, f"Body text {i}.") for i in range(1, 6)]
+        self.assertEqual(repeated_lines(pages), {"acme annual report", "page # of #"})
+
+    def test_ignores_lines_repeated_in_the_body(self):
+        body = "Item\nTotal\n- \n| 10 | 20 |\nSummary"
+        pages = [_page(i, body) for i in range(1, 6)]
+        self.assertEqual(repeated_lines(pages), {"acme annual report", "page # of #"})
+
+    def test_needs_min_pages(self):
+        self.assertEqual(repeated_lines([_page(1, "a"), _page(2, "b")]), set())
+
+
+@override_settings(BOILERPLATE_EDGE_LINES=1, BOILERPLATE_MIN_PAGES=3, BOILERPLATE_PAGE_FRACTION=0.5,
+                   BOILERPLATE_MIN_FILES=3)
+class StripBoilerplateTests(TestCase):
+    def setUp(self):
+        self.file = File.objects.create(name="report.pdf", url="https://example.com/report.pdf", file_type="pdf")
+
+    def test_strips_edge_lines_and_keeps_body(self):
+        pages = [_page(i, "Total\n| 10 | 20 |") for i in range(1, 6)]
+        cleaned, offset_maps, removed = strip_boilerplate(self.file, pages)
+        self.assertEqual(cleaned, ["Total\n| 10 | 20 |\n"] * 5)
+        self.assertEqual(removed["lines"], 10)
+        self.assertEqual(removed["blocks"], 0)
+
+    def test_offsets_map_back_to_parsed_page(self):
+        pages = [_page(i, "Total\n| 10 | 20 |") for i in range(1, 6)]
+        cleaned, offset_maps, _ = strip_boilerplate(self.file, pages)
+        offset = cleaned[0].index("| 10")
+        self.assertEqual(pages[0][original_offset(offset_maps[0], offset):].split("\n")[0], "| 10 | 20 |")
+
+    def test_leaves_other_file_types_alone(self):
+        self.file.file_type = "txt"
+        pages = [_page(i, "Total") for i in range(1, 6)]
+        cleaned, _, removed = strip_boilerplate(self.file, pages)
+        self.assertEqual(cleaned, pages)
+        self.assertEqual(removed["lines"], 0)
+
+
+class OriginalOffsetTests(SimpleTestCase):
+    def test_translates_across_removed_ranges(self):
+        # Cleaned text kept original [0, 10) and [25, 40).
+        offset_map = ([0, 10], [0, 25])
+        self.assertEqual(original_offset(offset_map, 4), 4)
+        self.assertEqual(original_offset(offset_map, 10), 25)
+        self.assertEqual(original_offset(offset_map, 14), 29)
+
+    def test_empty_map_is_identity(self):
+        self.assertEqual(original_offset(([], []), 7), 7)
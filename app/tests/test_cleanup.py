@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from app.models.files import File
+from app.tasks.cleanup import _unreferenced
+
+
+class UnreferencedTests(TestCase):
+    def _file(self, url, content_hash="", processed=True):
+        return File.objects.create(
+            name="a.txt", url=url, file_type="txt", content_hash=content_hash, processed=processed,
+        )
+
+    def test_keeps_content_shared_with_remaining_file(self):
+        self._file("https://bucket/b.txt", "a" * 64)
+        self.assertEqual(
+            _unreferenced(["a" * 64], ["https://bucket/a.txt"], ["a" * 64]),
+            (set(), {"https://bucket/a.txt"}, set()),
+        )
+
+    def test_returns_everything_nothing_uses(self):
+        self._file("https://bucket/b.txt", "b" * 64)
+        self.assertEqual(
+            _unreferenced(["a" * 64], ["https://bucket/a.txt"], ["a" * 64]),
+            ({"a" * 64}, {"https://bucket/a.txt"}, {"a" * 64}),
+        )
+
+    def test_keeps_url_of_remaining_file(self):
+        self._file("https://bucket/a.txt", "b" * 64)
+        self.assertEqual(
+            _unreferenced(["a" * 64], ["https://bucket/a.txt"], ["a" * 64]),
+            ({"a" * 64}, set(), {"a" * 64}),
+        )
+
+    def test_keeps_collection_of_processed_legacy_file(self):
+        legacy = self._file("https://bucket/a.txt")
+        self.assertEqual(_unreferenced([str(legacy.id)], [], []), (set(), set(), set()))
+
+    def test_drops_collection_of_repointed_legacy_file(self):
+        # Re-pointed at a new URL, the File is re-ingested under its new hash.
+        legacy = self._file("https://bucket/new.txt", processed=False)
+        self.assertEqual(_unreferenced([str(legacy.id)], [], []), ({str(legacy.id)}, set(), set()))
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from app.utils.context import _select, build_context, neighbor_ranges
+
+
+def _chunk(index, text, page=0, distance=None):
+    return SimpleNamespace(
+        properties={"index": index, "text": text, "page": page},
+        metadata=SimpleNamespace(distance=distance),
+    )
+
+
+class _WordEncoding:
+    # One token per word, so budgets are easy to reason about.
+    def encode(self, text):
+        return text.split()
+
+
+class NeighborRangesTests(SimpleTestCase):
+    def test_merges_overlapping_and_adjacent_windows(self):
+        self.assertEqual(neighbor_ranges([10, 3, 5, 13, 20], 1), [(2, 6), (9, 14), (19, 21)])
+
+    def test_clamps_at_document_start(self):
+        self.assertEqual(neighbor_ranges([0], 2), [(0, 2)])
+
+    def test_zero_neighbors(self):
+        self.assertEqual(neighbor_ranges([4, 4, 2], 0), [(2, 2), (4, 4)])
+
+
+class SelectTests(SimpleTestCase):
+    def test_hits_first_then_nearest_neighbors(self):
+        chunks = dict.fromkeys(range(3, 8))
+        tokens = dict.fromkeys(range(3, 8), 10)
+        selected, used = _select({5: 0}, chunks, tokens, max_tokens=30)
+        self.assertEqual((selected, used), ({4, 5, 6}, 30))
+
+    def test_best_hit_kept_over_budget(self):
+        selected, used = _select({5: 0, 9: 1}, dict.fromkeys([5, 9]), {5: 50, 9: 5}, max_tokens=10)
+        self.assertEqual((selected, used), ({5}, 50))
+
+    def test_neighbor_only_added_next_to_selected_chunk(self):
+        # 6 does not fit, so 7 would leave a gap and is skipped.
+        tokens = {5: 10, 6: 30, 7: 5}
+        selected, _ = _select({5: 0}, dict.fromkeys(tokens), tokens, max_tokens=20)
+        self.assertEqual(selected, {5})
+
+
+@mock.patch("app.utils.context.get_encoding", return_value=_WordEncoding())
+class BuildContextTests(SimpleTestCase):
+    def test_expands_hits_into_passages(self, _):
+        hits = [_chunk(5, "five", distance=0.1), _chunk(9, "nine", distance=0.2)]
+        neighbors = [_chunk(i, f"n{i}") for i in (4, 6, 8, 10)]
+        with mock.patch("app.utils.context.fetch_index_ranges", return_value=neighbors) as fetch:
+            passages, used = build_context("key", hits, neighbors=1, max_tokens=100)
+        fetch.assert_called_once_with("key", [(4, 6), (8, 10)])
+        # 4-6 and 8-10 are separate runs; the best hit's run comes first.
+        self.assertEqual([passage["text"] for passage in passages], ["n4fiven6", "n8ninen10"])
+        self.assertEqual(used, 6)
+        self.assertEqual(passages[0]["objects"][1].metadata.distance, 0.1)
+
+    def test_trims_neighbors_to_budget(self, _):
+        hits = [_chunk(5, "five", distance=0.1), _chunk(9, "nine", distance=0.2)]
+        neighbors = [_chunk(i, f"n{i}") for i in (4, 6, 8, 10)]
+        with mock.patch("app.utils.context.fetch_index_ranges", return_value=neighbors):
+            passages, used = build_context("key", hits, neighbors=1, max_tokens=4)
+        # Both hits, then the best hit's neighbors.
+        self.assertEqual([passage["text"] for passage in passages], ["n4fiven6", "nine"])
+        self.assertEqual(used, 4)
+
+    def test_separates_pages(self, _):
+        hits = [_chunk(1, "end", page=0, distance=0.1)]
+        with mock.patch("app.utils.context.fetch_index_ranges", return_value=[_chunk(2, "next", page=1)]):
+            passages, _ = build_context("key", hits, neighbors=1, max_tokens=10)
+        self.assertEqual(passages[0]["text"], "end next")
+
+    def test_no_neighbors_does_not_query(self, _):
+        with mock.patch("app.utils.context.fetch_index_ranges") as fetch:
+            passages, used = build_context("key", [_chunk(3, "three", distance=0.1)], neighbors=0, max_tokens=10)
+        fetch.assert_not_called()
+        self.assertEqual((passages[0]["text"], used), ("three", 1))
+
+    def test_no_hits(self, _):
+        self.assertEqual(build_context("key", [], neighbors=1, max_tokens=10), ([], 0))
@@ -0,0 +1,53 @@
+import uuid
+
+from django.test import TestCase
+
+from app.models.checkpoints import ChunkCheckpoint
+from app.models.chunks import Chunk
+from app.models.files import File
+from app.tasks.generate_embeddings import link_duplicate_content
+
+
+class LinkDuplicateContentTests(TestCase):
+    def _file(self, **fields):
+        return File.objects.create(name="a.txt", url="https://example.com/a.txt", file_type="txt", **fields)
+
+    def setUp(self):
+        self.source = self._file(
+            content_hash="a" * 64, processed=True, ingest_stage="done", chunks_total=2, chunks_embedded=2,
+            chunks_stored=2, embedding_model="openai/text-embedding-3-small",
+        )
+        for ordinal in range(2):
+            Chunk.objects.create(
+                file=self.source, ordinal=ordinal, content_hash=str(ordinal) * 64, token_count=5,
+                page=0, start_offset=ordinal * 10, end_offset=ordinal * 10 + 10, vector_id=uuid.uuid4(),
+            )
+
+    def test_links_to_processed_file_with_same_content(self):
+        duplicate = self._file(content_hash="a" * 64)
+        ChunkCheckpoint.objects.create(file=duplicate, ordinal=0, text="stale")
+
+        self.assertTrue(link_duplicate_content(duplicate))
+
+        duplicate.refresh_from_db()
+        self.assertTrue(duplicate.processed)
+        self.assertEqual(duplicate.ingest_stage, "done")
+        self.assertEqual(duplicate.chunks_stored, 2)
+        self.assertEqual(duplicate.embedding_model, "openai/text-embedding-3-small")
+        self.assertEqual(duplicate.vector_key, self.source.vector_key)
+        self.assertFalse(duplicate.chunk_checkpoints.exists())
+        self.assertEqual(
+            list(duplicate.chunks.values_list("vector_id", flat=True)),
+            list(self.source.chunks.values_list("vector_id", flat=True)),
+        )
+
+    def test_ignores_unprocessed_files(self):
+        self.source.processed = False
+        self.source.save()
+        self.assertFalse(link_duplicate_content(self._file(content_hash="a" * 64)))
+
+    def test_ignores_other_content(self):
+        self.assertFalse(link_duplicate_content(self._file(content_hash="b" * 64)))
+
+    def test_needs_a_content_hash(self):
+        self.assertFalse(link_duplicate_content(self._file()))
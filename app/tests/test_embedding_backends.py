@@ -0,0 +1,48 @@
+import os
+import sys
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from app.utils import embedding_backends
+from app.utils.embedding_backends import LEGACY_EMBEDDING_MODEL, OpenAIEmbeddingBackend, get_backend
+
+
+@mock.patch.dict("app.utils.clients._clients", clear=True)
+class GetBackendTests(SimpleTestCase):
+    @override_settings(EMBEDDING_MODEL="openai/text-embedding-3-large")
+    def test_defaults_to_embedding_model(self):
+        backend = get_backend()
+        self.assertIsInstance(backend, OpenAIEmbeddingBackend)
+        self.assertEqual((backend.model_id, backend.model), ("openai/text-embedding-3-large", "text-embedding-3-large"))
+
+    def test_empty_name_is_the_legacy_model(self):
+        self.assertEqual(get_backend("").model_id, LEGACY_EMBEDDING_MODEL)
+
+    def test_loads_each_model_once(self):
+        self.assertIs(get_backend("openai/a"), get_backend("openai/a"))
+        self.assertIsNot(get_backend("openai/a"), get_backend("openai/b"))
+
+    @override_settings(EMBEDDING_MODELS_DIR="/models", CHUNK_MAX_TOKENS=200, EMBEDDING_MAX_SEQ_LENGTH=256)
+    def test_onnx_models_load_from_models_dir(self):
+        with mock.patch.object(embedding_backends, "OnnxEmbeddingBackend") as onnx_backend:
+            self.assertIs(get_backend("onnx/all-MiniLM-L6-v2"), onnx_backend.return_value)
+        onnx_backend.assert_called_once_with("onnx/all-MiniLM-L6-v2", os.path.join("/models", "all-MiniLM-L6-v2"))
+
+    @override_settings(CHUNK_MAX_TOKENS=800, EMBEDDING_MAX_SEQ_LENGTH=256)
+    def test_onnx_rejects_chunks_longer_than_its_input(self):
+        with mock.patch.object(embedding_backends, "OnnxEmbeddingBackend") as onnx_backend:
+            with self.assertRaisesMessage(ImproperlyConfigured, "CHUNK_MAX_TOKENS (800)"):
+                get_backend("onnx/all-MiniLM-L6-v2")
+        onnx_backend.assert_not_called()
+
+    @override_settings(CHUNK_MAX_TOKENS=200, EMBEDDING_MAX_SEQ_LENGTH=256)
+    def test_onnx_without_onnxruntime(self):
+        with mock.patch.dict(sys.modules, {"onnxruntime": None}), self.assertRaises(ImproperlyConfigured):
+            get_backend("onnx/all-MiniLM-L6-v2")
+
+    def test_unknown_backend(self):
+        for model_id in ("cohere/embed", "openai", "onnx/"):
+            with self.subTest(model_id=model_id), self.assertRaises(ImproperlyConfigured):
+                get_backend(model_id)
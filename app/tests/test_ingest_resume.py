@@ -0,0 +1,72 @@
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+
+from app.models.checkpoints import ChunkCheckpoint
+from app.models.files import File
+from app.tasks.generate_embeddings import process_file_for_embeddings
+from app.utils.embedding_backends import EmbeddingBackend
+
+
+class _FakeBackend(EmbeddingBackend):
+    def __init__(self):
+        super().__init__("fake/model")
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+def _stored(collection_name, texts, embeddings, locations=None, uuids=None):
+    return SimpleNamespace(uuids={i: uuid.UUID(int=i) for i in range(len(texts))})
+
+
+class ResumeFromCheckpointTests(TestCase):
+    def setUp(self):
+        self.file = File.objects.create(
+            name="notes.txt", url="https://example.com/notes.txt", file_type="txt",
+            ingest_stage="embedding", chunks_total=3, chunks_embedded=1,
+        )
+        self.backend = _FakeBackend()
+        for ordinal, text in enumerate(["one", "two", "three"]):
+            checkpoint = ChunkCheckpoint(file=self.file, ordinal=ordinal, text=text, token_count=1, page=0)
+            if ordinal == 0:
+                checkpoint.set_vector([9.0])
+                checkpoint.embedding_model = self.backend.model_id
+            checkpoint.save()
+
+    def _run(self):
+        with mock.patch("app.tasks.generate_embeddings.get_backend", return_value=self.backend), \
+                mock.patch("app.tasks.generate_embeddings.store_embeddings", side_effect=_stored) as store, \
+                mock.patch("app.tasks.generate_embeddings._download_and_parse") as download:
+            result = process_file_for_embeddings(self.file.id)
+        return result, store, download
+
+    def test_embeds_only_missing_vectors(self):
+        result, store, download = self._run()
+        download.assert_not_called()
+        self.assertEqual(self.backend.calls, [["two", "three"]])
+        self.assertEqual(store.call_args.args[2], [[9.0], [3.0], [5.0]])
+        self.assertEqual(result["chunks"], 3)
+
+    def test_finishes_the_file(self):
+        self._run()
+        self.file.refresh_from_db()
+        self.assertTrue(self.file.processed)
+        self.assertEqual(self.file.ingest_stage, "done")
+        self.assertEqual((self.file.chunks_embedded, self.file.chunks_stored), (3, 3))
+        self.assertEqual(self.file.embedding_model, "fake/model")
+        self.assertFalse(self.file.chunk_checkpoints.exists())
+        self.assertEqual(
+            list(self.file.chunks.values_list("vector_id", flat=True)), [uuid.UUID(int=i) for i in range(3)]
+        )
+
+    def test_redoes_vectors_from_another_model(self):
+        ChunkCheckpoint.objects.filter(file=self.file, ordinal=0).update(embedding_model="other/model")
+        self._run()
+        self.assertEqual(self.backend.calls, [["one", "two", "three"]])
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.chunks_embedded, 3)
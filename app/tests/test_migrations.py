@@ -0,0 +1,41 @@
+import uuid
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class ChunkDataMigrationTests(TransactionTestCase):
+    before = [("app", "0011_file_list_indexes")]
+    after = [("app", "0012_chunk")]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self._migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_copies_weaviate_ids_to_chunks_and_back(self):
+        apps = self._migrate(self.before)
+        vector_ids = [uuid.uuid4(), uuid.uuid4()]
+        file_instance = apps.get_model("app", "File").objects.create(
+            name="a.txt", url="https://example.com/a.txt", file_type="txt",
+            weaviate_ids={"1": str(vector_ids[1]), "0": str(vector_ids[0])},
+        )
+        apps.get_model("app", "File").objects.create(name="b.txt", url="https://example.com/b.txt", file_type="txt")
+
+        apps = self._migrate(self.after)
+        chunks = apps.get_model("app", "Chunk").objects.order_by("ordinal")
+        self.assertEqual(
+            list(chunks.values_list("file_id", "ordinal", "vector_id")),
+            [(file_instance.id, 0, vector_ids[0]), (file_instance.id, 1, vector_ids[1])],
+        )
+
+        apps = self._migrate(self.before)
+        self.assertEqual(
+            apps.get_model("app", "File").objects.get(id=file_instance.id).weaviate_ids,
+            {"0": str(vector_ids[0]), "1": str(vector_ids[1])},
+        )
@@ -0,0 +1,31 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+
+from app.utils.parse_cache import load_parsed_pages, save_parsed_pages
+
+
+class ParseCacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = override_settings(PARSE_CACHE_STORAGE="local", PARSE_CACHE_DIR=directory)
+        cache.enable()
+        self.addCleanup(cache.disable)
+
+    def test_page_size_change_misses_the_cache(self):
+        for file_type, setting in (("txt", "TXT_WINDOW_BYTES"), ("json", "JSON_RECORD_MAX_CHARS"),
+                                   ("docx", "DOCX_SECTION_MAX_CHARS")):
+            with self.subTest(file_type=file_type):
+                with override_settings(**{setting: 100}):
+                    save_parsed_pages("a" * 64, file_type, ["one", "two"])
+                    self.assertEqual(load_parsed_pages("a" * 64, file_type), ["one", "two"])
+                with override_settings(**{setting: 200}):
+                    self.assertIsNone(load_parsed_pages("a" * 64, file_type))
+
+    def test_pdf_pages_ignore_the_page_size_settings(self):
+        with override_settings(TXT_WINDOW_BYTES=100):
+            save_parsed_pages("a" * 64, "pdf", ["one"])
+        with override_settings(TXT_WINDOW_BYTES=200):
+            self.assertEqual(load_parsed_pages("a" * 64, "pdf"), ["one"])
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from app.utils import parse_supervisor
+from app.utils.parse_supervisor import ParserError, parse_file_supervised
+
+# Sends one page, then hangs like a parser stuck on the next one.
+_HANGING_CHILD = "import sys, time; sys.stdin.read(); print('{\"text\": \"one\"}', flush=True); time.sleep(30)"
+
+
+def _spawn_hanging(serve=False):
+    return subprocess.Popen(
+        [sys.executable, "-c", _HANGING_CHILD],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, start_new_session=True,
+    )
+
+
+@override_settings(PARSE_MAX_RSS_MB=0)
+class RunChildTests(SimpleTestCase):
+    @override_settings(PARSE_PAGE_TIMEOUT=1)
+    def test_page_timeout_kills_a_stuck_child(self):
+        with mock.patch.object(parse_supervisor, "_spawn", _spawn_hanging):
+            started = time.monotonic()
+            texts, outcome = parse_supervisor._run_child({"op": "parse"}, started + 60)
+        self.assertEqual((texts, outcome), (["one"], "page_timeout"))
+        self.assertLess(time.monotonic() - started, 10)
+
+    @override_settings(PARSE_PAGE_TIMEOUT=60)
+    def test_document_deadline(self):
+        with mock.patch.object(parse_supervisor, "_spawn", _spawn_hanging):
+            started = time.monotonic()
+            texts, outcome = parse_supervisor._run_child({"op": "parse"}, started + 1)
+        self.assertEqual((texts, outcome), (["one"], "deadline"))
+        self.assertLess(time.monotonic() - started, 10)
+
+
+@mock.patch("app.utils.parsers.is_text_valid", return_value=True)
+class ParseFileSupervisedTests(SimpleTestCase):
+    def _parse(self, ext, outcomes, page_numbers=range(5)):
+        with mock.patch.object(parse_supervisor, "_run_child", side_effect=outcomes) as run_child:
+            result = parse_file_supervised("doc." + ext, ext, page_numbers)
+        return result, run_child
+
+    def test_skips_a_page_and_resumes_after_it(self, _):
+        result, run_child = self._parse("pdf", [(["p0", "p1"], "page_timeout"), (["p3", "p4"], "done")])
+        self.assertEqual(list(result), ["p0", "p1", "", "p3", "p4"])
+        self.assertEqual((result.skipped, result.complete), ([2], True))
+        self.assertEqual(run_child.call_args.args[0]["pages"], [3, 4])
+
+    def test_memory_and_crash_skip_pages_too(self, _):
+        result, _ = self._parse("pdf", [([], "memory"), (["p1"], "crashed"), (["p3", "p4"], "done")])
+        self.assertEqual(list(result), ["", "p1", "", "p3", "p4"])
+        self.assertEqual(result.skipped, [0, 2])
+
+    def test_document_timeout_keeps_parsed_pages(self, _):
+        result, _ = self._parse("pdf", [(["p0"], "page_timeout"), (["p2"], "deadline")])
+        self.assertEqual(list(result), ["p0", "", "p2"])
+        self.assertEqual((result.skipped, result.complete), ([1], False))
+
+    def test_unpaged_types_stop_at_a_page_budget(self, _):
+        result, run_child = self._parse("txt", [(["w0", "w1"], "page_timeout")], None)
+        self.assertEqual(list(result), ["w0", "w1"])
+        self.assertFalse(result.complete)
+        run_child.assert_called_once()
+
+    def test_unpaged_crash_raises(self, _):
+        with self.assertRaises(ParserError):
+            self._parse("docx", [(["s0"], "crashed")], None)
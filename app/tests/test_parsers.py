@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.test import SimpleTestCase, override_settings
+
+from app.utils.json_records import iter_json_records
+from app.utils.parsers import iter_docx_sections, iter_txt_windows
+
+
+class _TempFiles(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+        return path
+
+
+class IterJsonRecordsTests(_TempFiles):
+    document = {"name": "x", "orders": [{"id": i, "sku": "abc"} for i in range(6)]}
+
+    def test_small_document_is_one_record(self):
+        path = self._write("a.json", json.dumps(self.document))
+        self.assertEqual(list(iter_json_records(path, 1000)), [("$", self.document)])
+
+    def test_splits_large_containers_in_document_order(self):
+        path = self._write("a.json", json.dumps(self.document))
+        self.assertEqual(
+            list(iter_json_records(path, 40)),
+            [("$.name", "x")] + [(f"$.orders[{i}]", order) for i, order in enumerate(self.document["orders"])],
+        )
+
+    def test_groups_small_siblings_up_to_the_limit(self):
+        path = self._write("a.json", json.dumps(self.document))
+        records = list(iter_json_records(path, 80))
+        self.assertIn("$.orders[0:3]", [record_path for record_path, _ in records])
+        orders = []
+        for record_path, value in records:
+            self.assertLessEqual(len(json.dumps(value, separators=(",", ":"))), 80)
+            if record_path.startswith("$.orders"):
+                # "$.orders[0:3]" holds a group of elements, "$.orders[3]" a single one.
+                orders.extend(value if ":" in record_path else [value])
+        self.assertEqual(orders, self.document["orders"])
+
+    def test_tokens_split_across_blocks(self):
+        document = {"text": "é" * 50 + '\\"quoted\\"', "values": [-1.5e3, 123456789, True, None], "k": "v" * 30}
+        path = self._write("a.json", json.dumps(document, ensure_ascii=False))
+        for max_chars in (20, 1000):
+            self.assertEqual(
+                list(iter_json_records(path, max_chars, block_chars=3)),
+                list(iter_json_records(path, max_chars)),
+            )
+
+    def test_invalid_json(self):
+        for text in ('{"a": 1 "b": 2}', "[1, 2", "[1,, 2]", "[1}"):
+            path = self._write("bad.json", text)
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                list(iter_json_records(path, 4))
+
+
+class IterTxtWindowsTests(_TempFiles):
+    def test_windows_end_at_paragraph_breaks(self):
+        text = "First paragraph.\n\nSecond one.\n\nThird paragraph here."
+        windows = list(iter_txt_windows(self._write("a.txt", text), 35))
+        self.assertEqual(windows, ["First paragraph.\n\nSecond one.\n\n", "Third paragraph here."])
+
+    def test_falls_back_to_line_breaks(self):
+        text = "line one\nline two\nline three"
+        windows = list(iter_txt_windows(self._write("a.txt", text), 20))
+        self.assertEqual(windows, ["line one\nline two\n", "line three"])
+
+    def test_never_splits_a_character(self):
+        text = "aé€😀" * 20
+        windows = list(iter_txt_windows(self._write("a.txt", text), 7))
+        self.assertEqual("".join(windows), text)
+        self.assertTrue(all(len(window.encode("utf-8")) <= 7 for window in windows))
+
+    def test_small_and_empty_files(self):
+        self.assertEqual(list(iter_txt_windows(self._write("a.txt", "short"), 100)), ["short"])
+        self.assertEqual(list(iter_txt_windows(self._write("b.txt", ""), 100)), [])
+
+
+def _paragraph(text, style=None):
+    props = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{props}<w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _table(*rows):
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{_paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    )
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+@override_settings(DOCX_SECTION_MAX_CHARS=60)
+class IterDocxSectionsTests(_TempFiles):
+    def _docx(self, *blocks):
+        path = os.path.join(self.dir, "a.docx")
+        body = "".join(blocks)
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr(
+                "word/document.xml",
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f"<w:body>{body}</w:body></w:document>",
+            )
+        return path
+
+    def test_sections_start_at_headings_with_their_trail(self):
+        path = self._docx(
+            _paragraph("Intro text."),
+            _paragraph("Results", "Heading1"),
+            _paragraph("Latency", "Heading2"),
+            _paragraph("Fast."),
+            _paragraph("Cost", "Heading2"),
+            _paragraph("Cheap."),
+            _paragraph("Appendix", "Heading1"),
+            _paragraph("More."),
+        )
+        self.assertEqual(
+            list(iter_docx_sections(path)),
+            ["Intro text.", "Results > Latency\nFast.", "Results > Cost\nCheap.", "Appendix\nMore."],
+        )
+
+    def test_table_rows_join_their_cells(self):
+        path = self._docx(_paragraph("Prices", "Heading1"), _table(["Item", "Total"], ["Tea", "3"]))
+        self.assertEqual(list(iter_docx_sections(path)), ["Prices\nItem | Total\nTea | 3"])
+
+    def test_long_section_continues_with_the_same_trail(self):
+        path = self._docx(
+            _paragraph("Notes", "Heading1"),
+            *[_paragraph(f"Paragraph number {i} of the notes.") for i in range(3)],
+        )
+        self.assertEqual(
+            list(iter_docx_sections(path)),
+            [
+                "Notes\nParagraph number 0 of the notes.",
+                "Notes\nParagraph number 1 of the notes.",
+                "Notes\nParagraph number 2 of the notes.",
+            ],
+        )
+
+    def test_headings_without_body_are_skipped(self):
+        path = self._docx(_paragraph("Empty", "Heading1"), _paragraph("Full", "Heading1"), _paragraph("Text."))
+        self.assertEqual(list(iter_docx_sections(path)), ["Full\nText."])
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from app.models.files import File
+from app.utils.s3 import object_url
+
+
+@override_settings(PARSE_CACHE_PREFIX="parsed", VECTOR_SNAPSHOT_PREFIX="vector-snapshots")
+class PurgeOrphanedObjectsTests(TestCase):
+    def _purge(self, keys, *args):
+        old = datetime.now(timezone.utc) - timedelta(days=7)
+        with mock.patch("app.management.commands.purge_orphans.list_objects",
+                        return_value=[(key, old) for key in keys]), \
+                mock.patch("app.management.commands.purge_orphans.delete_files_from_s3",
+                           return_value=[]) as delete:
+            call_command("purge_orphans", "--skip-vectors", "--skip-parse-cache", *args, stdout=StringIO())
+        return [key for call in delete.call_args_list for key in call.args[0]]
+
+    def test_keeps_snapshots_and_cached_parses(self):
+        File.objects.create(name="live.pdf", url=object_url("live.pdf"), file_type="pdf")
+        deleted = self._purge([
+            "live.pdf",
+            "leaked.pdf",
+            "parsed/" + "a" * 64 + "/pdf-v1/header.json",
+            "vector-snapshots/" + "a" * 64 + "/openai/manifest.json",
+        ])
+        self.assertEqual(deleted, ["leaked.pdf"])
+
+    def test_dry_run_deletes_nothing(self):
+        self.assertEqual(self._purge(["leaked.pdf"], "--dry-run"), [])
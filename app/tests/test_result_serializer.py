@@ -0,0 +1,22 @@
+import json
+
+from django.test import SimpleTestCase
+
+from app.utils import result_serializer
+
+
+class ResultSerializerTests(SimpleTestCase):
+    def test_small_results_stay_plain_json(self):
+        data = result_serializer.dumps({"status": "SUCCESS", "chunks": 3})
+        self.assertEqual(data, '{"status":"SUCCESS","chunks":3}')
+        self.assertEqual(result_serializer.loads(data), {"status": "SUCCESS", "chunks": 3})
+
+    def test_large_results_are_compressed(self):
+        value = {"answer": "<p>" + "résumé " * 200 + "</p>", "citations": [{"chunk": i} for i in range(50)]}
+        data = result_serializer.dumps(value)
+        self.assertTrue(data.startswith("z:"))
+        self.assertLess(len(data), len(json.dumps(value)))
+        self.assertEqual(result_serializer.loads(data.encode("utf-8")), value)
+
+    def test_reads_plain_json_results(self):
+        self.assertEqual(result_serializer.loads(b'"<p>old answer</p>"'), "<p>old answer</p>")
@@ -0,0 +1,90 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+from moto import mock_aws
+
+from app.utils.s3 import S3_DELETE_BATCH_SIZE, delete_files_from_s3, s3_client, upload_files_to_s3
+
+BUCKET = "test-bucket"
+
+
+class _S3TestCase(SimpleTestCase):
+    def setUp(self):
+        # Build the shared client inside the mock.
+        clients = mock.patch.dict("app.utils.clients._clients", clear=True)
+        clients.start()
+        self.addCleanup(clients.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        self.client = s3_client()
+        self.client.create_bucket(Bucket=BUCKET)
+
+    def _keys(self):
+        paginator = self.client.get_paginator("list_objects_v2")
+        return [item["Key"] for page in paginator.paginate(Bucket=BUCKET) for item in page.get("Contents", [])]
+
+
+class DeleteFilesTests(_S3TestCase):
+    def _put(self, count):
+        keys = [f"f{i:04}.txt" for i in range(count)]
+        for key in keys:
+            self.client.put_object(Bucket=BUCKET, Key=key, Body=b"x")
+        return keys
+
+    def test_batches_past_the_request_limit(self):
+        keys = self._put(S3_DELETE_BATCH_SIZE + 5)
+        calls = []
+        self.client.meta.events.register("before-call.s3.DeleteObjects", lambda **kwargs: calls.append(1))
+        self.assertEqual(delete_files_from_s3(keys, bucket=BUCKET), [])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self._keys(), [])
+
+    def test_reports_keys_s3_could_not_delete(self):
+        keys = self._put(3)
+
+        def deny_one(parsed, **kwargs):
+            parsed["Errors"] = [{"Key": keys[1], "Code": "AccessDenied", "Message": "Access Denied"}]
+
+        self.client.meta.events.register("after-call.s3.DeleteObjects", deny_one)
+        with self.assertLogs("app.utils.s3", "ERROR"):
+            self.assertEqual(delete_files_from_s3(keys, bucket=BUCKET), [keys[1]])
+
+    def test_failed_request_fails_its_whole_batch(self):
+        with self.assertLogs("app.utils.s3", "ERROR"):
+            self.assertEqual(delete_files_from_s3(["a.txt", "b.txt"], bucket="missing-bucket"), ["a.txt", "b.txt"])
+
+
+class UploadFilesTests(_S3TestCase):
+    def test_uploads_concurrently(self):
+        # Each upload waits until four are reading at once, so a serial upload would time out.
+        in_flight = threading.Barrier(4, timeout=10)
+
+        class Reader(io.BytesIO):
+            started = False
+
+            def read(self, *args):
+                if not self.started:
+                    self.started = True
+                    in_flight.wait()
+                return super().read(*args)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "on-disk.txt")
+        with open(path, "wb") as f:
+            f.write(b"from disk")
+        files = [(Reader(f"body {i}".encode()), f"file {i}.txt") for i in range(4)] + [(path, "on-disk.txt")]
+
+        urls = upload_files_to_s3(files, bucket=BUCKET, max_workers=4)
+
+        self.assertEqual(sorted(urls), sorted(name for _, name in files))
+        self.assertTrue(all(urls.values()))
+        self.assertTrue(urls["file 0.txt"].endswith("/file_0.txt"))
+        self.assertEqual(self.client.get_object(Bucket=BUCKET, Key="file_3.txt")["Body"].read(), b"body 3")
+        self.assertEqual(self.client.get_object(Bucket=BUCKET, Key="on-disk.txt")["Body"].read(), b"from disk")
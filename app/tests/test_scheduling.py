@@ -0,0 +1,33 @@
+from django.test import TestCase, override_settings
+
+from app.models.files import File
+from app.utils.scheduling import INGEST_CLASS_PRIORITIES, ingest_priority
+
+
+@override_settings(INGEST_SMALL_FILE_BYTES=100, INGEST_LARGE_FILE_BYTES=1000, INGEST_TENANT_BACKLOG_STEP=2)
+class IngestPriorityTests(TestCase):
+    def _file(self, size_bytes=None, tenant="t1", **fields):
+        return File.objects.create(
+            name="f.txt", url="https://example.com/f.txt", file_type="txt",
+            size_bytes=size_bytes, tenant=tenant, **fields,
+        )
+
+    def test_size_classes(self):
+        self.assertEqual(ingest_priority(self._file(50)), (INGEST_CLASS_PRIORITIES["small"], "small"))
+        self.assertEqual(ingest_priority(self._file(500, tenant="t2")), (INGEST_CLASS_PRIORITIES["medium"], "medium"))
+        self.assertEqual(ingest_priority(self._file(5000, tenant="t3")), (INGEST_CLASS_PRIORITIES["large"], "large"))
+        self.assertEqual(ingest_priority(self._file(tenant="t4")), (INGEST_CLASS_PRIORITIES["medium"], "medium"))
+
+    def test_tenant_backlog_lowers_priority(self):
+        for _ in range(4):
+            self._file(50)
+        # Processed, failed and other tenants' files are not backlog.
+        self._file(50, processed=True)
+        self._file(50, ingest_stage="failed")
+        self._file(50, tenant="other")
+        self.assertEqual(ingest_priority(self._file(50)), (INGEST_CLASS_PRIORITIES["small"] - 2, "small"))
+
+    def test_penalty_never_goes_below_zero(self):
+        for _ in range(20):
+            self._file(5000)
+        self.assertEqual(ingest_priority(self._file(5000)), (0, "large"))
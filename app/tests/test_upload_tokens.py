@@ -0,0 +1,42 @@
+import time
+from unittest import mock
+
+from django.core import signing
+from django.test import SimpleTestCase
+
+from app.utils.upload_tokens import (
+    make_upload_session, make_upload_token, read_upload_session, read_upload_token,
+)
+
+
+class UploadTokenTests(SimpleTestCase):
+    def test_round_trip(self):
+        token = make_upload_token("https://bucket/key.pdf", "a" * 64, 1234)
+        self.assertEqual(
+            read_upload_token(token), {"url": "https://bucket/key.pdf", "sha256": "a" * 64, "size": 1234}
+        )
+
+    def test_rejects_tampered_token(self):
+        token = make_upload_token("https://bucket/key.pdf", "a" * 64, 1234)
+        with self.assertRaises(signing.BadSignature):
+            read_upload_token(token[:-1] + ("A" if token[-1] != "A" else "B"))
+
+
+class UploadSessionTests(SimpleTestCase):
+    def test_round_trip(self):
+        session = make_upload_session("uploads/key.pdf", "key.pdf", 1234, upload_id="u1")
+        self.assertEqual(
+            read_upload_session(session, max_age=60),
+            {"key": "uploads/key.pdf", "filename": "key.pdf", "size": 1234, "upload_id": "u1", "sha256": None},
+        )
+
+    def test_rejects_session_as_token(self):
+        session = make_upload_session("uploads/key.pdf", "key.pdf", 1234)
+        with self.assertRaises(signing.BadSignature):
+            read_upload_token(session)
+
+    def test_session_expires(self):
+        session = make_upload_session("uploads/key.pdf", "key.pdf", 1234, upload_id="u1")
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + 120):
+            with self.assertRaises(signing.SignatureExpired):
+                read_upload_session(session, max_age=60)
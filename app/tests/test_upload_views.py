@@ -0,0 +1,79 @@
+from unittest import mock
+
+from botocore.exceptions import ClientError
+from django.test import TestCase
+from django.urls import reverse
+
+from app.models.files import File
+from app.utils.s3 import object_url
+from app.utils.upload_tokens import make_upload_session
+
+
+@mock.patch("app.views.files.enqueue_ingest", return_value=mock.Mock(id="task-1"))
+@mock.patch("app.views.upload.delete_file_from_s3")
+class CompleteUploadTests(TestCase):
+    def _complete(self, session, head, **data):
+        with mock.patch("app.views.upload.head_object", side_effect=head) as head_object, \
+                mock.patch("app.views.upload.complete_multipart_upload") as complete:
+            response = self.client.post(
+                reverse("upload-complete"), {"session": session, **data}, content_type="application/json"
+            )
+        return response, head_object, complete
+
+    def test_creates_the_file(self, delete, enqueue):
+        session = make_upload_session("k-a.txt", "a.txt", 10)
+        response, _, _ = self._complete(session, [{"ContentLength": 10}])
+        self.assertEqual(response.status_code, 202)
+        file_instance = File.objects.get(url=object_url("k-a.txt"))
+        self.assertEqual((file_instance.file_type, file_instance.size_bytes), ("txt", 10))
+        delete.assert_not_called()
+
+    def test_completing_twice_returns_the_same_file(self, delete, enqueue):
+        session = make_upload_session("k-a.txt", "a.txt", 10, upload_id="u1")
+        first, _, _ = self._complete(session, [None, {"ContentLength": 10}], parts=[{"part_number": 1, "etag": "e"}])
+        second, head_object, complete = self._complete(session, [])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["file_id"], first.json()["file_id"])
+        self.assertEqual(File.objects.count(), 1)
+        head_object.assert_not_called()
+        complete.assert_not_called()
+        enqueue.assert_called_once()
+
+    def test_resumes_after_the_multipart_upload_was_completed(self, delete, enqueue):
+        session = make_upload_session("k-a.txt", "a.txt", 10, upload_id="u1")
+        response, _, complete = self._complete(session, [{"ContentLength": 10}])
+        self.assertEqual(response.status_code, 202)
+        complete.assert_not_called()
+
+    def test_rejects_and_deletes_an_object_of_another_size(self, delete, enqueue):
+        session = make_upload_session("k-a.txt", "a.txt", 10)
+        response, _, _ = self._complete(session, [{"ContentLength": 11}])
+        self.assertEqual(response.status_code, 400)
+        delete.assert_called_once_with("k-a.txt")
+        self.assertFalse(File.objects.exists())
+
+    def test_rejects_and_deletes_an_unsupported_file_type(self, delete, enqueue):
+        session = make_upload_session("k-a.xlsx", "a.xlsx", 10)
+        response, _, _ = self._complete(session, [{"ContentLength": 10}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("file_type", response.json())
+        delete.assert_called_once_with("k-a.xlsx")
+
+    def test_aborts_a_multipart_upload_that_fails_to_complete(self, delete, enqueue):
+        session = make_upload_session("k-a.txt", "a.txt", 10, upload_id="u1")
+        with mock.patch("app.views.upload.complete_multipart_upload",
+                        side_effect=ClientError({"Error": {"Code": "InvalidPart"}}, "CompleteMultipartUpload")), \
+                mock.patch("app.views.upload.head_object", return_value=None), \
+                mock.patch("app.views.upload.abort_multipart_upload") as abort:
+            response = self.client.post(
+                reverse("upload-complete"),
+                {"session": session, "parts": [{"part_number": 1, "etag": "e"}]},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 400)
+        abort.assert_called_once_with("k-a.txt", "u1")
+
+    def test_missing_object(self, delete, enqueue):
+        response, _, _ = self._complete(make_upload_session("k-a.txt", "a.txt", 10), [None])
+        self.assertEqual(response.status_code, 400)
+        delete.assert_not_called()
@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 
 from app.views.query import generate_response_view, poll_query_status_view
 from app.views.files import FileViewSet
-from app.views.upload import upload_file_view  
+from app.views.metrics import metrics_view
+from app.views.upload import abort_upload_view, complete_upload_view, create_upload_view, upload_file_view
 
 # Create a router and register our viewset with it.
 router = DefaultRouter()
@@ -16,6 +17,10 @@ urlpatterns = [
     path("query-generate/", generate_response_view, name="query"),
     path("query-status/", poll_query_status_view, name="query"),
     path("upload-file/", upload_file_view, name="upload-file"),
+    path("upload-start/", create_upload_view, name="upload-start"),
+    path("upload-complete/", complete_upload_view, name="upload-complete"),
+    path("upload-abort/", abort_upload_view, name="upload-abort"),
+    path("metrics/", metrics_view, name="metrics"),
 
 
 ]
@@ -0,0 +1,269 @@
+# app/utils/boilerplate.py
+"""
+Boilerplate stripping before chunking.
+
+Two passes run over a document's parsed pages:
+
+1. Repeated edge lines (PDFs only). Running headers, footers and page
+   numbers repeat at the top or bottom of most pages of a PDF. Only the
+   first and last BOILERPLATE_EDGE_LINES non-blank lines of each page are
+   considered. There, lines are compared with case and digits ignored, so
+   "Page 3 of 40" matches "Page 4 of 40", and a line found in the edge zone
+   of at least BOILERPLATE_PAGE_FRACTION of the pages is removed from the
+   edge zones. Lines in the body of a page (table cells, labels, list
+   markers) are never removed by this pass.
+2. Corpus blocks (all file types). The remaining text is split into blocks:
+   runs of lines ended by a blank line, a short line (the last line of a
+   wrapped paragraph or a heading), a line ending a sentence, or a long
+   line (a DOCX paragraph or JSON record) on its own. Each block of at
+   least BOILERPLATE_MIN_BLOCK_WORDS words gets a MinHash signature over
+   5-word shingles, stored as LSH bands in BlockSignature rows. A block that
+   shares a band with BOILERPLATE_MIN_FILES other files of the tenant is a
+   near-duplicate of text seen across the corpus (a disclaimer, a cover
+   letter) and is removed. Files that share most of their blocks with this
+   one are other versions of the same document, not boilerplate, and are
+   not counted. A disclaimer is only recognized once enough files carry
+   it; ``manage.py rechunk`` strips it from the files ingested before.
+
+Removed text is cut out of each page. The offset map returned with every
+page translates offsets in the cleaned text back to the parsed page, so
+chunk citations still point into the parse.
+"""
+import bisect
+import hashlib
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from app.models.boilerplate import BlockSignature
+
+SHINGLE_WORDS = 5
+NUM_HASHES = 64
+# 8 bands of 8 rows: blocks with a Jaccard similarity above ~0.8 almost
+# always share a band, blocks below ~0.5 almost never do.
+BANDS = 8
+# Files sharing more than this fraction of a file's blocks are versions of it.
+MAX_SHARED_FRACTION = 0.5
+# A line this long is a paragraph on its own (DOCX, JSON, unwrapped TXT).
+LONG_LINE_CHARS = 160
+
+_ROWS = NUM_HASHES // BANDS
+_rng = np.random.default_rng(0xB01E)
+_MULTIPLIERS = _rng.integers(1, 2**63, NUM_HASHES, dtype=np.uint64) | np.uint64(1)
+_INCREMENTS = _rng.integers(0, 2**63, NUM_HASHES, dtype=np.uint64)
+_DIGITS = re.compile(r"\d+")
+_SPACE = re.compile(r"\s+")
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"[.!?:]\s*$")
+
+
+def _normalize(line):
+    return _SPACE.sub(" ", _DIGITS.sub("#", line.strip().lower()))
+
+
+def _lines(text):
+    """
+    Yield (start, end) of every line of ``text``, newline included.
+    """
+    start = 0
+    for line in text.splitlines(keepends=True):
+        yield start, start + len(line)
+        start += len(line)
+
+
+def edge_lines(text):
+    """
+    (start, end) of the first and last BOILERPLATE_EDGE_LINES non-blank lines of a page.
+    """
+    lines = [(start, end) for start, end in _lines(text) if text[start:end].strip()]
+    edge = settings.BOILERPLATE_EDGE_LINES
+    return set(lines[:edge]) | set(lines[-edge:] if edge else [])
+
+
+def repeated_lines(pages):
+    """
+    Normalized edge lines (see edge_lines) found on at least BOILERPLATE_PAGE_FRACTION of the pages.
+
+    Args:
+        pages (list): Text per page.
+
+    Returns:
+        set: Keys as produced by ``_normalize``.
+    """
+    if len(pages) < settings.BOILERPLATE_MIN_PAGES:
+        return set()
+    counts = Counter()
+    for text in pages:
+        counts.update({_normalize(text[start:end]) for start, end in edge_lines(text)} - {""})
+    threshold = max(settings.BOILERPLATE_MIN_PAGES, settings.BOILERPLATE_PAGE_FRACTION * len(pages))
+    return {key for key, pages_seen in counts.items() if pages_seen >= threshold}
+
+
+def _blocks(text, lines):
+    """
+    Group the kept, non-blank ``lines`` of a page into blocks of (start, end) line spans.
+    """
+    lengths = [len(text[start:end].strip()) for start, end in lines]
+    short = 0.8 * float(np.median([length for length in lengths if length] or [0]))
+    blocks, current = [], []
+    for (start, end), length in zip(lines, lengths):
+        if current and current[-1][1] != start:
+            # A removed line ends the block as well.
+            blocks.append(current)
+            current = []
+        if not length:
+            if current:
+                blocks.append(current)
+            current = []
+            continue
+        if length >= LONG_LINE_CHARS:
+            if current:
+                blocks.append(current)
+            blocks.append([(start, end)])
+            current = []
+            continue
+        current.append((start, end))
+        if length < short or _SENTENCE_END.search(text[start:end]):
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def minhash(words):
+    """
+    MinHash signature of a block's 5-word shingles.
+
+    Returns:
+        numpy.ndarray: NUM_HASHES uint64 values.
+    """
+    shingles = {
+        " ".join(words[i:i + SHINGLE_WORDS])
+        for i in range(max(len(words) - SHINGLE_WORDS + 1, 1))
+    }
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little") for shingle in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Multiply-add hashing wraps modulo 2**64, which is what we want.
+    return (hashes[:, None] * _MULTIPLIERS + _INCREMENTS).min(axis=0)
+
+
+def band_keys(signature):
+    """
+    Split a signature into BANDS LSH bands, each hashed to a signed 64-bit key.
+    """
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes([band]) + signature[band * _ROWS:(band + 1) * _ROWS].tobytes(), digest_size=8).digest(),
+            "little",
+            signed=True,
+        )
+        for band in range(BANDS)
+    ]
+
+
+def _corpus_blocks(file_instance, blocks):
+    """
+    Record the file's block signatures and return the indexes of the blocks
+    that are near-duplicates of blocks in BOILERPLATE_MIN_FILES other files.
+
+    Args:
+        blocks (list): Band keys per block.
+    """
+    keys = sorted({key for block_keys in blocks for key in block_keys})
+    files_by_band = defaultdict(set)
+    for start in range(0, len(keys), 500):
+        rows = (
+            BlockSignature.objects.filter(band__in=keys[start:start + 500], file__tenant=file_instance.tenant)
+            .exclude(file=file_instance)
+            .values_list("band", "file_id")
+        )
+        for band, file_id in rows:
+            files_by_band[band].add(file_id)
+    BlockSignature.objects.bulk_create(
+        [BlockSignature(file=file_instance, band=key) for key in keys], batch_size=1000, ignore_conflicts=True
+    )
+
+    block_files = [set().union(*(files_by_band[key] for key in block_keys)) for block_keys in blocks]
+    shared = Counter(file_id for files in block_files for file_id in files)
+    versions = {file_id for file_id, count in shared.items() if count > MAX_SHARED_FRACTION * len(blocks)}
+    return {
+        i for i, files in enumerate(block_files)
+        if len(files - versions) >= settings.BOILERPLATE_MIN_FILES
+    }
+
+
+def strip_boilerplate(file_instance, pages):
+    """
+    Remove repeated header/footer lines and corpus-wide boilerplate blocks from parsed pages.
+
+    Args:
+        file_instance (File): The file the pages belong to; its block
+            signatures are recorded for future files.
+        pages (list): Text per page.
+
+    Returns:
+        tuple: (cleaned text per page, offset map per page for
+        ``original_offset``, dict of removed ``lines``, ``blocks`` and ``chars``).
+    """
+    repeated = repeated_lines(pages) if file_instance.file_type == "pdf" else set()
+    removed = {"lines": 0, "blocks": 0, "chars": 0}
+    kept_lines, blocks, block_keys = [], [], []
+    for page, text in enumerate(pages):
+        lines = []
+        edges = edge_lines(text) if repeated else set()
+        for start, end in _lines(text):
+            if (start, end) in edges and _normalize(text[start:end]) in repeated:
+                removed["lines"] += 1
+                removed["chars"] += end - start
+            else:
+                lines.append((start, end))
+        kept_lines.append(lines)
+        for block in _blocks(text, lines):
+            words = _WORD.findall(text[block[0][0]:block[-1][1]].lower())
+            if len(words) >= settings.BOILERPLATE_MIN_BLOCK_WORDS:
+                blocks.append((page, block))
+                block_keys.append(band_keys(minhash(words)))
+
+    dropped = defaultdict(set)
+    if blocks:
+        for i in _corpus_blocks(file_instance, block_keys):
+            page, block = blocks[i]
+            dropped[page].update(block)
+            removed["blocks"] += 1
+            removed["chars"] += sum(end - start for start, end in block)
+
+    cleaned, offset_maps = [], []
+    for page, text in enumerate(pages):
+        pieces = []
+        for start, end in kept_lines[page]:
+            if (start, end) in dropped[page]:
+                continue
+            if pieces and pieces[-1][1] == start:
+                pieces[-1][1] = end
+            else:
+                pieces.append([start, end])
+        clean_starts, original_starts, position = [], [], 0
+        for start, end in pieces:
+            clean_starts.append(position)
+            original_starts.append(start)
+            position += end - start
+        cleaned.append("".join(text[start:end] for start, end in pieces))
+        offset_maps.append((clean_starts, original_starts))
+    return cleaned, offset_maps, removed
+
+
+def original_offset(offset_map, offset):
+    """
+    Translate a character offset in a cleaned page back to the parsed page.
+    """
+    clean_starts, original_starts = offset_map
+    i = bisect.bisect_right(clean_starts, offset) - 1
+    if i < 0:
+        return offset
+    return original_starts[i] + offset - clean_starts[i]
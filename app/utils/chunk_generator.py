@@ -1,4 +1,6 @@
-import tiktoken
+from functools import lru_cache
+
+from app.utils import metrics
 
 def split_text_into_chunks(text, max_tokens, encoding):
     """
@@ -21,6 +23,35 @@ def split_text_into_chunks(text, max_tokens, encoding):
 
     return chunks
 
+@lru_cache(maxsize=None)
+def get_encoding(model_name="gpt-4o"):
+    """
+    Return the tiktoken encoding for a model, falling back to 'o200k_base'.
+    """
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        print(f"Model '{model_name}' not found. Using 'o200k_base' encoding.")
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(texts, model_name="gpt-4o"):
+    """
+    Count the tokens in a list of texts without chunking them.
+
+    Args:
+        texts (list): A list of text strings.
+        model_name (str): The model name to determine the encoding. Default is "gpt-4o".
+
+    Returns:
+        int: Total number of tokens.
+    """
+    encoding = get_encoding(model_name)
+    return sum(len(encoding.encode(text)) for text in texts)
+
+
 def generate_chunks(texts, max_tokens, model_name="gpt-4o"):
     """
     Splits an array of texts into chunks based on the max_tokens limit.
@@ -33,20 +64,44 @@ def generate_chunks(texts, max_tokens, model_name="gpt-4o"):
     Returns:
         list: A list of text chunks.
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model_name)
-    except KeyError:
-        print(f"Model '{model_name}' not found. Using 'o200k_base' encoding.")
-        encoding = tiktoken.get_encoding("o200k_base")
-
-    all_chunks = []
-    for text in texts:
-        if len(encoding.encode(text)) > max_tokens:
-            chunks = split_text_into_chunks(text, max_tokens, encoding)
-            all_chunks.extend(chunks)
-        else:
-            all_chunks.append(text)
-    return all_chunks
+    return [span["text"] for span in generate_chunk_spans(texts, max_tokens, model_name)]
+
+def generate_chunk_spans(texts, max_tokens, model_name="gpt-4o"):
+    """
+    Splits an array of texts into chunks like generate_chunks, recording where each chunk came from.
+
+    Args:
+        texts (list): A list of text strings to process, e.g. one per page.
+        max_tokens (int): The maximum number of tokens per chunk.
+        model_name (str): The model name to determine the encoding. Default is "gpt-4o".
+
+    Returns:
+        list: One dict per chunk with ``text``, ``page`` (index into
+        ``texts``), ``start`` and ``end`` character offsets within that text,
+        and ``token_count``.
+    """
+    encoding = get_encoding(model_name)
+
+    spans = []
+    for page, text in enumerate(texts):
+        tokens = encoding.encode(text)
+        metrics.count("tokens", len(tokens))
+        if len(tokens) <= max_tokens:
+            spans.append({"text": text, "page": page, "start": 0, "end": len(text), "token_count": len(tokens)})
+            continue
+        # Character offset of every token, so each chunk maps back to its span of the page.
+        _, offsets = encoding.decode_with_offsets(tokens)
+        for i in range(0, len(tokens), max_tokens):
+            chunk_tokens = tokens[i:i + max_tokens]
+            end = offsets[i + max_tokens] if i + max_tokens < len(tokens) else len(text)
+            spans.append({
+                "text": encoding.decode(chunk_tokens),
+                "page": page,
+                "start": offsets[i],
+                "end": end,
+                "token_count": len(chunk_tokens),
+            })
+    return spans
 
 if __name__ == '__main__':
     # Example usage:
@@ -0,0 +1,69 @@
+# app/utils/clients.py
+"""
+Process-wide API clients shared by every thread or greenlet of a worker.
+
+Building an OpenAI, LangChain or Weaviate client opens a connection pool
+(and for Weaviate a gRPC channel), so the query path reuses one per process
+instead of building them per call. These clients are thread-safe, which lets
+the queries worker run Celery's ``threads`` (or ``gevent``) pool with many
+concurrent queries in one process.
+
+Clients are keyed by the settings they were built from, so a changed
+OPENAI_BASE_URL (e.g. in benchmarks) gets a new client, and by process ID,
+so a forked child never uses its parent's connections.
+"""
+import os
+import threading
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def shared(key, factory):
+    """
+    Return the process's client for ``key``, building it with ``factory()`` the first time.
+    """
+    key = (os.getpid(), *key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+
+
+def openai_client():
+    """
+    The shared OpenAI client for the current OPENAI_BASE_URL and OPENAI_API_KEY.
+    """
+    from openai import OpenAI
+
+    return shared(
+        ("openai", os.getenv("OPENAI_BASE_URL"), os.getenv("OPENAI_API_KEY")),
+        OpenAI,
+    )
+
+
+def chat_model(model, temperature):
+    """
+    The shared LangChain chat model for ``model`` at ``temperature``.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return shared(
+        ("chat", model, temperature, os.getenv("OPENAI_BASE_URL"), os.getenv("OPENAI_API_KEY")),
+        lambda: ChatOpenAI(model=model, temperature=temperature),
+    )
+
+
+def close_all():
+    """
+    Close the clients of this process that hold connections, e.g. at worker shutdown.
+    """
+    with _lock:
+        pid = os.getpid()
+        for key in [key for key in _clients if key[0] == pid]:
+            close = getattr(_clients.pop(key), "close", None)
+            if close is not None:
+                close()
@@ -0,0 +1,127 @@
+# app/utils/context.py
+"""
+Query context built from the retrieved chunks and their neighbors.
+
+Chunks are cut at fixed token counts, so a hit often starts or ends
+mid-sentence and misses the lines around it that the answer needs. Each hit
+is therefore widened by up to QUERY_NEIGHBOR_CHUNKS chunks on either side,
+using the ``index`` property every chunk is stored with. All neighbors are
+fetched in one filtered query (see fetch_index_ranges).
+
+Chunks are then added to the context in order of importance until
+QUERY_CONTEXT_MAX_TOKENS is reached: the hits, best match first, then
+neighbors nearest to a hit first. A neighbor is only added next to a chunk
+already in the context, so every passage is contiguous text. Runs of
+adjacent chunks are merged into one passage, which also removes the
+duplicate text two overlapping expansions would bring in.
+"""
+from django.conf import settings
+
+from app.utils.chunk_generator import get_encoding
+from app.utils.embeddings import fetch_index_ranges
+
+
+def neighbor_ranges(indexes, neighbors):
+    """
+    Merge the ``neighbors``-wide windows around chunk indexes into disjoint inclusive ranges.
+
+    Args:
+        indexes (iterable[int]): Chunk indexes of the hits.
+        neighbors (int): Chunks to add on each side of a hit.
+
+    Returns:
+        list[tuple[int, int]]: Sorted (first, last) ranges; adjacent windows are joined.
+    """
+    ranges = []
+    for index in sorted(set(indexes)):
+        first, last = max(index - neighbors, 0), index + neighbors
+        if ranges and first <= ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], last))
+        else:
+            ranges.append((first, last))
+    return ranges
+
+
+def _select(rank, chunks, tokens, max_tokens):
+    """
+    Pick the chunk indexes to keep within ``max_tokens``: hits first, then the nearest neighbors.
+
+    Args:
+        rank (dict): Hit chunk index -> position in the results, best first.
+    """
+    hit_indexes = list(rank)
+
+    def priority(index):
+        # (distance to the nearest hit, that hit's rank)
+        return min((abs(index - hit), rank[hit]) for hit in hit_indexes)
+
+    selected, used = set(), 0
+    for index in [*hit_indexes, *sorted(set(chunks) - set(hit_indexes), key=priority)]:
+        is_hit = index in rank
+        if not is_hit and index - 1 not in selected and index + 1 not in selected:
+            continue
+        if used + tokens[index] > max_tokens and (selected or not is_hit):
+            continue
+        selected.add(index)
+        used += tokens[index]
+    return selected, used
+
+
+def build_context(collection_identifier, hits, neighbors=None, max_tokens=None):
+    """
+    Expand retrieved chunks with their neighbors and merge them into passages within a token budget.
+
+    Args:
+        collection_identifier (str): File.vector_key of the queried file.
+        hits (list): Objects returned by query_from_entries, best match first.
+        neighbors (int, optional): Chunks to add on each side of a hit.
+            Defaults to QUERY_NEIGHBOR_CHUNKS; 0 only trims the hits to the budget.
+        max_tokens (int, optional): Token budget of the whole context.
+            Defaults to QUERY_CONTEXT_MAX_TOKENS. The best hit is always kept.
+
+    Returns:
+        tuple: (passages, tokens). ``passages`` is a list of dicts, best
+        first, with ``text`` (the merged chunk texts) and ``objects`` (its
+        chunks in document order; neighbors have no distance); ``tokens``
+        is the size of the context.
+    """
+    if neighbors is None:
+        neighbors = settings.QUERY_NEIGHBOR_CHUNKS
+    if max_tokens is None:
+        max_tokens = settings.QUERY_CONTEXT_MAX_TOKENS
+    if not hits:
+        return [], 0
+
+    chunks = {}
+    if neighbors > 0:
+        ranges = neighbor_ranges([obj.properties["index"] for obj in hits], neighbors)
+        chunks.update((obj.properties["index"], obj) for obj in fetch_index_ranges(collection_identifier, ranges))
+    # Keep the hits' own objects, which carry their distance.
+    chunks.update((obj.properties["index"], obj) for obj in hits)
+
+    rank = {}
+    for position, obj in enumerate(hits):
+        rank.setdefault(obj.properties["index"], position)
+    encoding = get_encoding()
+    tokens = {index: len(encoding.encode(obj.properties["text"])) for index, obj in chunks.items()}
+    selected, used = _select(rank, chunks, tokens, max_tokens)
+
+    runs = []
+    for index in sorted(selected):
+        if runs and runs[-1][-1] == index - 1:
+            runs[-1].append(index)
+        else:
+            runs.append([index])
+    runs.sort(key=lambda run: min(rank.get(index, len(rank)) for index in run))
+
+    passages = []
+    for run in runs:
+        objects = [chunks[index] for index in run]
+        pieces = []
+        for previous, obj in zip([None, *objects], objects):
+            # Chunks of one page are consecutive slices of its text; pages are separate.
+            if previous is not None and previous.properties.get("page") != obj.properties.get("page"):
+                pieces.append(" ")
+            pieces.append(obj.properties["text"])
+        passages.append({"text": "".join(pieces), "objects": objects})
+    return passages, used
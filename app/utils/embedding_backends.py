@@ -0,0 +1,155 @@
+# app/utils/embedding_backends.py
+"""
+Embedding backends behind generate_embeddings.
+
+A model is named ``<backend>/<model>``, e.g. ``openai/text-embedding-3-small``
+or ``onnx/all-MiniLM-L6-v2``. That name is stored on every File as the model
+its vectors came from, so queries embed with the same model even after
+EMBEDDING_MODEL changes.
+
+The ``onnx`` backend runs a local model on the CPU with onnxruntime
+(``pip install onnxruntime tokenizers``). It reads
+``EMBEDDING_MODELS_DIR/<model>/tokenizer.json`` and EMBEDDING_ONNX_FILE,
+e.g. the quantized exports of sentence-transformers models. Texts are
+embedded in length-sorted batches of EMBEDDING_LOCAL_BATCH_SIZE using
+EMBEDDING_THREADS threads, then mean-pooled and L2-normalized.
+"""
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from app.utils.clients import openai_client, shared
+
+# Model of the vectors stored before Files recorded their embedding model.
+LEGACY_EMBEDDING_MODEL = "openai/text-embedding-3-small"
+
+class EmbeddingBackend:
+    """
+    Turns texts into vectors with one model.
+
+    Attributes:
+        model_id (str): ``<backend>/<model>`` name stored with the vectors.
+    """
+
+    def __init__(self, model_id):
+        self.model_id = model_id
+
+    def embed(self, texts):
+        """
+        Embed texts.
+
+        Args:
+            texts (list[str]): The input texts.
+
+        Returns:
+            list[list[float]]: One embedding per input text, in input order.
+        """
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """
+    OpenAI's embeddings endpoint; one request per call over the shared client.
+    """
+
+    def __init__(self, model_id, model):
+        super().__init__(model_id)
+        self.model = model
+
+    def embed(self, texts):
+        response = openai_client().embeddings.create(input=texts, model=self.model)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class OnnxEmbeddingBackend(EmbeddingBackend):
+    """
+    A local transformer encoder run with onnxruntime on the CPU.
+    """
+
+    def __init__(self, model_id, model_dir):
+        super().__init__(model_id)
+        # Optional, and only loaded by the processes that embed with a local model.
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError:
+            raise ImproperlyConfigured(f"{model_id} needs `pip install onnxruntime tokenizers`.")
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(settings.EMBEDDING_MAX_SEQ_LENGTH)
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = settings.EMBEDDING_THREADS
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, settings.EMBEDDING_ONNX_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _embed_batch(self, encodings):
+        import numpy as np
+
+        length = max(len(encoding.ids) for encoding in encodings)
+        input_ids = np.zeros((len(encodings), length), dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), length), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            input_ids[row, :len(encoding.ids)] = encoding.ids
+            attention_mask[row, :len(encoding.ids)] = 1
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, inputs)[0]
+        if hidden.ndim == 3:
+            # Mean over the real (unpadded) tokens.
+            mask = attention_mask[:, :, None].astype(hidden.dtype)
+            hidden = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1)
+        return hidden / np.maximum(np.linalg.norm(hidden, axis=1, keepdims=True), 1e-12)
+
+    def embed(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        # Batch texts of similar length together to keep padding small.
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+        vectors = [None] * len(texts)
+        batch_size = settings.EMBEDDING_LOCAL_BATCH_SIZE
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            for i, vector in zip(batch, self._embed_batch([encodings[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+
+def _create_backend(model_id):
+    backend, _, model = model_id.partition("/")
+    if backend == "openai" and model:
+        return OpenAIEmbeddingBackend(model_id, model)
+    if backend == "onnx" and model:
+        if settings.CHUNK_MAX_TOKENS > settings.EMBEDDING_MAX_SEQ_LENGTH:
+            # The tokenizer truncates, so only the start of each chunk would be embedded.
+            raise ImproperlyConfigured(
+                f"CHUNK_MAX_TOKENS ({settings.CHUNK_MAX_TOKENS}) is larger than EMBEDDING_MAX_SEQ_LENGTH "
+                f"({settings.EMBEDDING_MAX_SEQ_LENGTH}) of {model_id}; lower CHUNK_MAX_TOKENS."
+            )
+        return OnnxEmbeddingBackend(model_id, os.path.join(settings.EMBEDDING_MODELS_DIR, model))
+    raise ImproperlyConfigured(f"Unknown embedding model {model_id!r}; expected openai/<model> or onnx/<model>.")
+
+
+def get_backend(model_id=None):
+    """
+    Return the backend for a model, loading it once per process (see app.utils.clients).
+
+    Args:
+        model_id (str, optional): ``<backend>/<model>``. Defaults to
+            EMBEDDING_MODEL; an empty name (vectors stored before models were
+            recorded) means LEGACY_EMBEDDING_MODEL.
+
+    Raises:
+        ImproperlyConfigured: If the model name is invalid, its backend is not
+            installed, or its chunks would not fit in the model's input.
+    """
+    if model_id is None:
+        model_id = settings.EMBEDDING_MODEL
+    model_id = model_id or LEGACY_EMBEDDING_MODEL
+    return shared(("embedding_backend", model_id), lambda: _create_backend(model_id))
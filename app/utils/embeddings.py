@@ -1,31 +1,76 @@
 # app/utils.py
+import logging
 import os
 from typing import List
-import weaviate
-from openai import OpenAI
-import weaviate.classes as wvc
-from weaviate.classes.query import MetadataQuery
 
+from app.utils import clients
+from app.utils.embedding_backends import get_backend
+from app.utils.metrics import span
+
+logger = logging.getLogger(__name__)
 
-def generate_embeddings(text: str) -> List[float]:
-    """
-    Generate an embedding vector for the provided text using OpenAI's embedding API.
 
-    This function calls the OpenAI embeddings endpoint with the "text-embedding-3-small" model
-    and returns the embedding vector as a list of floats.
+def generate_embeddings(text: str, model: str = None) -> List[float]:
+    """
+    Generate an embedding vector for the provided text.
 
     Args:
         text (str): The input text to be embedded.
+        model (str, optional): ``<backend>/<model>`` (see
+            app.utils.embedding_backends). Defaults to EMBEDDING_MODEL.
 
     Returns:
         List[float]: A list of float values representing the text embedding.
     """
-    client = OpenAI()
-    response = client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
+    return get_backend(model).embed([text])[0]
+
+def generate_embeddings_batch(texts: List[str], model: str = None) -> List[List[float]]:
+    """
+    Generate embedding vectors for several texts in one backend call.
+
+    Args:
+        texts (List[str]): The input texts to be embedded.
+        model (str, optional): ``<backend>/<model>``. Defaults to EMBEDDING_MODEL.
+
+    Returns:
+        List[List[float]]: One embedding per input text, in input order.
+    """
+    return get_backend(model).embed(texts)
+
+def connect_vector_store():
+    """
+    Connect to the configured vector store.
+
+    Weaviate is used by default. Setting VECTOR_STORE=local swaps in the
+    in-process store from app.utils.local_vector_store, which needs no server.
+
+    Returns:
+        A Weaviate client, or a LocalVectorStoreClient exposing the same API.
+    """
+    # Imported here so that the web process, which only enqueues tasks, never loads Weaviate.
+    if os.getenv("VECTOR_STORE") == "local":
+        from app.utils.local_vector_store import LocalVectorStoreClient
+
+        return LocalVectorStoreClient()
+    import weaviate
+
+    return weaviate.connect_to_local(
+        host=os.getenv("WEAVIATE_HOST"),
+        port=8080,
+        grpc_port=50051,
+    )
+
+def shared_vector_store():
+    """
+    The process's shared vector store client, for the query path.
+
+    Unlike connect_vector_store, the client stays open and is used by every
+    thread or greenlet of the process; do not close it.
+    """
+    return clients.shared(
+        ("vector_store", os.getenv("VECTOR_STORE"), os.getenv("WEAVIATE_HOST")),
+        connect_vector_store,
     )
-    return response.data[0].embedding
 
 def uuid_to_weaviate_class(uuid_str: str) -> str:
     """
@@ -50,7 +95,38 @@ def uuid_to_weaviate_class(uuid_str: str) -> str:
         
     return name
 
-def store_embeddings(collection_name, texts, embeddings):
+def delete_collections(collection_identifiers):
+    """
+    Delete the collections of several documents over one connection.
+
+    Args:
+        collection_identifiers (list[str]): File.vector_key values.
+    """
+    wv_client = connect_vector_store()
+    try:
+        wv_client.collections.delete([uuid_to_weaviate_class(identifier) for identifier in collection_identifiers])
+    finally:
+        wv_client.close()
+
+
+def list_collections():
+    """
+    List the names of every per-document collection in the vector store.
+
+    Returns:
+        set[str]: Collection names created by store_embeddings.
+    """
+    wv_client = connect_vector_store()
+    try:
+        return {name for name in wv_client.collections.list_all(simple=True) if name.startswith("Cls_")}
+    finally:
+        wv_client.close()
+
+# Source location stored with every chunk, so retrieval can cite it.
+CITATION_PROPERTIES = ("page", "start_offset", "end_offset")
+
+
+def store_embeddings(collection_name, texts, embeddings, locations=None, uuids=None):
     """
     Store multiple texts and their corresponding embeddings in Weaviate.
 
@@ -58,6 +134,11 @@ def store_embeddings(collection_name, texts, embeddings):
         collection: A Weaviate collection object (e.g., obtained via client.collections.get("YourClassName"))
         texts (list[str]): A list of texts to store.
         embeddings (list[list[float]]): A list of embedding vectors corresponding to the texts.
+        locations (list[dict], optional): Per text, its ``page`` and the
+            ``start_offset``/``end_offset`` character span within that page.
+            Unknown values may be None and are left out.
+        uuids (list, optional): Object UUIDs to store the texts under, e.g.
+            when restoring a snapshot; new ones are generated by default.
 
     Returns:
         The result of the batch insert operation from Weaviate.
@@ -66,12 +147,10 @@ def store_embeddings(collection_name, texts, embeddings):
         Ensure that your collection's schema is configured with vectorizer set to "none" (or that the field is
         marked to skip vectorization) so that Weaviate uses your provided embeddings.
     """
+    import weaviate.classes as wvc
+
+    wv_client = connect_vector_store()
     try:
-        wv_client = weaviate.connect_to_local(
-            host=os.getenv("WEAVIATE_HOST"),
-            port=8080,
-            grpc_port=50051,
-        )
         collection_name = uuid_to_weaviate_class(collection_name)
         wv_client.collections.delete(collection_name)
         collection = wv_client.collections.create(
@@ -79,31 +158,40 @@ def store_embeddings(collection_name, texts, embeddings):
             vectorizer_config=wvc.config.Configure.Vectorizer.none(),
             properties=[
                 wvc.config.Property(name="text", data_type=wvc.config.DataType.TEXT),
-                wvc.config.Property(name="index", data_type=wvc.config.DataType.INT)
+                wvc.config.Property(name="index", data_type=wvc.config.DataType.INT),
+                *[
+                    wvc.config.Property(name=name, data_type=wvc.config.DataType.INT)
+                    for name in CITATION_PROPERTIES
+                ],
             ]
         )
 
         # Build the data objects.
         data_objects = list()
         for i, text, embedding in zip(range(len(texts)), texts, embeddings):
+            properties = {
+                "index": i,
+                "text": text
+            }
+            if locations is not None:
+                properties.update(
+                    (name, locations[i][name]) for name in CITATION_PROPERTIES if locations[i].get(name) is not None
+                )
             data_objects.append(
                 wvc.data.DataObject(
-                    properties={
-                        "index": i,
-                        "text": text
-                    },
-                    vector=embedding
+                    properties=properties,
+                    vector=embedding,
+                    uuid=uuids[i] if uuids is not None else None,
                 )
             )
-        response = collection.data.insert_many(data_objects)
-        wv_client.close()
-        return response
-    except Exception as e:
-        print(f"Error storing embeddings: {e}")
+        return collection.data.insert_many(data_objects)
+    except Exception:
+        logger.exception("Error storing embeddings in %s.", collection_name)
+        raise
+    finally:
         wv_client.close()
-        raise e
 
-def query_from_entries(query_text: str, collection_identifier: str, limit: int = 2) -> any:
+def query_from_entries(query_text: str, collection_identifier: str, limit: int = 2, embedding_model: str = None) -> any:
     """
     Query a Weaviate collection for entries similar to the given text.
 
@@ -112,35 +200,76 @@ def query_from_entries(query_text: str, collection_identifier: str, limit: int =
         collection_identifier (str): A string representing the collection name or a UUID.
             If this is a UUID string, it will be converted into a valid Weaviate class name.
         limit (int, optional): The maximum number of results to return. Defaults to 2.
+        embedding_model (str, optional): Model the collection's vectors came
+            from (File.embedding_model); the query is embedded with it.
 
     Returns:
         Any: The response from Weaviate containing matching objects and additional metadata.
     """
-    # Connect to the local Weaviate instance.
-    wv_client = weaviate.connect_to_local(
-        host=os.getenv("WEAVIATE_HOST"),
-        port=8080,
-        grpc_port=50051,
-    )
+    from weaviate.classes.query import MetadataQuery
+
+    # Reuse the process's connection; queries run concurrently on it.
+    wv_client = shared_vector_store()
 
     # Convert collection_identifier to a valid collection name if necessary.
     # If your collection name is already a valid string (e.g., "Files"), you may omit this conversion.
     valid_collection_name = uuid_to_weaviate_class(collection_identifier)
 
     # Generate the embedding for the query text.
-    query_vector = generate_embeddings(query_text)
+    with span("embed_query"):
+        query_vector = generate_embeddings(query_text, embedding_model)
 
     # Retrieve the collection.
     collection = wv_client.collections.get(valid_collection_name)
 
     # Execute the near-vector query.
-    response = collection.query.near_vector(
-        near_vector=query_vector,
-        limit=limit,
-        return_metadata=MetadataQuery(distance=True)
-    )
+    with span("retrieve") as stage:
+        response = collection.query.near_vector(
+            near_vector=query_vector,
+            limit=limit,
+            return_metadata=MetadataQuery(distance=True)
+        )
+        stage.count("results", len(response.objects))
+
+    return response
+def iter_collection(collection_identifier: str):
+    """
+    Iterate over every object of a collection, with its vector, over one connection.
+
+    Args:
+        collection_identifier (str): The collection name or File.vector_key.
+
+    Yields:
+        Objects with ``uuid``, ``properties`` and ``vector``, in no particular order.
+    """
+    wv_client = connect_vector_store()
+    try:
+        collection = wv_client.collections.get(uuid_to_weaviate_class(collection_identifier))
+        yield from collection.iterator(include_vector=True)
+    finally:
+        wv_client.close()
 
-    # Close the connection.
-    wv_client.close()
 
-    return response
\ No newline at end of file
+def fetch_index_ranges(collection_identifier: str, ranges) -> list:
+    """
+    Fetch the chunks of a collection whose ``index`` falls in any of the given ranges, in one query.
+
+    Args:
+        collection_identifier (str): The collection name or File.vector_key.
+        ranges (list[tuple[int, int]]): Inclusive (first, last) chunk index ranges.
+
+    Returns:
+        list: The matching objects, ordered by ``index``.
+    """
+    from weaviate.classes.query import Filter
+
+    if not ranges:
+        return []
+    index = Filter.by_property("index")
+    filters = Filter.any_of([index.greater_or_equal(first) & index.less_or_equal(last) for first, last in ranges])
+    collection = shared_vector_store().collections.get(uuid_to_weaviate_class(collection_identifier))
+    response = collection.query.fetch_objects(
+        filters=filters,
+        limit=sum(last - first + 1 for first, last in ranges),
+    )
+    return sorted(response.objects, key=lambda obj: obj.properties["index"])
@@ -0,0 +1,257 @@
+# app/utils/json_records.py
+"""
+Incremental JSON parsing into size-bounded records.
+
+The file is read in blocks. A container that fits in the size limit is
+decoded in one go by the json module's C decoder; larger ones are
+tokenized and rebuilt bottom-up. A container whose size stays under the
+limit is emitted as one record. A larger container is
+split: its children are emitted in document order, with consecutive small
+siblings grouped up to the limit. Memory is bounded by the limit for each
+level of nesting, not by the file size.
+
+Each record is a ``(path, value)`` pair. ``path`` is a JSON path such as
+``$.orders[12]``, ``$.orders[12:40]`` for a group of array elements, or the
+object's own path for a group of its keys.
+"""
+import json
+import re
+from json.decoder import scanstring
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_LITERAL = re.compile(r"(-?(?:0|[1-9]\d*))(\.\d+)?([eE][-+]?\d+)?|true|false|null")
+_CONSTANTS = {"true": True, "false": False, "null": None}
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+_DECODER = json.JSONDecoder()
+
+
+def _tokens(f, block_chars, container_chars):
+    """
+    Yield ``(kind, value, size)`` tokens from a text file: punctuation as its
+    own kind, ``"string"`` and ``"value"``. A container of at most
+    ``container_chars`` characters is decoded whole and yielded as a value.
+    """
+    buf, pos, eof = "", 0, False
+
+    def fill(at_least):
+        nonlocal buf, pos, eof
+        block = f.read(max(block_chars, at_least))
+        if not block:
+            eof = True
+        buf, pos = buf[pos:] + block, 0
+
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                return
+            fill(0)
+            continue
+        char = buf[pos]
+        if char in "{[":
+            if len(buf) - pos < container_chars and not eof:
+                fill(container_chars)
+                continue
+            try:
+                value, end = _DECODER.raw_decode(buf[pos:pos + container_chars])
+            except json.JSONDecodeError:
+                # Too large (or invalid): tokenize it instead.
+                pos += 1
+                yield char, None, 0
+                continue
+            pos += end
+            yield "value", value, end
+        elif char in "}]:,":
+            pos += 1
+            yield char, None, 0
+        elif char == '"':
+            try:
+                value, end = scanstring(buf, pos + 1)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The string runs past the buffer; read at least as much again.
+                fill(len(buf) - pos)
+                continue
+            yield "string", value, end - pos
+            pos = end
+        else:
+            match = _LITERAL.match(buf, pos)
+            # A literal near the end of the buffer may continue in the next block.
+            if not eof and len(buf) - (match.end() if match else pos) < 32:
+                fill(0)
+                continue
+            if match is None:
+                raise ValueError(f"Invalid JSON near {buf[pos:pos + 20]!r}.")
+            size = match.end() - pos
+            pos = match.end()
+            integer, fraction, exponent = match.groups()
+            if integer is None:
+                value = _CONSTANTS[match.group()]
+            elif fraction or exponent:
+                value = float(match.group())
+            else:
+                value = int(integer)
+            yield "value", value, size
+
+
+def _child_path(path, key):
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    if _IDENTIFIER.match(key):
+        return f"{path}.{key}"
+    return f"{path}[{json.dumps(key, ensure_ascii=False)}]"
+
+
+class _Frame:
+    __slots__ = ("path", "name", "is_list", "items", "size", "split", "key", "count")
+
+    def __init__(self, path, name, is_list):
+        self.path = path
+        self.name = name  # Key or index within the parent
+        self.is_list = is_list
+        self.items = []  # (key, value, size) not emitted yet
+        self.size = 2
+        self.split = False
+        self.key = None  # Pending object key
+        self.count = 0  # Array elements seen
+
+
+class _RecordBuilder:
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.stack = []
+        self.records = []
+
+    def _next_name(self):
+        parent = self.stack[-1]
+        if parent.is_list:
+            parent.count += 1
+            return parent.count - 1
+        name, parent.key = parent.key, None
+        return name
+
+    def expects_key(self):
+        return bool(self.stack) and not self.stack[-1].is_list and self.stack[-1].key is None
+
+    def key(self, name):
+        self.stack[-1].key = name
+
+    def open(self, is_list):
+        if not self.stack:
+            self.stack.append(_Frame("$", None, is_list))
+            return
+        name = self._next_name()
+        self.stack.append(_Frame(_child_path(self.stack[-1].path, name), name, is_list))
+
+    def close(self, is_list):
+        if not self.stack or self.stack[-1].is_list != is_list:
+            raise ValueError("Invalid JSON: mismatched brackets.")
+        frame = self.stack.pop()
+        if frame.split:
+            self._flush(frame)
+            return
+        value = self._value(frame, frame.items)
+        if not self.stack:
+            self.records.append(("$", value))
+        else:
+            self._add(frame.name, value, frame.size)
+
+    def value(self, value, size):
+        if not self.stack:
+            self.records.append(("$", value))
+            return
+        self._add(self._next_name(), value, size)
+
+    def _add(self, name, value, size):
+        parent = self.stack[-1]
+        size += 1 if parent.is_list else len(str(name)) + 4
+        if parent.split and parent.items and parent.size + size > self.max_chars:
+            self._flush(parent)
+        parent.items.append((name, value, size))
+        parent.size += size
+        if not parent.split and parent.size > self.max_chars:
+            # Every enclosing container is now too large as well; emit what
+            # they hold so far, outermost first to keep document order.
+            for frame in self.stack:
+                if not frame.split:
+                    frame.split = True
+                    self._flush(frame)
+
+    def _flush(self, frame):
+        group, size = [], 0
+        for item in frame.items:
+            if group and size + item[2] > self.max_chars:
+                self._emit(frame, group)
+                group, size = [], 0
+            group.append(item)
+            size += item[2]
+        if group:
+            self._emit(frame, group)
+        frame.items, frame.size = [], 2
+
+    def _emit(self, frame, group):
+        if len(group) == 1:
+            name, value, _ = group[0]
+            self.records.append((_child_path(frame.path, name), value))
+        elif frame.is_list:
+            self.records.append((f"{frame.path}[{group[0][0]}:{group[-1][0] + 1}]", self._value(frame, group)))
+        else:
+            self.records.append((frame.path, self._value(frame, group)))
+
+    @staticmethod
+    def _value(frame, items):
+        if frame.is_list:
+            return [value for _, value, _ in items]
+        return {name: value for name, value, _ in items}
+
+
+def iter_json_records(file_path, max_chars, block_chars=1024 * 1024):
+    """
+    Stream a JSON file as size-bounded records.
+
+    Args:
+        file_path (str): The JSON file.
+        max_chars (int): Target serialized size of a record. Only a single
+            scalar larger than this (e.g. a huge string) exceeds it.
+        block_chars (int): Characters read from the file at a time.
+
+    Yields:
+        tuple: (JSON path, value) in document order.
+
+    Raises:
+        ValueError: If the file is not valid JSON.
+    """
+    builder = _RecordBuilder(max_chars)
+    expect_value = True  # False right after a value, until "," or a close
+    with open(file_path, "r", encoding="utf-8") as f:
+        for kind, value, size in _tokens(f, block_chars, max_chars):
+            if kind in "]}":
+                builder.close(kind == "]")
+                expect_value = False
+            elif kind == ",":
+                if expect_value:
+                    raise ValueError("Invalid JSON: unexpected ','.")
+                expect_value = True
+            elif kind == ":":
+                continue
+            elif not expect_value:
+                raise ValueError("Invalid JSON: missing ','.")
+            elif kind in "[{":
+                builder.open(kind == "[")
+            elif kind == "string" and builder.expects_key():
+                builder.key(value)
+            else:
+                builder.value(value, size)
+                expect_value = False
+            yield from builder.records
+            builder.records.clear()
+    if builder.stack:
+        raise ValueError("Invalid JSON: unexpected end of file.")
+
+
+def format_record(path, value):
+    """
+    Render a record as chunk text, prefixed with its JSON path.
+    """
+    return f"{path}: {json.dumps(value, ensure_ascii=False)}"
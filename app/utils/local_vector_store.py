@@ -0,0 +1,184 @@
+# app/utils/local_vector_store.py
+import threading
+import uuid
+
+import numpy as np
+from weaviate.collections.classes.batch import BatchObjectReturn
+from weaviate.collections.classes.filters import _FilterAnd, _FilterOr, _Operator
+from weaviate.collections.classes.internal import MetadataReturn, Object, QueryReturn
+
+_COMPARISONS = {
+    _Operator.EQUAL: lambda a, b: a == b,
+    _Operator.NOT_EQUAL: lambda a, b: a != b,
+    _Operator.LESS_THAN: lambda a, b: a < b,
+    _Operator.LESS_THAN_EQUAL: lambda a, b: a <= b,
+    _Operator.GREATER_THAN: lambda a, b: a > b,
+    _Operator.GREATER_THAN_EQUAL: lambda a, b: a >= b,
+    _Operator.CONTAINS_ANY: lambda a, b: a in b,
+}
+
+# Collections are shared by every client in the process, like a real server.
+_COLLECTIONS = {}
+_LOCK = threading.Lock()
+
+
+class LocalCollection:
+    """
+    In-memory stand-in for a Weaviate collection.
+
+    Only the parts of the Weaviate v4 collection API used by the app are
+    implemented, and the return types are Weaviate's own, so callers cannot
+    tell the difference.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.uuids = []
+        self.properties = []
+        self.vectors = []
+        self.data = _LocalData(self)
+        self.query = _LocalQuery(self)
+
+    def _matrix(self):
+        if not self.vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self.vectors, dtype=np.float32)
+
+    def iterator(self, include_vector=False, **kwargs):
+        """
+        Every object of the collection, like Weaviate's cursor-based iterator.
+        """
+        with _LOCK:
+            return iter([self._object(i, include_vector=include_vector) for i in range(len(self.uuids))])
+
+    def _object(self, i, distance=None, include_vector=False):
+        return Object(
+            uuid=self.uuids[i],
+            metadata=MetadataReturn(distance=distance),
+            properties=dict(self.properties[i]),
+            references=None,
+            vector={"default": list(self.vectors[i])} if include_vector else {},
+            collection=self.name,
+        )
+
+
+class _LocalData:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def insert_many(self, objects):
+        """
+        Insert data objects and return their UUIDs keyed by input position.
+        """
+        uuids = {}
+        with _LOCK:
+            for i, obj in enumerate(objects):
+                obj_uuid = uuid.UUID(str(obj.uuid)) if obj.uuid else uuid.uuid4()
+                vector = obj.vector["default"] if isinstance(obj.vector, dict) else obj.vector
+                self._collection.uuids.append(obj_uuid)
+                self._collection.properties.append(dict(obj.properties or {}))
+                self._collection.vectors.append([float(v) for v in vector])
+                uuids[i] = obj_uuid
+        return BatchObjectReturn(
+            _all_responses=list(uuids.values()),
+            uuids=uuids,
+            errors={},
+            has_errors=False,
+        )
+
+
+class _LocalQuery:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def near_vector(self, near_vector, limit=None, return_metadata=None, include_vector=False, **kwargs):
+        """
+        Brute-force cosine-distance search, matching Weaviate's default metric.
+        """
+        collection = self._collection
+        matrix = collection._matrix()
+        if not len(matrix):
+            return QueryReturn(objects=[])
+
+        query = np.asarray(near_vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        norms[norms == 0] = 1.0
+        distances = 1.0 - (matrix @ query) / norms
+
+        order = np.argsort(distances, kind="stable")[: limit or len(distances)]
+        return QueryReturn(
+            objects=[
+                collection._object(int(i), float(distances[i]), include_vector)
+                for i in order
+            ]
+        )
+
+
+    def fetch_objects(self, filters=None, limit=None, include_vector=False, **kwargs):
+        """
+        Objects matching a property filter (and/or of comparisons), in insertion order.
+        """
+        collection = self._collection
+        matches = [
+            i for i, properties in enumerate(collection.properties)
+            if filters is None or _matches(filters, properties)
+        ]
+        return QueryReturn(
+            objects=[collection._object(i, include_vector=include_vector) for i in matches[:limit]]
+        )
+
+
+def _matches(filters, properties):
+    if isinstance(filters, _FilterAnd):
+        return all(_matches(f, properties) for f in filters.filters)
+    if isinstance(filters, _FilterOr):
+        return any(_matches(f, properties) for f in filters.filters)
+    value = properties.get(filters.target)
+    return value is not None and _COMPARISONS[filters.operator](value, filters.value)
+
+
+class _LocalCollections:
+    def create(self, name, **kwargs):
+        with _LOCK:
+            _COLLECTIONS[name] = LocalCollection(name)
+            return _COLLECTIONS[name]
+
+    def get(self, name):
+        with _LOCK:
+            return _COLLECTIONS.setdefault(name, LocalCollection(name))
+
+    def exists(self, name):
+        return name in _COLLECTIONS
+
+    def list_all(self, simple=True):
+        with _LOCK:
+            return {name: None for name in _COLLECTIONS}
+
+    def delete(self, name):
+        with _LOCK:
+            names = name if isinstance(name, list) else [name]
+            for collection_name in names:
+                _COLLECTIONS.pop(collection_name, None)
+
+
+class LocalVectorStoreClient:
+    """
+    Drop-in replacement for the client returned by ``weaviate.connect_to_local``.
+
+    Used by the benchmark suite and local development (``VECTOR_STORE=local``)
+    so the ingest and query paths can run without a Weaviate server.
+    """
+
+    def __init__(self):
+        self.collections = _LocalCollections()
+
+    def close(self):
+        pass
+
+
+def reset_local_vector_store():
+    """
+    Drop every collection held by the in-process store.
+    """
+    with _LOCK:
+        _COLLECTIONS.clear()
@@ -0,0 +1,466 @@
+# app/utils/metrics.py
+"""
+Timing spans and Prometheus metrics for the ingest and query pipelines.
+
+Every stage of a task runs inside ``span(stage)``. When a span ends its
+duration is observed into a histogram labelled by task, stage and file type,
+any counts attached to it (pages, chunks, tokens, vectors) are added to
+counters, and one logfmt line is logged.
+
+Celery prefork children and gunicorn workers are separate processes, so each
+process writes its totals to ``METRICS_DIR/<host>-<pid>-<nonce>.json`` every
+METRICS_FLUSH_INTERVAL seconds (from a background thread, not on every span)
+and ``render_prometheus`` merges every file in the directory. When a process
+shuts down (``shutdown``), or a scrape finds the file of a dead process on
+this host, its totals are folded into ``merged.json`` and its file is
+removed, so counters never go backwards and the directory does not grow with
+every recycled worker. METRICS_DIR is per container: a scrape only sees the
+processes of its own container, so Prometheus must scrape the web app and
+every Celery worker (see devops/prometheus). Per-stage
+percentiles come from the histogram buckets, e.g.
+``histogram_quantile(0.95, sum by (le, stage, file_type) (rate(ragmatic_stage_duration_seconds_bucket[5m])))``.
+
+This module must not import Django so it can be used from any process.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "ragmatic-metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+MERGED_NAME = "merged.json"
+_HOST = socket.gethostname()
+
+STAGE_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0,
+)
+LABEL_NAMES = ("task", "stage", "file_type")
+
+# name: (help text, label names). All histograms share STAGE_BUCKETS.
+HISTOGRAMS = {
+    "ragmatic_stage_duration_seconds": ("Duration of ingest and query pipeline stages.", LABEL_NAMES),
+    "ragmatic_queue_wait_seconds": ("Time tasks waited in the broker before a worker started them.", ("queue", "task_class")),
+}
+COUNTERS = {
+    "ragmatic_stage_items_total": ("Items (pages, chunks, tokens, vectors) handled per stage.", LABEL_NAMES + ("item",)),
+    "ragmatic_stage_errors_total": ("Pipeline stages that raised.", LABEL_NAMES),
+}
+
+_labels = ContextVar("metric_labels", default={})
+_current_span = ContextVar("current_span", default=None)
+_listeners = []
+_collectors = []
+_forward = None
+
+
+class _Registry:
+    """
+    Per-process histogram and counter state, persisted for cross-process scraping.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.path = os.path.join(METRICS_DIR, f"{_HOST}-{self.pid}-{uuid.uuid4().hex[:8]}.json")
+        self.histograms = {}
+        self.counters = {}
+        self.dirty = False
+        self.closed = False
+        self.flusher = None
+
+    def record(self, histograms=(), counters=()):
+        """
+        Observe ``(name, label_values, value)`` histogram samples and counter increments.
+        """
+        with self.lock:
+            # A forked child inherits the parent's totals; start from zero.
+            if os.getpid() != self.pid:
+                self._reset()
+            for name, label_values, value in histograms:
+                histogram = self.histograms.setdefault(
+                    json.dumps([name] + label_values),
+                    {"buckets": [0] * len(STAGE_BUCKETS), "sum": 0.0, "count": 0},
+                )
+                for i, bound in enumerate(STAGE_BUCKETS):
+                    if value <= bound:
+                        histogram["buckets"][i] += 1
+                histogram["sum"] += value
+                histogram["count"] += 1
+            for name, label_values, value in counters:
+                key = json.dumps([name] + label_values)
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.dirty = True
+            if self.flusher is None:
+                # Threads do not survive a fork, so each process starts its own.
+                self.flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+                self.flusher.start()
+
+    def _flush_loop(self):
+        pid = self.pid
+        while not self.closed and pid == os.getpid():
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        """
+        Write this process's totals to its snapshot file if they changed.
+        """
+        with self.lock:
+            if os.getpid() != self.pid or self.closed or not self.dirty:
+                return
+            self.dirty = False
+            try:
+                _write_snapshot(self.path, {"histograms": self.histograms, "counters": self.counters})
+            except OSError:
+                logger.exception("Could not persist metrics to %s", METRICS_DIR)
+
+    def close(self):
+        """
+        Fold this process's totals into the merged snapshot and remove its file.
+        """
+        with self.lock:
+            if os.getpid() != self.pid or self.closed:
+                return
+            self.closed = True
+            if not (self.histograms or self.counters):
+                return
+            try:
+                with _directory_lock():
+                    _fold(self.path, {"histograms": self.histograms, "counters": self.counters})
+            except OSError:
+                logger.exception("Could not persist metrics to %s", METRICS_DIR)
+
+
+_registry = _Registry()
+atexit.register(lambda: _registry.close())
+
+
+def flush():
+    """
+    Write this process's metrics now instead of at the next flush interval.
+    """
+    _registry.flush()
+
+
+def shutdown():
+    """
+    Fold this process's metrics into the merged snapshot; call when the process exits.
+    """
+    _registry.close()
+
+
+class Span:
+    """
+    A running stage. Use ``count`` to attach item counts to it.
+    """
+
+    def __init__(self, stage, labels):
+        self.stage = stage
+        self.labels = labels
+        self.counts = {}
+        self.duration = None
+
+    def count(self, item, value=1):
+        self.counts[item] = self.counts.get(item, 0) + value
+
+
+@contextmanager
+def metric_labels(**labels):
+    """
+    Attach labels (e.g. task="ingest", file_type="pdf") to every span opened inside the block.
+    """
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Time a pipeline stage and record it on exit, including when it raises.
+    """
+    current = Span(stage, {**_labels.get(), **labels})
+    token = _current_span.set(current)
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        if _forward is not None:
+            _forward(stage, current.duration, current.counts, status)
+        else:
+            _record_span(current, status)
+
+
+def _record_span(current, status):
+    label_values = [current.labels.get("task") or "", current.stage, current.labels.get("file_type") or ""]
+    counters = [
+        ("ragmatic_stage_items_total", label_values + [item], value)
+        for item, value in current.counts.items()
+    ]
+    if status != "ok":
+        counters.append(("ragmatic_stage_errors_total", label_values, 1))
+    _registry.record([("ragmatic_stage_duration_seconds", label_values, current.duration)], counters)
+    fields = " ".join(f"{key}={value}" for key, value in {**current.labels, **current.counts}.items())
+    logger.info("span stage=%s duration=%.3f status=%s %s", current.stage, current.duration, status, fields)
+    for listener in list(_listeners):
+        listener(current)
+
+
+def forward_spans(callback):
+    """
+    Hand every finished span to ``callback(stage, duration, counts, status)``
+    instead of recording it, e.g. to send it from a helper process to the
+    process that owns the metrics.
+    """
+    global _forward
+    _forward = callback
+
+
+def record_span(stage, duration, counts=None, status="ok"):
+    """
+    Record a span that ran elsewhere (see forward_spans) under the current labels.
+    """
+    current = Span(stage, _labels.get())
+    current.duration = duration
+    current.counts = dict(counts or {})
+    _record_span(current, status)
+
+
+def count(item, value=1):
+    """
+    Add to a count on the innermost running span. Does nothing outside a span.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.count(item, value)
+
+
+def observe(name, value, **labels):
+    """
+    Observe a value into one of the HISTOGRAMS outside of a span.
+    """
+    label_names = HISTOGRAMS[name][1]
+    _registry.record([(name, [str(labels.get(label, "")) for label in label_names], value)])
+
+
+def register_collector(collector):
+    """
+    Register ``collector()``, called at scrape time and yielding
+    ``(name, help text, labels dict, value)`` gauge samples.
+    """
+    _collectors.append(collector)
+
+
+def add_span_listener(listener):
+    """
+    Call ``listener(span)`` in-process whenever a span ends (used by the benchmark).
+    """
+    _listeners.append(listener)
+
+
+def remove_span_listener(listener):
+    _listeners.remove(listener)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _write_snapshot(path, snapshot):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(snapshots):
+    """
+    Sum snapshots into one ``{"histograms", "counters"}`` dict.
+    """
+    histograms, counters = {}, {}
+    for snapshot in snapshots:
+        for key, histogram in snapshot["histograms"].items():
+            merged = histograms.setdefault(key, {"buckets": [0] * len(STAGE_BUCKETS), "sum": 0.0, "count": 0})
+            merged["buckets"] = [a + b for a, b in zip(merged["buckets"], histogram["buckets"])]
+            merged["sum"] += histogram["sum"]
+            merged["count"] += histogram["count"]
+        for key, value in snapshot["counters"].items():
+            counters[key] = counters.get(key, 0) + value
+    return {"histograms": histograms, "counters": counters}
+
+
+@contextmanager
+def _directory_lock():
+    """
+    Serialize updates of merged.json between processes.
+    """
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with open(os.path.join(METRICS_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _fold(path, snapshot):
+    """
+    Add a process's snapshot to merged.json and remove its file. Hold _directory_lock.
+    """
+    merged_path = os.path.join(METRICS_DIR, MERGED_NAME)
+    merged = _read_snapshot(merged_path) or {"histograms": {}, "counters": {}}
+    _write_snapshot(merged_path, _merge([merged, snapshot]))
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _is_dead(name):
+    """
+    True for the snapshot file of a process of this host that no longer runs.
+    """
+    parts = name[:-len(".json")].rsplit("-", 2)
+    if len(parts) != 3 or parts[0] != _HOST or not parts[1].isdigit():
+        return False
+    try:
+        os.kill(int(parts[1]), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def _load_snapshots():
+    """
+    Read every snapshot in METRICS_DIR, first folding those of dead processes into merged.json.
+    """
+    if not os.path.isdir(METRICS_DIR):
+        return []
+    snapshots = []
+    with _directory_lock():
+        for name in os.listdir(METRICS_DIR):
+            if not name.endswith(".json") or name == MERGED_NAME:
+                continue
+            path = os.path.join(METRICS_DIR, name)
+            snapshot = _read_snapshot(path)
+            if snapshot is None:
+                continue
+            if _is_dead(name):
+                _fold(path, snapshot)
+            else:
+                snapshots.append(snapshot)
+        merged = _read_snapshot(os.path.join(METRICS_DIR, MERGED_NAME))
+    if merged is not None:
+        snapshots.append(merged)
+    return snapshots
+
+
+def render_prometheus():
+    """
+    Render the merged metrics of every process in the Prometheus text format.
+
+    Returns:
+        str: The exposition text.
+    """
+    _registry.flush()
+    merged = _merge(_load_snapshots())
+    histograms, counters = merged["histograms"], merged["counters"]
+
+    lines = []
+    for name, (help_text, label_names) in HISTOGRAMS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for key in sorted(histograms):
+            values = json.loads(key)
+            if values[0] != name:
+                continue
+            labels = _format_labels(label_names, values[1:])
+            histogram = histograms[key]
+            for bound, value in zip(STAGE_BUCKETS, histogram["buckets"]):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+
+    for name, (help_text, label_names) in COUNTERS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key in sorted(counters):
+            values = json.loads(key)
+            if values[0] == name:
+                lines.append(f"{name}{{{_format_labels(label_names, values[1:])}}} {counters[key]}")
+
+    gauges = {}
+    for collector in _collectors:
+        try:
+            for name, help_text, labels, value in collector():
+                gauges.setdefault(name, (help_text, []))[1].append((labels, value))
+        except Exception:
+            logger.exception("Metrics collector %r failed.", collector)
+    for name, (help_text, samples) in gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{{{_format_labels(labels.keys(), labels.values())}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port):
+    """
+    Serve ``render_prometheus`` on ``http://0.0.0.0:<port>/metrics`` from a daemon thread.
+
+    Used by Celery workers, which have no Django HTTP server of their own.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,232 @@
+# app/utils/ocr.py
+"""
+OCR engine for scanned PDF pages.
+
+Pages are rasterized one at a time, straight into memory (pdftoppm output is
+read from its stdout, never a temp file), at a DPI chosen per page, then
+converted to grayscale and binarized before recognition.
+
+With tesserocr installed (it needs the libtesseract and leptonica headers
+to build), each thread keeps one Tesseract API handle for the life of the
+process and is fed PIL images directly; the parse supervisor runs OCR in a
+long-lived child so the handle outlives a document. Without it, pytesseract
+runs the tesseract binary for every page.
+"""
+import logging
+import math
+import threading
+
+import numpy as np
+import pytesseract
+from django.conf import settings
+from pdf2image import convert_from_path
+from PIL import Image, ImageOps
+from PyPDF2 import PdfReader
+
+from app.utils import metrics
+from app.utils.metrics import span
+
+try:
+    import tesserocr
+except ImportError:  # Optional; fall back to the tesseract binary.
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# Tesseract API handles are not thread-safe, so each thread gets its own.
+_local = threading.local()
+
+
+def engine_name():
+    """
+    Return "tesserocr" when the in-process API is available, else "pytesseract".
+    """
+    return "tesserocr" if tesserocr is not None else "pytesseract"
+
+
+def _tesseract_api():
+    api = getattr(_local, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang=settings.OCR_LANGUAGE, psm=tesserocr.PSM.AUTO)
+        _local.api = api
+    return api
+
+
+def recognize(image):
+    """
+    Run Tesseract on a PIL image and return the recognized text.
+    """
+    if tesserocr is not None:
+        api = _tesseract_api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+    return pytesseract.image_to_string(image, lang=settings.OCR_LANGUAGE)
+
+
+def otsu_threshold(pixels):
+    """
+    Gray level that best separates ink from paper (Otsu's method).
+
+    Args:
+        pixels (numpy.ndarray): 8-bit grayscale pixels.
+
+    Returns:
+        int: Pixels above the threshold are background.
+    """
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight_dark = np.cumsum(histogram)
+    weight_light = weight_dark[-1] - weight_dark
+    sum_dark = np.cumsum(histogram * levels)
+    mean_dark = sum_dark / np.maximum(weight_dark, 1)
+    mean_light = (sum_dark[-1] - sum_dark) / np.maximum(weight_light, 1)
+    between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(between))
+
+
+def preprocess(image):
+    """
+    Convert a page image to autocontrasted grayscale and, if OCR_BINARIZE is
+    set, to black and white with an Otsu threshold.
+    """
+    gray = ImageOps.autocontrast(image.convert("L"))
+    if not settings.OCR_BINARIZE:
+        return gray
+    pixels = np.asarray(gray)
+    binary = np.where(pixels > otsu_threshold(pixels), 255, 0).astype(np.uint8)
+    return Image.fromarray(binary, mode="L")
+
+
+def text_line_height(image):
+    """
+    Estimate the height of a text line in pixels from the row ink profile.
+
+    Args:
+        image (PIL.Image.Image): A grayscale page image.
+
+    Returns:
+        float | None: Median height of the runs of rows containing ink, 0.0
+        when it cannot be measured (e.g. a photo), or None for a blank page.
+    """
+    pixels = np.asarray(image.convert("L"))
+    ink = pixels < otsu_threshold(pixels)
+    if not ink.any():
+        return None
+    if ink.mean() > 0.5:
+        return 0.0
+    rows = ink.mean(axis=1) > 0.002
+    # Lengths of consecutive inked rows: one run per line of text.
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.astype(np.int8), [0]))))
+    runs = edges[1::2] - edges[::2]
+    return float(np.median(runs))
+
+
+def choose_dpi(line_height_inches, page_size_inches):
+    """
+    Pick a rasterization DPI for one page.
+
+    Small text gets more pixels so its lines are about OCR_TARGET_LINE_PX
+    high, which Tesseract reads best. Large text gets fewer, which saves
+    time. The result is clamped to [OCR_MIN_DPI, OCR_MAX_DPI] and capped so
+    the page stays under OCR_MAX_PIXELS.
+
+    Args:
+        line_height_inches (float | None): Measured text line height; None uses OCR_DEFAULT_DPI.
+        page_size_inches (tuple): (width, height) of the page.
+
+    Returns:
+        int: DPI to rasterize at.
+    """
+    if line_height_inches:
+        dpi = settings.OCR_TARGET_LINE_PX / line_height_inches
+    else:
+        dpi = settings.OCR_DEFAULT_DPI
+    dpi = min(max(dpi, settings.OCR_MIN_DPI), settings.OCR_MAX_DPI)
+    width, height = page_size_inches
+    if width and height:
+        dpi = min(dpi, math.sqrt(settings.OCR_MAX_PIXELS / (width * height)))
+    return int(dpi)
+
+
+def page_sizes(file_path):
+    """
+    Return (width, height) in inches of every page, from the PDF page tree.
+    """
+    sizes = []
+    for page in PdfReader(file_path).pages:
+        box = page.mediabox
+        width, height = float(box.width) / 72, float(box.height) / 72
+        if page.get("/Rotate", 0) % 180:
+            width, height = height, width
+        sizes.append((width, height))
+    return sizes
+
+
+def rasterize(file_path, page_number, dpi):
+    """
+    Render one one-based page to an in-memory grayscale PIL image.
+    """
+    return convert_from_path(
+        file_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=True
+    )[0]
+
+
+def ocr_page(file_path, page_number, page_size):
+    """
+    OCR one page: probe its text size at low resolution, rasterize it at the
+    chosen DPI, preprocess and recognize it.
+
+    Returns:
+        tuple: (text, DPI used, or None for a page skipped as blank).
+    """
+    probe_dpi = settings.OCR_PROBE_DPI
+    with span("rasterize"):
+        line_height = text_line_height(rasterize(file_path, page_number, probe_dpi))
+        if line_height is None:
+            return "", None
+        dpi = choose_dpi(line_height / probe_dpi, page_size)
+        image = preprocess(rasterize(file_path, page_number, dpi))
+    with span("recognize"):
+        return recognize(image), dpi
+
+
+def iter_ocr_pages(file_path, page_numbers=None):
+    """
+    OCR PDF pages one at a time, yielding each page's text as soon as it is done.
+
+    Pages, blank pages and the sum of the DPIs used are counted on the
+    enclosing metrics span.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        page_numbers (iterable, optional): Zero-based pages. Defaults to all pages.
+    """
+    sizes = page_sizes(file_path)
+    if page_numbers is None:
+        page_numbers = range(len(sizes))
+    for page in page_numbers:
+        text, dpi = ocr_page(file_path, page + 1, sizes[page])
+        metrics.count("pages")
+        if dpi is None:
+            metrics.count("blank_pages")
+        else:
+            metrics.count("dpi", dpi)
+        yield text
+
+
+def ocr_pdf(file_path, first_page=None, last_page=None):
+    """
+    OCR a range of PDF pages, one page in memory at a time.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        first_page (int, optional): First one-based page. Defaults to 1.
+        last_page (int, optional): Last one-based page. Defaults to the last page.
+
+    Returns:
+        list: Recognized text per page.
+    """
+    page_numbers = None
+    if first_page or last_page:
+        page_numbers = range((first_page or 1) - 1, last_page or len(page_sizes(file_path)))
+    return list(iter_ocr_pages(file_path, page_numbers))
@@ -0,0 +1,260 @@
+# app/utils/parse_cache.py
+"""
+Cache of page-level parser output, so re-chunking never re-parses or re-OCRs.
+
+Each artifact is a gzipped JSONL file. The first line is a header with the
+parser version and the document's page count, followed by one
+``{"page": n, "text": ...}`` line per page. Artifacts live under
+``<content_hash>/<file_type>-v<PARSER_VERSION>/`` and are named by their
+first page, so a fanned-out PDF stores one artifact per page range and
+``load_parsed_pages`` merges them back into document order. TXT, JSON and
+DOCX pages are windows, records or sections of a configured size, so that
+size is part of their directory too (e.g. ``txt-v3-3200/``); changing it
+misses the cache instead of reusing pages cut to the old size.
+
+The same storage holds the source of a PDF being fanned out: the parent task
+downloads it once and splits it into one PDF per page range under
+``<content_hash>/source/``, so each sub-task fetches and parses only its own
+pages. They are deleted once the file is ingested.
+"""
+import gzip
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+from app.utils.parsers import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+# Setting that bounds a "page" of each file type that is not split into real pages.
+PAGE_SIZE_SETTINGS = {
+    "txt": "TXT_WINDOW_BYTES",
+    "json": "JSON_RECORD_MAX_CHARS",
+    "docx": "DOCX_SECTION_MAX_CHARS",
+}
+
+
+def _prefix(content_hash, file_type):
+    page_size = PAGE_SIZE_SETTINGS.get(file_type)
+    suffix = f"-{getattr(settings, page_size)}" if page_size else ""
+    return f"{content_hash}/{file_type}-v{PARSER_VERSION}{suffix}/"
+
+
+def _write(key, data):
+    if settings.PARSE_CACHE_STORAGE == "s3":
+        from app.utils.s3 import S3_BUCKET_NAME, s3_client
+
+        s3_client().put_object(Bucket=S3_BUCKET_NAME, Key=f"{settings.PARSE_CACHE_PREFIX}/{key}", Body=data)
+        return
+    path = os.path.join(settings.PARSE_CACHE_DIR, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so readers never see a partial artifact.
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def _read(key):
+    if settings.PARSE_CACHE_STORAGE == "s3":
+        from app.utils.s3 import S3_BUCKET_NAME, s3_client
+
+        response = s3_client().get_object(Bucket=S3_BUCKET_NAME, Key=f"{settings.PARSE_CACHE_PREFIX}/{key}")
+        return response["Body"].read()
+    with open(os.path.join(settings.PARSE_CACHE_DIR, key), "rb") as f:
+        return f.read()
+
+
+def _list(prefix):
+    if settings.PARSE_CACHE_STORAGE == "s3":
+        from app.utils.s3 import S3_BUCKET_NAME, s3_client
+
+        root = f"{settings.PARSE_CACHE_PREFIX}/"
+        keys = []
+        paginator = s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=root + prefix):
+            keys.extend(item["Key"][len(root):] for item in page.get("Contents", []))
+        return keys
+    directory = os.path.join(settings.PARSE_CACHE_DIR, prefix)
+    if not os.path.isdir(directory):
+        return []
+    return [prefix + name for name in os.listdir(directory) if name.endswith(".jsonl.gz")]
+
+
+def save_parsed_pages(content_hash, file_type, texts, first_page=0, document_pages=None):
+    """
+    Store parser output for pages [first_page, first_page + len(texts)).
+
+    Args:
+        content_hash (str): SHA-256 of the document. Nothing is cached without one.
+        file_type (str): The file type the document was parsed as.
+        texts (list): Parsed text per page.
+        first_page (int): Zero-based page of ``texts[0]``.
+        document_pages (int, optional): Pages in the whole document. Defaults to len(texts).
+    """
+    if not content_hash:
+        return
+    header = {
+        "parser_version": PARSER_VERSION,
+        "file_type": file_type,
+        "document_pages": document_pages if document_pages is not None else len(texts),
+        "first_page": first_page,
+    }
+    lines = [json.dumps(header)]
+    lines += [json.dumps({"page": first_page + i, "text": text}) for i, text in enumerate(texts)]
+    data = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"))
+    try:
+        _write(f"{_prefix(content_hash, file_type)}{first_page:06d}.jsonl.gz", data)
+    except Exception:
+        # The cache only saves work later; never fail an ingest over it.
+        logger.exception("Could not cache parse output for %s.", content_hash)
+
+
+def has_parsed_pages(content_hash, file_type):
+    """
+    Cheaply check whether any artifact exists for the document, without reading it.
+    """
+    return bool(content_hash) and bool(_list(_prefix(content_hash, file_type)))
+
+
+def load_parsed_pages(content_hash, file_type, page_numbers=None):
+    """
+    Load cached parser output, merging every artifact of the document.
+
+    Args:
+        content_hash (str): SHA-256 of the document.
+        file_type (str): The file type the document was parsed as.
+        page_numbers (range, optional): Zero-based pages to load. Defaults to the whole document.
+
+    Returns:
+        list | None: Text per page in document order, or None unless every
+        requested page is cached for the current PARSER_VERSION.
+    """
+    if not content_hash:
+        return None
+    pages = {}
+    document_pages = None
+    try:
+        for key in _list(_prefix(content_hash, file_type)):
+            lines = gzip.decompress(_read(key)).decode("utf-8").splitlines()
+            document_pages = json.loads(lines[0])["document_pages"]
+            for line in lines[1:]:
+                record = json.loads(line)
+                pages[record["page"]] = record["text"]
+    except Exception:
+        logger.exception("Could not read cached parse output for %s.", content_hash)
+        return None
+
+    if document_pages is None:
+        return None
+    if page_numbers is None:
+        page_numbers = range(document_pages)
+    if any(page not in pages for page in page_numbers):
+        return None
+    return [pages[page] for page in page_numbers]
+
+
+def _source_key(content_hash, first_page):
+    return f"{content_hash}/source/{first_page:06d}.pdf"
+
+
+def save_source_segments(content_hash, file_path, page_ranges):
+    """
+    Split a PDF into one PDF per page range for fanned-out sub-tasks.
+
+    Args:
+        content_hash (str): SHA-256 of the document.
+        file_path (str): Path to the downloaded PDF.
+        page_ranges (iterable[range]): Zero-based pages of each segment.
+
+    Returns:
+        bool: Whether every segment was stored. Sub-tasks download the whole
+        file for any segment that is missing.
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
+    try:
+        reader = PdfReader(file_path)
+        for pages in page_ranges:
+            writer = PdfWriter()
+            for page in pages:
+                writer.add_page(reader.pages[page])
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            _write(_source_key(content_hash, pages.start), buffer.getvalue())
+    except Exception:
+        logger.exception("Could not split %s into page-range segments.", content_hash)
+        return False
+    return True
+
+
+def load_source_segment(content_hash, first_page):
+    """
+    Fetch the segment saved by save_source_segments that starts at ``first_page``.
+
+    Returns:
+        str | None: Path of a temporary copy, which the caller deletes, or
+        None if there is no such segment.
+    """
+    try:
+        data = _read(_source_key(content_hash, first_page))
+    except Exception:
+        logger.warning("No source segment at page %d of %s.", first_page, content_hash)
+        return None
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
+        f.write(data)
+    return f.name
+
+
+def delete_source_segments(content_hash):
+    """
+    Delete the source segments of a document once its sub-tasks are done.
+    """
+    if settings.PARSE_CACHE_STORAGE == "s3":
+        from app.utils.s3 import delete_files_from_s3, list_objects
+
+        delete_files_from_s3([key for key, _ in list_objects(f"{settings.PARSE_CACHE_PREFIX}/{content_hash}/source/")])
+        return
+    shutil.rmtree(os.path.join(settings.PARSE_CACHE_DIR, content_hash, "source"), ignore_errors=True)
+
+
+def cached_content_hashes():
+    """
+    Return the content hash of every document with cached parse output.
+    """
+    if settings.PARSE_CACHE_STORAGE == "s3":
+        from app.utils.s3 import S3_BUCKET_NAME, s3_client
+
+        root = f"{settings.PARSE_CACHE_PREFIX}/"
+        hashes = set()
+        paginator = s3_client().get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=root, Delimiter="/"):
+            hashes.update(item["Prefix"][len(root):].rstrip("/") for item in page.get("CommonPrefixes", []))
+        return hashes
+    if not os.path.isdir(settings.PARSE_CACHE_DIR):
+        return set()
+    return set(os.listdir(settings.PARSE_CACHE_DIR))
+
+
+def delete_parsed_pages(content_hashes):
+    """
+    Delete every cached artifact (all file types and parser versions) of the given documents.
+    """
+    content_hashes = [content_hash for content_hash in content_hashes if content_hash]
+    if settings.PARSE_CACHE_STORAGE == "s3":
+        from app.utils.s3 import delete_files_from_s3, list_objects
+
+        keys = [
+            key
+            for content_hash in content_hashes
+            for key, _ in list_objects(f"{settings.PARSE_CACHE_PREFIX}/{content_hash}/")
+        ]
+        delete_files_from_s3(keys)
+        return
+    for content_hash in content_hashes:
+        shutil.rmtree(os.path.join(settings.PARSE_CACHE_DIR, content_hash), ignore_errors=True)
@@ -0,0 +1,332 @@
+# app/utils/parse_supervisor.py
+"""
+Run parsers in a supervised child process.
+
+pdfminer, poppler and Tesseract can hang on a malformed page or balloon in
+memory, and a parser that does so inside a Celery worker takes the whole
+worker with it. ``parse_file_supervised`` runs the parser in a fresh
+``python -m app.utils.parse_supervisor`` process (its own session, so
+pdftoppm and tesseract grandchildren are killed with it) and streams each
+page back as a JSON line as soon as it is parsed.
+
+The parent enforces three budgets:
+
+- PARSE_PAGE_TIMEOUT: seconds without a finished page. The page in flight
+  is skipped (left empty, so page numbers stay aligned) and parsing resumes
+  in a new child from the next page.
+- PARSE_MAX_RSS_MB: resident memory of the child and its descendants. The
+  page in flight is skipped the same way.
+- PARSE_DOCUMENT_TIMEOUT: seconds for the whole document. The pages parsed
+  so far are returned.
+
+DOCX, TXT and JSON files are not split into pages up front, so for them the
+page budgets end the parse like the document budget does.
+
+OCR requests go to a long-lived child instead (one per worker thread,
+started with ``--serve``), so its Tesseract handle and loaded language data
+are reused across documents. The child is replaced after
+OCR_CHILD_MAX_REQUESTS documents, and killed like any other child when a
+budget runs out or the parser raises.
+"""
+import json
+import logging
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# How often the parent checks budgets while waiting for output.
+POLL_INTERVAL = 0.5
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# The long-lived OCR child of each worker thread, and the requests it has served.
+_local = threading.local()
+
+
+class ParserError(RuntimeError):
+    """
+    The parser raised in the child process, or the child died without explanation.
+    """
+
+
+class ParsedPages(list):
+    """
+    Text per page, plus what the supervisor had to give up on.
+
+    Attributes:
+        skipped (list): Zero-based pages left empty after a page budget ran out.
+        complete (bool): False if the document budget ran out before the last page.
+    """
+
+    def __init__(self, pages=(), skipped=(), complete=True):
+        super().__init__(pages)
+        self.skipped = list(skipped)
+        self.complete = complete
+
+
+def _tree_rss(pid):
+    """
+    Resident bytes of a process and all of its descendants, from /proc.
+    Returns 0 where /proc is not available.
+    """
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * _PAGE_SIZE
+            for tid in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{tid}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def _kill(child):
+    try:
+        os.killpg(child.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    child.wait()
+
+
+def _spawn(serve=False):
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.utils.parse_supervisor", *(["--serve"] if serve else [])],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        cwd=settings.BASE_DIR,
+        start_new_session=True,
+    )
+
+
+def _serving_child():
+    """
+    The calling thread's long-lived child, started (or replaced once it has
+    served OCR_CHILD_MAX_REQUESTS requests) as needed.
+    """
+    child = getattr(_local, "child", None)
+    if child is not None and (child.poll() is not None or _local.served >= settings.OCR_CHILD_MAX_REQUESTS):
+        _release(child)
+        child = None
+    if child is None:
+        child = _local.child = _spawn(serve=True)
+        _local.served = 0
+    _local.served += 1
+    return child
+
+
+def _release(child):
+    _kill(child)
+    child.stdin.close()
+    child.stdout.close()
+    if getattr(_local, "child", None) is child:
+        _local.child = None
+
+
+def _run_child(request, deadline, reuse=False):
+    """
+    Run one request in a child process and collect its pages until it
+    finishes or a budget runs out.
+
+    Args:
+        reuse (bool): Send the request to the thread's long-lived child and
+            keep it running if the request completes.
+
+    Returns:
+        tuple: (texts, outcome) where outcome is "done", "page_timeout",
+        "memory", "deadline" or "crashed" (the child died without a word).
+
+    Raises:
+        ParserError: If the parser raised.
+    """
+    child = _serving_child() if reuse else _spawn()
+    texts, buffer = [], b""
+    outcome = None
+    max_rss = settings.PARSE_MAX_RSS_MB * 1024 * 1024
+    selector = selectors.DefaultSelector()
+    try:
+        child.stdin.write(json.dumps(request).encode() + b"\n")
+        if reuse:
+            child.stdin.flush()
+        else:
+            child.stdin.close()
+        selector.register(child.stdout, selectors.EVENT_READ)
+        last_progress = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return texts, "deadline"
+            if now - last_progress >= settings.PARSE_PAGE_TIMEOUT:
+                return texts, "page_timeout"
+            if max_rss and _tree_rss(child.pid) > max_rss:
+                return texts, "memory"
+            if not selector.select(min(POLL_INTERVAL, deadline - now)):
+                continue
+            data = os.read(child.stdout.fileno(), 1024 * 1024)
+            if not data:
+                logger.warning("Parser process exited with status %s.", child.wait())
+                return texts, "crashed"
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                message = json.loads(line)
+                if "text" in message:
+                    texts.append(message["text"])
+                    last_progress = time.monotonic()
+                elif "span" in message:
+                    metrics.record_span(message["span"], message["duration"], message["counts"], message["status"])
+                elif "error" in message:
+                    raise ParserError(message["error"])
+                elif message.get("done"):
+                    outcome = "done"
+                    return texts, "done"
+    finally:
+        selector.close()
+        if not reuse:
+            _kill(child)
+            child.stdout.close()
+        elif outcome != "done":
+            _release(child)
+
+
+def _run_pages(op, file_path, page_numbers, deadline, result):
+    """
+    Run a per-page op over ``page_numbers``, skipping any page that exceeds
+    the page or memory budget or kills the child, and append the texts to
+    ``result``. OCR runs in the thread's long-lived child.
+    """
+    remaining = list(page_numbers)
+    while remaining:
+        texts, outcome = _run_child({"op": op, "path": file_path, "pages": remaining}, deadline, reuse=op == "ocr")
+        result.extend(texts)
+        remaining = remaining[len(texts):]
+        if outcome == "done" or not remaining:
+            return
+        if outcome == "deadline":
+            logger.warning("%s ran out of time on %s with %d pages left.", op, file_path, len(remaining))
+            result.complete = False
+            return
+        logger.warning("%s skipped page %d of %s (%s).", op, remaining[0], file_path, outcome)
+        result.append("")
+        result.skipped.append(remaining[0])
+        remaining = remaining[1:]
+
+
+def parse_file_supervised(file_path, ext, page_numbers=None):
+    """
+    Parse a file in a child process with time and memory budgets; see the module docstring.
+
+    PDFs follow parse_pdf_with_fallback: pdfminer first, OCR if the text
+    layer is insufficient. Any pages skipped are counted on the enclosing
+    metrics span as ``skipped_pages``.
+
+    Args:
+        file_path (str): Path to the file.
+        ext (str): Its type: pdf, docx, txt or json.
+        page_numbers (range, optional): Zero-based PDF pages to parse. Defaults to all pages.
+
+    Returns:
+        ParsedPages: Text per page.
+
+    Raises:
+        ParserError: If the parser raised, or its process died on a file
+            that is not split into pages.
+    """
+    from app.utils.parsers import get_pdf_page_count, is_text_valid
+
+    deadline = time.monotonic() + settings.PARSE_DOCUMENT_TIMEOUT
+    result = ParsedPages()
+    if ext == "pdf":
+        if page_numbers is None:
+            with metrics.span("pdf_page_count"):
+                page_numbers = range(get_pdf_page_count(file_path))
+        _run_pages("pdfminer", file_path, page_numbers, deadline, result)
+        if result.complete and not is_text_valid("\n".join(result), len(page_numbers)):
+            logger.info("pdfminer.six extraction failed or insufficient. Falling back to OCR...")
+            result = ParsedPages()
+            _run_pages("ocr", file_path, page_numbers, deadline, result)
+    else:
+        texts, outcome = _run_child({"op": "parse", "path": file_path, "ext": ext}, deadline)
+        result.extend(texts)
+        if outcome == "crashed":
+            raise ParserError(f"Parser process died while parsing {file_path}.")
+        if outcome != "done":
+            logger.warning("Parsing %s stopped early (%s).", file_path, outcome)
+            result.complete = False
+    if result.skipped:
+        metrics.count("skipped_pages", len(result.skipped))
+    return result
+
+
+def _serve(request, send):
+    from app.utils import parsers
+    from app.utils.ocr import iter_ocr_pages
+
+    if request["op"] == "pdfminer":
+        with metrics.span("pdfminer") as stage:
+            for text in parsers.iter_pdf_pages(request["path"], request["pages"]):
+                stage.count("pages")
+                send({"text": text})
+    elif request["op"] == "ocr":
+        with metrics.span("ocr"):
+            for text in iter_ocr_pages(request["path"], request["pages"]):
+                send({"text": text})
+    else:
+        pages = {
+            "docx": parsers.iter_docx_sections,
+            "txt": lambda path: parsers.iter_txt_windows(path, settings.TXT_WINDOW_BYTES),
+            "json": parsers.iter_json_pages,
+        }[request["ext"]](request["path"])
+        for text in pages:
+            send({"text": text})
+
+
+def main():
+    """
+    Child entry point: read one request from stdin, write JSON lines to stdout.
+    With ``--serve``, read one request per line until stdin is closed.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # Keep the protocol on its own descriptor so stray prints cannot corrupt it.
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    logging.basicConfig(level=logging.WARNING)
+
+    def send(message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    metrics.forward_spans(
+        lambda stage, duration, counts, status: send(
+            {"span": stage, "duration": duration, "counts": counts, "status": status}
+        )
+    )
+    serve = "--serve" in sys.argv[1:]
+    while True:
+        line = sys.stdin.readline() if serve else sys.stdin.read()
+        if not line:
+            return
+        try:
+            _serve(json.loads(line), send)
+        except Exception as e:
+            send({"error": f"{type(e).__name__}: {e}"})
+        else:
+            send({"done": True})
+        if not serve:
+            return
+
+
+if __name__ == "__main__":
+    main()
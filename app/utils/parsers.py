@@ -1,13 +1,25 @@
 import os
-import json
+import hashlib
+import logging
+import mmap
 import re
 import tempfile
-from pdf2image import convert_from_path
-import pytesseract
+import zipfile
+from xml.etree import ElementTree
+from django.conf import settings
 import requests
-from pdfminer.high_level import extract_pages
-from pdfminer.layout import LTTextContainer
-from docx import Document
+
+from app.utils.json_records import format_record, iter_json_records
+from app.utils.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parser output changes so cached parse artifacts are not reused.
+PARSER_VERSION = 3
+
+# WordprocessingML namespace, as ElementTree spells tags.
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_HEADING_STYLE = re.compile(r"(?i)^(?:heading\s*(\d)|title)$")
 
 
 def download_file(url, suffix=None):
@@ -17,7 +29,7 @@ def download_file(url, suffix=None):
     If no suffix is provided, the function will attempt to extract it from the URL.
     The downloaded file is stored as a temporary file.
     """
-    response = requests.get(url)
+    response = requests.get(url, stream=True)
     response.raise_for_status()
     
     # Try to guess the file extension if not provided
@@ -41,48 +53,82 @@ def download_file(url, suffix=None):
         suffix = f".{suffix}"
         # Create a temporary file. delete=False allows us to reopen it by path.
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        temp_file.write(response.content)
+        # Stream to disk so large files never sit in memory whole.
+        for block in response.iter_content(chunk_size=1024 * 1024):
+            temp_file.write(block)
         temp_file.flush()
         temp_file.close()
         return temp_file.name
     except Exception as e:
-        print(f"Error saving file: {e}")
+        logger.exception("Error saving file.")
         raise e
     
-def parse_pdf(file_path):
+
+def file_sha256(file_path):
     """
-    Parse a PDF file and extract text from each page.
+    Compute the SHA-256 hex digest of a local file, reading it in 1 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_pdf_pages(file_path, page_numbers=None):
+    """
+    Extract the text of PDF pages with pdfminer.six, yielding each page as soon as it is done.
 
     Args:
         file_path (str): The path to the PDF file.
-
-    Returns:
-        list: A list where each element is the extracted text of a page.
+        page_numbers (iterable, optional): Zero-based pages to parse. Defaults to all pages.
     """
-    page_texts = []
-    for page_layout in extract_pages(file_path):
+    # PDF and OCR libraries are imported where used, so only workers load them.
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    for page_layout in extract_pages(file_path, page_numbers=page_numbers):
         page_text = ''
         for element in page_layout:
             if isinstance(element, LTTextContainer):
                 page_text += element.get_text()
-        page_texts.append(page_text)
+        yield page_text
+
+def parse_pdf(file_path, page_numbers=None):
+    """
+    Parse a PDF file and extract text from each page.
+
+    Args:
+        file_path (str): The path to the PDF file.
+        page_numbers (iterable, optional): Zero-based pages to parse. Defaults to all pages.
+
+    Returns:
+        list: A list where each element is the extracted text of a page.
+    """
+    with span("pdfminer") as stage:
+        page_texts = list(iter_pdf_pages(file_path, page_numbers))
+        stage.count("pages", len(page_texts))
     return page_texts
 
 def get_pdf_page_count(file_path):
     """
     Get the total number of pages in a PDF.
 
+    Reads the page tree with PyPDF2 instead of running pdfminer's layout
+    analysis over every page.
+
     Args:
         file_path (str): Path to the PDF file.
 
     Returns:
         int: Number of pages in the PDF.
     """
+    from PyPDF2 import PdfReader
+
     try:
-        pages = extract_pages(file_path)
-        return sum(1 for _ in pages)
-    except Exception as e:
-        print(f"Error reading PDF pages: {e}")
+        return len(PdfReader(file_path).pages)
+    except Exception:
+        logger.exception("Error reading PDF pages.")
         return 1  # Assume 1 page if reading fails
 
 def is_text_valid(text, page_count):
@@ -124,126 +170,296 @@ def is_text_valid(text, page_count):
     
 #     return texts
 
-def extract_text_ocr(file_path):
+def extract_text_ocr(file_path, first_page=None, last_page=None):
     """
-    Extract text from a scanned PDF using OCR.
+    Extract text from a scanned PDF using OCR (see app.utils.ocr).
 
     Args:
         file_path (str): Path to the PDF file.
+        first_page (int, optional): First one-based page to rasterize.
+        last_page (int, optional): Last one-based page to rasterize.
     
     Returns:
-        str: Extracted text.
+        list: Extracted text per page.
     """
-    texts = []
+    from app.utils.ocr import ocr_pdf
+
     try:
-        images = convert_from_path(file_path)
-        for image in images:
-            texts.append(pytesseract.image_to_string(image))
+        with span("ocr"):
+            texts = ocr_pdf(file_path, first_page, last_page)
     except Exception as e:
-        print(f"OCR extraction failed: {e}")
+        logger.exception("OCR extraction failed.")
         raise e
     
     return texts
 
-def parse_pdf_with_fallback(file_path):
+def parse_pdf_with_fallback(file_path, page_numbers=None):
     """
     Attempt text extraction using pdfminer.six first.
     If extracted text is insufficient, use OCR as a fallback.
     
     Args:
         file_path (str): Path to the PDF file.
+        page_numbers (range, optional): Zero-based, contiguous pages to parse. Defaults to all pages.
     
     Returns:
         str: Extracted text from the best available method.
     """
-    page_count = get_pdf_page_count(file_path)
-    print(f"PDF has {page_count} pages.")
+    if page_numbers is not None:
+        page_count = len(page_numbers)
+    else:
+        with span("pdf_page_count"):
+            page_count = get_pdf_page_count(file_path)
+    logger.info("PDF has %d pages.", page_count)
 
-    extracted_text = parse_pdf(file_path)
+    extracted_text = parse_pdf(file_path, page_numbers)
 
     if is_text_valid("\n".join(extracted_text), page_count):
-        print("Successfully extracted text using pdfminer.six.")
+        logger.info("Successfully extracted text using pdfminer.six.")
         return extracted_text
     
-    print("pdfminer.six extraction failed or insufficient. Falling back to OCR...")
+    logger.info("pdfminer.six extraction failed or insufficient. Falling back to OCR...")
+    if page_numbers is not None:
+        return extract_text_ocr(file_path, page_numbers[0] + 1, page_numbers[-1] + 1)
     return extract_text_ocr(file_path)
 
 def parse_pdf_with_ocr(file_path):
     """
     Parse a scanned PDF file using OCR.
     
-    Converts each PDF page to an image and extracts text using pytesseract.
+    Rasterizes and recognizes each page in turn with the OCR engine.
     
     Returns:
         Extracted text as a string.
     """
     text = ""
-    # Convert PDF to a list of PIL Image objects
-    images = convert_from_path(file_path)
-    
-    # Loop through each page image and extract text
-    for image in images:
-        page_text = pytesseract.image_to_string(image)
+    for page_text in extract_text_ocr(file_path):
         text += page_text + "\n"
     
     return text
 
+def _heading_level(style_id):
+    match = _HEADING_STYLE.match(style_id or "")
+    if match is None:
+        return None
+    return int(match.group(1)) if match.group(1) else 0
+
+def _container(tags):
+    # Nearest enclosing table cell, text box or the body.
+    for tag in reversed(tags):
+        if tag in (_W + "tc", _W + "txbxContent", _W + "body"):
+            return tag
+    return None
+
+def iter_docx_blocks(file_path):
+    """
+    Stream the paragraphs and table rows of a DOCX file in reading order.
+
+    Only ``word/document.xml`` is read, incrementally, straight from the zip;
+    media and other parts are never opened. Elements are cleared as soon as
+    they are processed, so memory does not grow with the document.
+
+    Yields:
+        tuple: (heading level or None, text). Headings (Title is level 0)
+        and body paragraphs yield one tuple each, text box paragraphs
+        included; a table row yields its cells joined by `` | ``.
+    """
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        tags = []  # Tags of the open elements
+        paragraphs = []  # [text parts, heading level] per open paragraph; text boxes nest them
+        rows = []  # Cells (lists of paragraph texts) per open table row; tables nest
+        body = None
+        for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                tags.append(tag)
+                if tag == _W + "p":
+                    paragraphs.append([[], None])
+                elif tag == _W + "tr":
+                    rows.append([])
+                elif tag == _W + "tc" and rows:
+                    rows[-1].append([])
+                elif tag == _W + "body":
+                    body = elem
+                continue
+
+            tags.pop()
+            parent = tags[-1] if tags else None
+            if tag == _W + "t" and paragraphs:
+                paragraphs[-1][0].append(elem.text or "")
+            elif tag == _W + "tab" and parent == _W + "r" and paragraphs:
+                paragraphs[-1][0].append("\t")
+            elif tag in (_W + "br", _W + "cr") and parent == _W + "r" and paragraphs:
+                paragraphs[-1][0].append("\n")
+            elif tag == _W + "pStyle" and paragraphs:
+                paragraphs[-1][1] = _heading_level(elem.get(_W + "val"))
+            elif tag == _W + "p" and paragraphs:
+                parts, level = paragraphs.pop()
+                text = "".join(parts)
+                if _container(tags) == _W + "tc" and rows and rows[-1]:
+                    rows[-1][-1].append(text)
+                elif text.strip():
+                    yield level, text
+            elif tag == _W + "tr" and rows:
+                cells = rows.pop()
+                row = " | ".join("\n".join(part for part in cell if part.strip()) for cell in cells)
+                if _container(tags) == _W + "tc" and rows and rows[-1]:
+                    # Nested table: the row becomes text of the outer cell.
+                    rows[-1][-1].append(row)
+                elif row.strip(" |"):
+                    yield None, row
+
+            elem.clear()
+            if parent == _W + "body" and body is not None:
+                body.clear()
+
+def iter_docx_sections(file_path):
+    """
+    Yield a DOCX file as sections of at most DOCX_SECTION_MAX_CHARS.
+
+    A section starts at every heading and holds the paragraphs and table
+    rows below it. Each section's text begins with its heading trail (e.g.
+    ``Results > Latency``); a long section continues in the next one with
+    the same trail.
+
+    Args:
+        file_path (str): The path to the DOCX file.
+    """
+    max_chars = settings.DOCX_SECTION_MAX_CHARS
+    trail = []  # (level, heading text) of the enclosing headings
+    lines, size, has_body = [], 0, False
+
+    def start_section():
+        heading = " > ".join(text for _, text in trail)
+        return ([heading], len(heading)) if heading else ([], 0)
+
+    for level, text in iter_docx_blocks(file_path):
+        if level is not None:
+            if has_body:
+                yield "\n".join(lines)
+            trail = [entry for entry in trail if entry[0] < level] + [(level, text.strip())]
+            (lines, size), has_body = start_section(), False
+            continue
+        if has_body and size + len(text) > max_chars:
+            yield "\n".join(lines)
+            (lines, size), has_body = start_section(), False
+        lines.append(text)
+        size += len(text) + 1
+        has_body = True
+    if has_body:
+        yield "\n".join(lines)
+
 def parse_docx(file_path):
     """
-    Parse a DOCX file and extract its text.
+    Parse a DOCX file into heading sections (see iter_docx_sections).
 
     Args:
         file_path (str): The path to the DOCX file.
 
     Returns:
-        str: The extracted text.
+        list: The text of each section, treated as one page downstream.
     """
-    doc = Document(file_path)
-    full_text = []
-    for paragraph in doc.paragraphs:
-        full_text.append(paragraph.text)
-    return full_text
+    return list(iter_docx_sections(file_path))
+
+def iter_txt_windows(file_path, window_bytes):
+    """
+    Yield the text of a UTF-8 file in windows of at most ``window_bytes``.
+
+    The file is memory-mapped, so only the current window is decoded. Windows
+    end at the last paragraph break (blank line) inside the limit, else at
+    the last line break, else at a character boundary. Joined together they
+    give back the whole file.
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < size:
+                end = min(start + window_bytes, size)
+                if end < size:
+                    cut = data.rfind(b"\n\n", start, end)
+                    if cut <= start:
+                        cut = data.rfind(b"\n", start, end - 1)
+                    if cut > start:
+                        end = cut + (2 if data[cut:cut + 2] == b"\n\n" else 1)
+                    else:
+                        # No line break at all: back off to a UTF-8 lead byte.
+                        while end > start + 1 and data[end] & 0xC0 == 0x80:
+                            end -= 1
+                yield data[start:end].decode('utf-8')
+                start = end
 
 def parse_txt(file_path):
     """
-    Parse a TXT file using built-in file I/O.
+    Parse a TXT file in paragraph-bounded windows of TXT_WINDOW_BYTES.
     
     Returns:
-        The file's text content.
+        A list of text windows, each treated as one page downstream.
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return list(iter_txt_windows(file_path, settings.TXT_WINDOW_BYTES))
     except Exception as e:
-        print("Error parsing TXT file.")
+        logger.exception("Error parsing TXT file.")
         raise e
 
+def iter_json_pages(file_path):
+    """
+    Yield one ``<json path>: <json>`` text per record of at most
+    JSON_RECORD_MAX_CHARS (see app.utils.json_records).
+    """
+    for path, value in iter_json_records(
+        file_path, settings.JSON_RECORD_MAX_CHARS, settings.JSON_READ_BLOCK_CHARS
+    ):
+        yield format_record(path, value)
+
 def parse_json(file_path):
     """
-    Parse a JSON file using the built-in json module.
+    Parse a JSON file incrementally into records of at most JSON_RECORD_MAX_CHARS.
     
     Returns:
-        The parsed JSON object.
+        A list with one text per record (see iter_json_pages), each treated
+        as one page downstream.
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return [json.dumps(json.load(f))]
+        return list(iter_json_pages(file_path))
     except Exception as e:
-        print("Error parsing JSON file.")
+        logger.exception("Error parsing JSON file.")
         raise e
 
-def parse_file(file_path, ext):
+PARSED_TYPES = ('pdf', 'docx', 'txt', 'json')
+
+def parse_file(file_path, ext, page_numbers=None):
     """
     Detect the file type based on its extension and parse accordingly.
     
-    Supported file types: PDF, DOCX, TXT, JSON.
+    Supported file types: PDF, DOCX, TXT, JSON. ``page_numbers`` (a range of
+    zero-based pages) restricts PDF parsing to part of the document.
+
+    With PARSE_IN_SUBPROCESS the parser runs in a supervised child process
+    with time and memory budgets (see app.utils.parse_supervisor), and the
+    texts are a ParsedPages list that records any pages skipped on the way.
     
     Returns:
-        The extracted text (for PDF, DOCX, TXT) or the parsed JSON object.
+        The extracted text per page and the file type.
+    """
+    ext = ext.lower()
+    if ext not in PARSED_TYPES:
+        raise ValueError(f"Unsupported file extension: {ext}")
+    if settings.PARSE_IN_SUBPROCESS:
+        from app.utils.parse_supervisor import parse_file_supervised
+
+        return parse_file_supervised(file_path, ext, page_numbers), ext
+    return parse_file_inline(file_path, ext, page_numbers)
+
+def parse_file_inline(file_path, ext, page_numbers=None):
+    """
+    Parse a file in this process; see parse_file.
     """
     ext = ext.lower()
     if ext == 'pdf':
-        return parse_pdf_with_fallback(file_path), ext
+        return parse_pdf_with_fallback(file_path, page_numbers), ext
     elif ext == 'docx':
         return parse_docx(file_path), ext
     elif ext == 'txt':
@@ -253,7 +469,7 @@ def parse_file(file_path, ext):
     else:
         raise ValueError(f"Unsupported file extension: {ext}")
 
-def parse_file_from_url(url, type):
+def parse_file_from_url(url, type, page_numbers=None):
     """
     Download a file from a URL and parse it automatically.
     
@@ -264,9 +480,13 @@ def parse_file_from_url(url, type):
     """
     # Determine suffix from URL (if possible)
     base = url.split('?')[0]
-    temp_file_path = download_file(url, type)
+    with span("download") as stage:
+        temp_file_path = download_file(url, type)
+        stage.count("bytes", os.path.getsize(temp_file_path))
     try:
-        result, ext = parse_file(temp_file_path, type)
+        with span("parse") as stage:
+            result, ext = parse_file(temp_file_path, type, page_numbers)
+            stage.count("pages", len(result))
         os.remove(temp_file_path)
 
 
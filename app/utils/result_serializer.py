@@ -0,0 +1,52 @@
+# app/utils/result_serializer.py
+"""
+Compact serializer for Celery task results.
+
+Results are stored as compact JSON. One larger than RESULT_COMPRESS_MIN_BYTES
+(a query answer with its citations) is zlib-compressed and base64-encoded
+behind a ``z:`` prefix, which no JSON document starts with. Small status
+summaries stay readable in the admin, and old plain-JSON results still
+decode.
+
+The serializer is registered with kombu by config.celery, in the web
+process and the workers alike, and selected with CELERY_RESULT_SERIALIZER.
+"""
+import base64
+import json
+import zlib
+
+from kombu.serialization import register
+
+SERIALIZER_NAME = "zjson"
+CONTENT_TYPE = "application/x-zlib-json"
+# Below this many bytes zlib and base64 make a result larger, not smaller.
+RESULT_COMPRESS_MIN_BYTES = 512
+_PREFIX = "z:"
+
+
+def dumps(value):
+    """
+    Serialize a result to compact JSON, compressed if it is large.
+    """
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    if len(data) < RESULT_COMPRESS_MIN_BYTES:
+        return data
+    return _PREFIX + base64.b64encode(zlib.compress(data.encode("utf-8"), 6)).decode("ascii")
+
+
+def loads(data):
+    """
+    Inverse of ``dumps``; plain JSON is accepted as well.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    if data.startswith(_PREFIX):
+        data = zlib.decompress(base64.b64decode(data[len(_PREFIX):])).decode("utf-8")
+    return json.loads(data)
+
+
+def register_result_serializer():
+    """
+    Make ``zjson`` available to Celery in this process.
+    """
+    register(SERIALIZER_NAME, dumps, loads, content_type=CONTENT_TYPE, content_encoding="utf-8")
@@ -1,10 +1,16 @@
+import hashlib
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from botocore.exceptions import NoCredentialsError
 
+from app.utils.clients import shared
+
 # Initialize Logger
 logger = logging.getLogger(__name__)
 
@@ -13,15 +19,72 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION")
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+# Point at a local stand-in such as moto_server or MinIO, e.g. http://localhost:5000.
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+
+# Connection pool shared by every thread using the client. Keep it at least
+# S3_MAX_CONCURRENCY times the number of concurrent bulk uploads.
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 50))
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", 5))
+# Transfers above the threshold are split into parts uploaded in parallel.
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", 16 * 1024 * 1024))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", 16 * 1024 * 1024))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 10))
+# delete_objects accepts at most this many keys per request.
+S3_DELETE_BATCH_SIZE = 1000
 
-# Initialize S3 client
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION,
+CLIENT_CONFIG = Config(
+    # SigV4 presigned URLs also sign headers such as Content-Length.
+    signature_version="s3v4",
+    max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+    retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "adaptive"},
+)
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+    max_concurrency=S3_MAX_CONCURRENCY,
 )
 
+def s3_client():
+    """
+    The process's shared S3 client, created on first use (see app.utils.clients).
+
+    Building a client loads botocore's service models, which is slow, so it
+    is not done at import time. boto3 clients are thread-safe.
+    """
+    return shared(("s3", S3_ENDPOINT_URL, AWS_REGION), lambda: boto3.client(
+        "s3",
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION,
+        endpoint_url=S3_ENDPOINT_URL,
+        config=CLIENT_CONFIG,
+    ))
+
+
+class HashingReader:
+    """
+    Read-only file wrapper that computes a SHA-256 of the bytes as they are read.
+
+    Passing it to ``upload_fileobj`` hashes the upload while it streams to S3,
+    without a second pass over the file. It deliberately has no ``seek``,
+    so boto3 reads the stream once, in order.
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        self._sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
 
 def modify_file_name(file_name):
     """
@@ -44,7 +107,7 @@ def upload_file_to_s3(file, file_name, bucket=S3_BUCKET_NAME, acl="public-read")
     """
     try:
         file_name = modify_file_name(file_name)
-        s3_client.upload_fileobj(file, bucket, file_name)
+        s3_client().upload_fileobj(file, bucket, file_name, Config=TRANSFER_CONFIG)
     except NoCredentialsError:
         logger.exception("AWS credentials not available.")
         return None
@@ -52,7 +115,30 @@ def upload_file_to_s3(file, file_name, bucket=S3_BUCKET_NAME, acl="public-read")
         logger.exception("Error uploading file")  # Ruff-compliant logging
         return None
     else:
-        return f"https://{bucket}.s3.{AWS_REGION}.amazonaws.com/{file_name}"
+        return object_url(file_name, bucket)
+
+
+def upload_files_to_s3(files, bucket=S3_BUCKET_NAME, max_workers=4):
+    """
+    Uploads many files concurrently over the shared client.
+
+    Each file may itself be split into S3_MAX_CONCURRENCY parallel parts, so
+    up to max_workers * S3_MAX_CONCURRENCY connections can be in use.
+
+    :param files: Iterable of (file object or local path, file name) pairs
+    :param bucket: S3 bucket name
+    :param max_workers: Files uploaded at the same time
+    :return: Dict mapping each file name to its URL, or None if it failed
+    """
+    def upload(item):
+        file, file_name = item
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "rb") as f:
+                return file_name, upload_file_to_s3(f, file_name, bucket)
+        return file_name, upload_file_to_s3(file, file_name, bucket)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(pool.map(upload, files))
 
 
 def delete_file_from_s3(file_name, bucket=S3_BUCKET_NAME):
@@ -64,7 +150,7 @@ def delete_file_from_s3(file_name, bucket=S3_BUCKET_NAME):
     :return: True if successful, False otherwise
     """
     try:
-        s3_client.delete_object(Bucket=bucket, Key=file_name)
+        s3_client().delete_object(Bucket=bucket, Key=file_name)
     except NoCredentialsError:
         logger.exception("AWS credentials not available.")
         return False
@@ -73,3 +159,169 @@ def delete_file_from_s3(file_name, bucket=S3_BUCKET_NAME):
         return False
     else:
         return True
+
+
+def delete_files_from_s3(file_names, bucket=S3_BUCKET_NAME):
+    """
+    Deletes many files with one delete_objects request per 1,000 keys.
+
+    :param file_names: Iterable of file names (keys) to delete
+    :param bucket: S3 bucket name
+    :return: List of the keys that could not be deleted
+    """
+    keys = list(file_names)
+    failed = []
+    for start in range(0, len(keys), S3_DELETE_BATCH_SIZE):
+        batch = keys[start:start + S3_DELETE_BATCH_SIZE]
+        try:
+            response = s3_client().delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+        except (NoCredentialsError, ClientError):
+            logger.exception("Error deleting %d files", len(batch))
+            failed.extend(batch)
+            continue
+        for error in response.get("Errors", []):
+            logger.error("Error deleting %s: %s", error["Key"], error.get("Message"))
+            failed.append(error["Key"])
+    return failed
+
+
+def object_url(key, bucket=S3_BUCKET_NAME):
+    """
+    Returns the public URL of an object, in the same form as upload_file_to_s3.
+
+    :param key: Object key
+    :param bucket: S3 bucket name
+    :return: Object URL
+    """
+    if S3_ENDPOINT_URL:
+        return f"{S3_ENDPOINT_URL.rstrip('/')}/{bucket}/{key}"
+    return f"https://{bucket}.s3.{AWS_REGION}.amazonaws.com/{key}"
+
+
+def generate_presigned_put(key, content_type, content_length, sha256_b64=None, expires_in=3600,
+                           bucket=S3_BUCKET_NAME):
+    """
+    Presigns a single PUT of an object, so the client uploads straight to S3.
+
+    :param key: Object key to upload to
+    :param content_type: Content-Type the client must send
+    :param content_length: Size of the body in bytes; S3 rejects a body of any other size
+    :param sha256_b64: Base64 SHA-256 of the body; if given, S3 rejects any other body
+    :param expires_in: Seconds the URL stays valid
+    :param bucket: S3 bucket name
+    :return: Dict with the URL and the headers the client must send
+    """
+    # Content-Length is signed but not returned: HTTP clients set it from the body.
+    params = {"Bucket": bucket, "Key": key, "ContentType": content_type, "ContentLength": content_length}
+    headers = {"Content-Type": content_type}
+    if sha256_b64:
+        params["ChecksumSHA256"] = sha256_b64
+        headers["x-amz-checksum-sha256"] = sha256_b64
+    url = s3_client().generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+    return {"url": url, "headers": headers}
+
+
+def create_multipart_upload(key, content_type, part_count, expires_in=3600, bucket=S3_BUCKET_NAME):
+    """
+    Starts a multipart upload and presigns a PUT URL for every part.
+
+    :param key: Object key to upload to
+    :param content_type: Content-Type of the final object
+    :param part_count: Number of parts the client will upload
+    :param expires_in: Seconds the part URLs stay valid
+    :param bucket: S3 bucket name
+    :return: (upload ID, list of {"part_number", "url"})
+    """
+    upload_id = s3_client().create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)["UploadId"]
+    parts = [
+        {
+            "part_number": part_number,
+            "url": s3_client().generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+                ExpiresIn=expires_in,
+            ),
+        }
+        for part_number in range(1, part_count + 1)
+    ]
+    return upload_id, parts
+
+
+def complete_multipart_upload(key, upload_id, parts, bucket=S3_BUCKET_NAME):
+    """
+    Assembles the uploaded parts into the final object.
+
+    :param key: Object key
+    :param upload_id: Upload ID from create_multipart_upload
+    :param parts: List of {"part_number", "etag"} reported by the client
+    :param bucket: S3 bucket name
+    """
+    s3_client().complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [
+                {"PartNumber": int(part["part_number"]), "ETag": part["etag"]}
+                for part in sorted(parts, key=lambda part: int(part["part_number"]))
+            ]
+        },
+    )
+
+
+def abort_multipart_upload(key, upload_id, bucket=S3_BUCKET_NAME):
+    """
+    Aborts a multipart upload and frees its stored parts.
+
+    :param key: Object key
+    :param upload_id: Upload ID from create_multipart_upload
+    :param bucket: S3 bucket name
+    """
+    s3_client().abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+
+def head_object(key, bucket=S3_BUCKET_NAME):
+    """
+    Returns an object's metadata, including its SHA-256 checksum if it has one.
+
+    :param key: Object key
+    :param bucket: S3 bucket name
+    :return: head_object response, or None if the object does not exist
+    """
+    try:
+        return s3_client().head_object(Bucket=bucket, Key=key, ChecksumMode="ENABLED")
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+
+def key_from_url(url, bucket=S3_BUCKET_NAME):
+    """
+    Returns the object key of a URL built by object_url.
+
+    :param url: File URL
+    :param bucket: S3 bucket name
+    :return: Object key, or None if the URL is not in the bucket
+    """
+    prefix = object_url("", bucket)
+    if url and url.startswith(prefix):
+        return url[len(prefix):].split("?")[0] or None
+    return None
+
+
+def list_objects(prefix="", bucket=S3_BUCKET_NAME):
+    """
+    Lists every object under a prefix, 1,000 keys per request.
+
+    :param prefix: Key prefix
+    :param bucket: S3 bucket name
+    :return: Generator of (key, last modified datetime)
+    """
+    paginator = s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            yield item["Key"], item["LastModified"]
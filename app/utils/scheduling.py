@@ -0,0 +1,90 @@
+# app/utils/scheduling.py
+"""
+Priority and fairness for the embeddings and queries queues.
+
+Both queues are RabbitMQ priority queues (see CELERY_TASK_QUEUES). Ingest
+priority starts from the file's size class, so small uploads overtake large
+ones, and drops by one for every INGEST_TENANT_BACKLOG_STEP files the same
+tenant already has waiting, so one tenant's bulk upload cannot starve
+everyone else. Queries always run at QUERY_PRIORITY on their own workers.
+"""
+import logging
+
+from django.conf import settings
+
+from app.models.files import File
+
+logger = logging.getLogger(__name__)
+
+# Base priority per ingest size class; higher runs first on RabbitMQ.
+INGEST_CLASS_PRIORITIES = {
+    "small": 8,
+    "medium": 5,
+    "large": 2,
+}
+QUERY_PRIORITY = 9
+QUERY_TASK_CLASS = "interactive"
+
+
+def ingest_task_class(size_bytes):
+    """
+    Bucket a file into a size class from the upload's size hint.
+
+    Args:
+        size_bytes (int | None): Size of the uploaded file, if known.
+
+    Returns:
+        str: "small", "medium" or "large". Unknown sizes count as "medium".
+    """
+    if size_bytes is None:
+        return "medium"
+    if size_bytes <= settings.INGEST_SMALL_FILE_BYTES:
+        return "small"
+    if size_bytes >= settings.INGEST_LARGE_FILE_BYTES:
+        return "large"
+    return "medium"
+
+
+def ingest_priority(file_instance):
+    """
+    Compute the broker priority for ingesting a file.
+
+    Args:
+        file_instance (File): The file about to be enqueued.
+
+    Returns:
+        tuple: (priority, task class) for apply_async.
+    """
+    task_class = ingest_task_class(file_instance.size_bytes)
+    base = INGEST_CLASS_PRIORITIES[task_class]
+    backlog = (
+        File.objects.filter(tenant=file_instance.tenant, processed=False)
+        .exclude(ingest_stage="failed")
+        .exclude(pk=file_instance.pk)
+        .count()
+    )
+    penalty = min(backlog // settings.INGEST_TENANT_BACKLOG_STEP, base)
+    return base - penalty, task_class
+
+
+def queue_depth_samples():
+    """
+    Metrics collector reporting the number of ready messages in each queue.
+    """
+    from config.celery import app
+
+    with app.connection_for_read() as connection:
+        for queue in settings.CELERY_TASK_QUEUES:
+            # A passive declare only reads the queue's state. A missing queue
+            # closes the channel, so each queue gets its own.
+            try:
+                with connection.channel() as channel:
+                    _, message_count, _ = channel.queue_declare(queue=queue.name, passive=True)
+            except connection.channel_errors:
+                message_count = 0
+            yield (
+                "ragmatic_queue_depth",
+                "Messages waiting in each Celery queue.",
+                {"queue": queue.name},
+                message_count,
+            )
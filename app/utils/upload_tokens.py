@@ -0,0 +1,50 @@
+from django.core import signing
+
+UPLOAD_TOKEN_SALT = "app.upload-token"
+
+
+def make_upload_token(url, content_hash, size):
+    """
+    Sign the server-computed hash and size of an upload.
+
+    The client passes the token back when creating the File, so the hash
+    used for deduplication is never taken from client input.
+    """
+    return signing.dumps({"url": url, "sha256": content_hash, "size": size}, salt=UPLOAD_TOKEN_SALT)
+
+
+def read_upload_token(token):
+    """
+    Verify an upload token and return its payload.
+
+    Raises:
+        signing.BadSignature: If the token was not issued by this server.
+    """
+    return signing.loads(token, salt=UPLOAD_TOKEN_SALT)
+
+
+UPLOAD_SESSION_SALT = "app.upload-session"
+
+
+def make_upload_session(key, filename, size, upload_id=None, sha256=None):
+    """
+    Sign the details of a direct-to-S3 upload issued by this server.
+
+    The completion endpoint only accepts a session it issued, so clients
+    cannot register or complete uploads of arbitrary keys.
+    """
+    return signing.dumps(
+        {"key": key, "filename": filename, "size": size, "upload_id": upload_id, "sha256": sha256},
+        salt=UPLOAD_SESSION_SALT,
+    )
+
+
+def read_upload_session(token, max_age):
+    """
+    Verify an upload session and return its payload.
+
+    Raises:
+        signing.BadSignature: If the session was not issued by this server or
+            is older than ``max_age`` seconds.
+    """
+    return signing.loads(token, salt=UPLOAD_SESSION_SALT, max_age=max_age)
@@ -0,0 +1,205 @@
+# app/utils/vector_snapshots.py
+"""
+Snapshots of the vector store, to restore it without re-parsing or re-embedding.
+
+A snapshot holds one directory per collection (File.vector_key):
+
+- ``vectors.npy``: the vectors as a float32 matrix, row ``i`` for chunk ``i``;
+- ``chunks.jsonl.gz``: one ``{"uuid", "index", "text", "page",
+  "start_offset", "end_offset"}`` line per chunk, in the same order;
+
+and a ``manifest.json`` listing every collection with its chunk count,
+dimensions, embedding model and the SHA-256 of both files. Snapshots are
+stored under VECTOR_SNAPSHOT_DIR ("local") or under VECTOR_SNAPSHOT_PREFIX
+in S3_BUCKET_NAME ("s3").
+
+Both directions are checked against the database: a collection is only
+exported, or imported, when its objects are exactly the file's Chunk rows
+(same count, same vector UUIDs in the same order). Objects keep their
+UUIDs, so the Chunk rows stay valid after an import.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+from django.conf import settings
+
+from app.models.files import File
+from app.utils.embeddings import CITATION_PROPERTIES, iter_collection, store_embeddings
+
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(RuntimeError):
+    """
+    A collection does not match the database or its snapshot files.
+    """
+
+
+def _write(key, data):
+    if settings.VECTOR_SNAPSHOT_STORAGE == "s3":
+        from app.utils.s3 import S3_BUCKET_NAME, s3_client
+
+        s3_client().put_object(Bucket=S3_BUCKET_NAME, Key=f"{settings.VECTOR_SNAPSHOT_PREFIX}/{key}", Body=data)
+        return
+    path = os.path.join(settings.VECTOR_SNAPSHOT_DIR, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def _read(key):
+    if settings.VECTOR_SNAPSHOT_STORAGE == "s3":
+        from app.utils.s3 import S3_BUCKET_NAME, s3_client
+
+        response = s3_client().get_object(Bucket=S3_BUCKET_NAME, Key=f"{settings.VECTOR_SNAPSHOT_PREFIX}/{key}")
+        return response["Body"].read()
+    with open(os.path.join(settings.VECTOR_SNAPSHOT_DIR, key), "rb") as f:
+        return f.read()
+
+
+def _vector(obj):
+    # Weaviate returns named vectors; collections here only have the default one.
+    return obj.vector["default"] if isinstance(obj.vector, dict) else obj.vector
+
+
+def _expected_vector_ids(file_instance):
+    return [str(vector_id) for vector_id in file_instance.chunks.order_by("ordinal").values_list("vector_id", flat=True)]
+
+
+def export_collection(snapshot, file_instance):
+    """
+    Write a file's collection to the snapshot, after checking it against the file's Chunk rows.
+
+    Args:
+        snapshot (str): Snapshot name.
+        file_instance (File): A processed file; its collection is File.vector_key.
+
+    Returns:
+        dict: The manifest entry of the collection.
+
+    Raises:
+        SnapshotError: If the collection and the Chunk rows disagree.
+    """
+    expected = _expected_vector_ids(file_instance)
+    objects = sorted(iter_collection(file_instance.vector_key), key=lambda obj: obj.properties["index"])
+    if len(objects) != len(expected):
+        raise SnapshotError(
+            f"{file_instance.vector_key}: {len(objects)} vectors in the store, {len(expected)} chunks in the database."
+        )
+    for position, obj in enumerate(objects):
+        if obj.properties["index"] != position or str(obj.uuid) != expected[position]:
+            raise SnapshotError(f"{file_instance.vector_key}: chunk {position} does not match its Chunk row.")
+
+    vectors = np.asarray([_vector(obj) for obj in objects], dtype=np.float32).reshape(len(objects), -1)
+    buffer = io.BytesIO()
+    np.save(buffer, vectors, allow_pickle=False)
+    vectors_data = buffer.getvalue()
+    lines = [
+        json.dumps({
+            "uuid": str(obj.uuid),
+            "index": obj.properties["index"],
+            "text": obj.properties["text"],
+            **{name: obj.properties.get(name) for name in CITATION_PROPERTIES},
+        })
+        for obj in objects
+    ]
+    chunks_data = gzip.compress(("\n".join(lines) + "\n").encode("utf-8") if lines else b"")
+
+    prefix = f"{snapshot}/{file_instance.vector_key}/"
+    _write(prefix + "vectors.npy", vectors_data)
+    _write(prefix + "chunks.jsonl.gz", chunks_data)
+    return {
+        "vector_key": file_instance.vector_key,
+        "file_id": str(file_instance.id),
+        "embedding_model": file_instance.embedding_model,
+        "count": len(objects),
+        "dimensions": vectors.shape[1],
+        "vectors_sha256": hashlib.sha256(vectors_data).hexdigest(),
+        "chunks_sha256": hashlib.sha256(chunks_data).hexdigest(),
+    }
+
+
+def import_collection(snapshot, entry):
+    """
+    Load one collection of the snapshot back into the vector store, replacing it if it exists.
+
+    Args:
+        snapshot (str): Snapshot name.
+        entry (dict): The collection's manifest entry.
+
+    Returns:
+        int: Objects stored.
+
+    Raises:
+        SnapshotError: If no File uses the collection, the File's embedding
+            model or Chunk rows differ from the snapshot, or a snapshot file
+            is corrupt.
+    """
+    vector_key = entry["vector_key"]
+    file_instance = (
+        File.objects.filter(id=entry["file_id"]).first()
+        or File.objects.filter(content_hash=vector_key, processed=True).order_by("id").first()
+    )
+    if file_instance is None or file_instance.vector_key != vector_key:
+        raise SnapshotError(f"{vector_key}: no File uses this collection.")
+    if (file_instance.embedding_model or "") != (entry["embedding_model"] or ""):
+        raise SnapshotError(
+            f"{vector_key}: snapshot is from {entry['embedding_model']!r}, the File uses {file_instance.embedding_model!r}."
+        )
+
+    prefix = f"{snapshot}/{vector_key}/"
+    vectors_data = _read(prefix + "vectors.npy")
+    chunks_data = _read(prefix + "chunks.jsonl.gz")
+    if (hashlib.sha256(vectors_data).hexdigest() != entry["vectors_sha256"]
+            or hashlib.sha256(chunks_data).hexdigest() != entry["chunks_sha256"]):
+        raise SnapshotError(f"{vector_key}: snapshot files do not match their checksums.")
+    vectors = np.load(io.BytesIO(vectors_data), allow_pickle=False)
+    records = [json.loads(line) for line in gzip.decompress(chunks_data).decode("utf-8").splitlines() if line]
+    if len(records) != entry["count"] or vectors.shape != (entry["count"], entry["dimensions"]):
+        raise SnapshotError(f"{vector_key}: snapshot holds {len(records)} chunks, the manifest {entry['count']}.")
+    if [record["uuid"] for record in records] != _expected_vector_ids(file_instance):
+        raise SnapshotError(f"{vector_key}: snapshot chunks do not match the File's Chunk rows.")
+
+    response = store_embeddings(
+        vector_key,
+        [record["text"] for record in records],
+        vectors.tolist(),
+        locations=records,
+        uuids=[record["uuid"] for record in records],
+    )
+    if response.has_errors or len(response.uuids) != len(records):
+        raise SnapshotError(f"{vector_key}: stored {len(response.uuids)} of {len(records)} objects.")
+    return len(records)
+
+
+def write_manifest(snapshot, entries):
+    """
+    Write the snapshot's manifest; do it last, so only complete snapshots have one.
+    """
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "collections": sorted(entries, key=lambda entry: entry["vector_key"]),
+    }
+    _write(f"{snapshot}/{MANIFEST_NAME}", json.dumps(manifest, indent=1).encode("utf-8"))
+
+
+def read_manifest(snapshot):
+    """
+    Read a snapshot's manifest.
+
+    Raises:
+        SnapshotError: If the snapshot has no manifest or a newer format.
+    """
+    try:
+        manifest = json.loads(_read(f"{snapshot}/{MANIFEST_NAME}"))
+    except Exception as exc:
+        raise SnapshotError(f"Snapshot {snapshot!r} has no readable manifest: {exc}")
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot {snapshot!r} has format version {manifest.get('version')}.")
+    return manifest
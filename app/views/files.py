@@ -1,44 +1,111 @@
 from django.shortcuts import get_object_or_404
+from rest_framework import exceptions
 from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from celery.result import AsyncResult
 
 
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
 from app.models.files import File
-from app.serializers.files import FileSerializer
-from app.tasks.generate_embeddings import process_file_for_embeddings
+from app.serializers.files import FileListSerializer, FileSerializer
+from app.tasks.cleanup import schedule_cleanup
+from app.tasks.generate_embeddings import enqueue_ingest, link_duplicate_content
 from django.http import JsonResponse
 
+def start_ingest(file_instance):
+    """
+    Link a new File to already processed content, or queue its ingest.
+
+    Returns:
+        JsonResponse: 201 with deduplicated=True, or 202 with the task ID to poll.
+    """
+    # Content that was already processed is linked without a task.
+    if link_duplicate_content(file_instance):
+        return JsonResponse({"task_id": None, "file_id": str(file_instance.id), "deduplicated": True}, status=201)
+
+    # Trigger the Celery task to generate embeddings
+    result = enqueue_ingest(file_instance)
+
+    return JsonResponse({"task_id": result.id, "file_id": str(file_instance.id)}, status=202)
+
+
+class FileCursorPagination(CursorPagination):
+    """
+    Cursor pagination over uploaded_at, so deep pages cost the same as the first.
+    """
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-uploaded_at"
+
+
 class FileViewSet(viewsets.ModelViewSet):
     """
     ViewSet for handling file uploads and metadata management.
     On create and update, triggers a Celery task to process file embeddings.
+
+    The list is cursor-paginated and can be filtered with ``processed``,
+    ``file_type``, ``tenant``, ``ingest_stage``, ``uploaded_after`` and
+    ``uploaded_before``, and ordered with ``ordering=uploaded_at`` or
+    ``-uploaded_at``.
     """
     queryset = File.objects.all()
     serializer_class = FileSerializer
+    pagination_class = FileCursorPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ["uploaded_at"]
+    ordering = "-uploaded_at"
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return FileListSerializer
+        return FileSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+        # Sample questions are only shown on detail views. Chunk rows are never loaded
+        # here, since FileListSerializer has no weaviate_ids.
+        queryset = queryset.defer("sample_questions")
+        params = self.request.query_params
+        if "processed" in params:
+            queryset = queryset.filter(processed=params["processed"].lower() in ("1", "true", "yes"))
+        for field in ("file_type", "tenant", "ingest_stage"):
+            if field in params:
+                queryset = queryset.filter(**{field: params[field]})
+        for param, lookup in (("uploaded_after", "uploaded_at__gte"), ("uploaded_before", "uploaded_at__lt")):
+            if param in params:
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise exceptions.ValidationError({param: "Expected an ISO 8601 datetime."})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
 
     def create(self, request, *args, **kwargs):
         # Validate and save the new file instance
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        file_instance = serializer.save()
-        
-        # Trigger the Celery task to generate embeddings
-        result = process_file_for_embeddings.apply_async(
-            args=[file_instance.id],
-            queue="embeddings",
-            )
-        
-        return JsonResponse({"task_id": result.id}, status=202)
+        file_instance = serializer.save(tenant=request.headers.get("X-Tenant-ID", ""))
+
+        return start_ingest(file_instance)
 
     def update(self, request, *args, **kwargs):
         # Get the existing file instance
         file_instance = get_object_or_404(File, pk=kwargs.get("pk"))
         
-        # Store the old URL for comparison
+        # Store the old URL for comparison, and the old artifacts for cleanup.
+        # They are captured before the serializer changes content_hash: a
+        # legacy File (no hash) keeps its vectors under its own id.
         old_url = file_instance.url
+        old_artifacts = File(id=file_instance.id, url=file_instance.url, content_hash=file_instance.content_hash)
         
         # Validate and update the file instance
         serializer = self.get_serializer(file_instance, data=request.data, partial=True)
@@ -47,15 +114,25 @@ class FileViewSet(viewsets.ModelViewSet):
 
         # Check if the URL has changed
         if old_url != updated_instance.url:
-            # Set processed = False before triggering the embedding process
-            updated_instance.processed = False
-            updated_instance.save(update_fields=["processed"])
+            with transaction.atomic():
+                # Set processed = False before triggering the embedding process
+                updated_instance.processed = False
+                updated_instance.ingest_stage = "queued"
+                updated_instance.ingest_error = ""
+                updated_instance.page_count = None
+                updated_instance.save(update_fields=["processed", "ingest_stage", "ingest_error", "page_count"])
+                # Checkpoints belong to the old document and must not be resumed.
+                updated_instance.chunk_checkpoints.all().delete()
+                # The old object and vectors are dropped unless another File still
+                # uses them. Cleanup runs on commit, once this File is unprocessed
+                # and so no longer holds its legacy collection.
+                schedule_cleanup([old_artifacts])
             
+            if link_duplicate_content(updated_instance):
+                return JsonResponse({"task_id": None, "file_id": str(updated_instance.id), "deduplicated": True}, status=200)
+
             # Re-trigger the Celery task to process embeddings
-            result = process_file_for_embeddings.apply_async(
-                args=[updated_instance.id],
-                queue="embeddings",
-            )
+            result = enqueue_ingest(updated_instance)
             return JsonResponse({
                 "task_id": result.id,
                 "message": "Embeddings reprocessing triggered. Processed flag set to False."
@@ -66,11 +143,55 @@ class FileViewSet(viewsets.ModelViewSet):
 
 
     def destroy(self, request, *args, **kwargs):
-        # Perform any custom cleanup if needed.
+        # The vector collection, S3 object and cached parse are deleted asynchronously.
         instance = self.get_object()
-        self.perform_destroy(instance)
+        with transaction.atomic():
+            schedule_cleanup([instance])
+            self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """
+        Delete many files at once; their artifacts are cleaned up by one task.
+        """
+        ids = request.data.get("ids")
+        if not isinstance(ids, list) or not ids:
+            return JsonResponse({"error": "ids must be a non-empty list."}, status=400)
+        try:
+            files = list(File.objects.filter(id__in=ids))
+        except ValidationError:
+            return JsonResponse({"error": "ids must be file UUIDs."}, status=400)
+        with transaction.atomic():
+            schedule_cleanup(files)
+            File.objects.filter(id__in=[file_instance.id for file_instance in files]).delete()
+        return JsonResponse({"deleted": len(files)})
+
+    @action(detail=True, methods=["get"])
+    def progress(self, request, pk=None):
+        """
+        Report the fine-grained ingest progress of a file.
+        """
+        file_instance = self.get_object()
+        total = file_instance.chunks_total
+        # Embedding dominates ingest time, so it drives the percentage until storing is done.
+        if file_instance.ingest_stage == "done":
+            percent = 100
+        elif total:
+            percent = int(99 * file_instance.chunks_embedded / total)
+        else:
+            percent = 0
+        return JsonResponse({
+            "file_id": str(file_instance.id),
+            "processed": file_instance.processed,
+            "stage": file_instance.ingest_stage,
+            "chunks_total": total,
+            "chunks_embedded": file_instance.chunks_embedded,
+            "chunks_stored": file_instance.chunks_stored,
+            "percent": percent,
+            "error": file_instance.ingest_error or None,
+        })
+
     @action(detail=False, methods=["get"], url_path="task-status/(?P<task_id>[^/.]+)")
     def task_status(self, request, task_id=None):
         """
@@ -0,0 +1,13 @@
+from django.http import HttpResponse
+
+from app.utils.metrics import register_collector, render_prometheus
+from app.utils.scheduling import queue_depth_samples
+
+register_collector(queue_depth_samples)
+
+
+def metrics_view(request):
+    """
+    Expose ingest and query stage metrics in the Prometheus text format.
+    """
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
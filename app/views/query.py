@@ -42,7 +42,13 @@ def generate_response_view(request):
         return JsonResponse({"error": "Both 'query' and 'file_id' are required."}, status=400)
 
     from app.tasks.query import generate_response  # Import here to avoid circular imports.
-    task_result = generate_response.apply_async(args=[query, file_id], queue="queries")
+    from app.utils.scheduling import QUERY_PRIORITY, QUERY_TASK_CLASS
+    task_result = generate_response.apply_async(
+        args=[query, file_id],
+        queue="queries",
+        priority=QUERY_PRIORITY,
+        headers={"task_class": QUERY_TASK_CLASS},
+    )
     return JsonResponse({"task_id": task_result.id}, status=202)
 
 
@@ -64,7 +70,24 @@ def generate_response_view(request):
             type=openapi.TYPE_OBJECT,
             properties={
                 "status": openapi.Schema(type=openapi.TYPE_STRING, description="Task status"),
-                "result": openapi.Schema(type=openapi.TYPE_STRING, description="Task result (if available)")
+                "result": openapi.Schema(type=openapi.TYPE_STRING, description="HTML answer (if available)"),
+                "citations": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    description="Source of each chunk used to answer (if available)",
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "file_id": openapi.Schema(type=openapi.TYPE_STRING),
+                            "file_name": openapi.Schema(type=openapi.TYPE_STRING),
+                            "chunk": openapi.Schema(type=openapi.TYPE_INTEGER, description="Chunk position in the document"),
+                            "page": openapi.Schema(type=openapi.TYPE_INTEGER, description="1-based page (paragraph or section for non-PDF files)"),
+                            "start": openapi.Schema(type=openapi.TYPE_INTEGER, description="Start character offset within the page"),
+                            "end": openapi.Schema(type=openapi.TYPE_INTEGER, description="End character offset within the page"),
+                            "distance": openapi.Schema(type=openapi.TYPE_NUMBER),
+                            "snippet": openapi.Schema(type=openapi.TYPE_STRING),
+                        },
+                    ),
+                ),
             }
         )
     }
@@ -82,6 +105,10 @@ def poll_query_status_view(request):
     if not result.ready():
         return JsonResponse({"status": result.status, "result": None})
     elif result.status == "SUCCESS":
-        return JsonResponse({"status": result.status, "result": result.result})
+        # ``result`` stays the answer string clients already read; citations sit beside it.
+        answer = result.result
+        if isinstance(answer, dict):
+            return JsonResponse({"status": result.status, "result": answer["answer"], "citations": answer["citations"]})
+        return JsonResponse({"status": result.status, "result": answer, "citations": []})
     else:
         return JsonResponse({"status": result.status, "result": None})
@@ -1,13 +1,40 @@
 # app/views/s3_upload.py
 
+import base64
+import math
+import os
+import re
 import uuid
+from botocore.exceptions import ClientError
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from django.conf import settings
+from django.core import signing
 from django.http import HttpRequest
 
-from app.utils.s3 import upload_file_to_s3
+from app.models.files import File
+from app.serializers.files import FileSerializer
+from app.utils.s3 import (
+    HashingReader,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    delete_file_from_s3,
+    generate_presigned_put,
+    head_object,
+    modify_file_name,
+    object_url,
+    upload_file_to_s3,
+)
+from app.utils.upload_tokens import make_upload_session, make_upload_token, read_upload_session
+from app.views.files import start_ingest
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+# S3 limits for multipart uploads.
+MAX_PARTS = 10000
+MIN_PART_SIZE = 5 * 1024 * 1024
 
 @swagger_auto_schema(
     method="post",
@@ -31,6 +58,18 @@ from app.utils.s3 import upload_file_to_s3
                     type=openapi.TYPE_STRING, 
                     description="The S3 URL of the uploaded file"
                 ),
+                "size": openapi.Schema(
+                    type=openapi.TYPE_INTEGER,
+                    description="Size of the file in bytes, to pass as size_bytes when creating the File"
+                ),
+                "content_hash": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="SHA-256 of the file content"
+                ),
+                "upload_token": openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description="Pass as upload_token when creating the File so known content is not re-processed"
+                ),
             },
         ),
         400: "No file was provided or invalid request."
@@ -41,6 +80,9 @@ def upload_file_view(request: HttpRequest):
     """
     Upload a file to S3 using the provided 'file' form field.
     Returns the S3 URL if successful.
+
+    The upload passes through this server; prefer the direct upload
+    endpoints (create_upload_view) for anything but small files.
     """
     # Check if file is provided
     file_obj = request.FILES.get("file")
@@ -50,10 +92,229 @@ def upload_file_view(request: HttpRequest):
     # Generate a unique file name (e.g., <UUID>-<original_name>)
     unique_name = f"{uuid.uuid4()}-{file_obj.name}"
 
-    # Use your S3 utility function
-    s3_url = upload_file_to_s3(file_obj, unique_name)
+    # Use your S3 utility function, hashing the content as it streams.
+    reader = HashingReader(file_obj)
+    s3_url = upload_file_to_s3(reader, unique_name)
 
     if s3_url is None:
         return Response({"error": "Failed to upload file to S3."}, status=500)
 
-    return Response({"url": s3_url}, status=200)
+    content_hash = reader.hexdigest()
+    return Response({
+        "url": s3_url,
+        "size": reader.size,
+        "content_hash": content_hash,
+        "upload_token": make_upload_token(s3_url, content_hash, reader.size),
+    }, status=200)
+
+
+@swagger_auto_schema(
+    method="post",
+    tags=["upload"],
+    operation_description=(
+        "Start a direct browser-to-S3 upload. Small files get one presigned PUT URL; "
+        "files above the multipart threshold get a presigned URL per part. "
+        "Call upload-complete with the returned session afterwards."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=["filename", "size"],
+        properties={
+            "filename": openapi.Schema(type=openapi.TYPE_STRING, description="Original file name"),
+            "size": openapi.Schema(type=openapi.TYPE_INTEGER, description="File size in bytes"),
+            "content_type": openapi.Schema(type=openapi.TYPE_STRING, description="MIME type of the file"),
+            "sha256": openapi.Schema(
+                type=openapi.TYPE_STRING,
+                description="Hex SHA-256 of the file. Single-PUT uploads are then verified by S3 and deduplicated.",
+            ),
+        },
+    ),
+    responses={
+        200: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "session": openapi.Schema(type=openapi.TYPE_STRING, description="Pass to upload-complete"),
+                "key": openapi.Schema(type=openapi.TYPE_STRING, description="S3 object key"),
+                "method": openapi.Schema(type=openapi.TYPE_STRING, description="'put' or 'multipart'"),
+                "url": openapi.Schema(type=openapi.TYPE_STRING, description="Presigned PUT URL (method 'put')"),
+                "headers": openapi.Schema(type=openapi.TYPE_OBJECT, description="Headers to send with the PUT"),
+                "part_size": openapi.Schema(type=openapi.TYPE_INTEGER, description="Bytes per part (method 'multipart')"),
+                "parts": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                    description="Presigned {part_number, url} per part; keep each response's ETag",
+                ),
+            },
+        ),
+        400: "Invalid request.",
+    },
+)
+@api_view(["POST"])
+def create_upload_view(request: HttpRequest):
+    """
+    Issue presigned URLs so the client uploads straight to S3.
+    """
+    filename = request.data.get("filename")
+    try:
+        size = int(request.data.get("size"))
+    except (TypeError, ValueError):
+        return Response({"error": "size must be an integer."}, status=400)
+    if not filename:
+        return Response({"error": "No filename was provided."}, status=400)
+    if size <= 0 or size > settings.DIRECT_UPLOAD_MAX_BYTES:
+        return Response({"error": f"size must be between 1 and {settings.DIRECT_UPLOAD_MAX_BYTES} bytes."}, status=400)
+    sha256 = (request.data.get("sha256") or "").lower() or None
+    if sha256 and not SHA256_RE.match(sha256):
+        return Response({"error": "sha256 must be a hex SHA-256 digest."}, status=400)
+    content_type = request.data.get("content_type") or "application/octet-stream"
+
+    # Same naming as upload_file_view: <UUID>-<original_name>
+    key = modify_file_name(f"{uuid.uuid4()}-{os.path.basename(filename)}")
+    expires_in = settings.DIRECT_UPLOAD_URL_EXPIRES
+
+    try:
+        if size <= settings.DIRECT_UPLOAD_MULTIPART_THRESHOLD:
+            sha256_b64 = base64.b64encode(bytes.fromhex(sha256)).decode() if sha256 else None
+            upload = generate_presigned_put(key, content_type, size, sha256_b64, expires_in)
+            session = make_upload_session(key, filename, size, sha256=sha256)
+            return Response({"session": session, "key": key, "method": "put", **upload}, status=200)
+
+        part_size = max(settings.DIRECT_UPLOAD_PART_SIZE, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+        upload_id, parts = create_multipart_upload(key, content_type, math.ceil(size / part_size), expires_in)
+    except ClientError:
+        return Response({"error": "Failed to start the upload."}, status=500)
+    # A multipart object has no whole-file SHA-256, so ingest hashes it after download.
+    session = make_upload_session(key, filename, size, upload_id=upload_id)
+    return Response({
+        "session": session,
+        "key": key,
+        "method": "multipart",
+        "part_size": part_size,
+        "parts": parts,
+    }, status=200)
+
+
+@swagger_auto_schema(
+    method="post",
+    tags=["upload"],
+    operation_description=(
+        "Finish a direct upload: complete the multipart upload if there is one, "
+        "create the File and start ingesting it."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=["session"],
+        properties={
+            "session": openapi.Schema(type=openapi.TYPE_STRING, description="Session from upload-start"),
+            "parts": openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_OBJECT),
+                description="{part_number, etag} per uploaded part (multipart only)",
+            ),
+            "name": openapi.Schema(type=openapi.TYPE_STRING, description="File name; defaults to the uploaded file name"),
+            "file_type": openapi.Schema(type=openapi.TYPE_STRING, description="pdf, docx, json or txt; defaults to the extension"),
+        },
+    ),
+    responses={
+        200: "The upload was completed before; returns the File created then.",
+        201: "The content was already processed; the File reuses its vectors.",
+        202: "The File was created and its ingest was queued.",
+        400: "Invalid or expired session, or the object is missing or not the announced size.",
+    },
+)
+@api_view(["POST"])
+def complete_upload_view(request: HttpRequest):
+    """
+    Create the File for a finished direct upload and trigger its ingest.
+
+    Completing the same upload again returns the File created the first
+    time. A rejected upload's object is deleted, so nothing is left in the
+    bucket that no File references.
+    """
+    try:
+        upload = read_upload_session(request.data.get("session") or "", settings.DIRECT_UPLOAD_SESSION_MAX_AGE)
+    except signing.BadSignature:
+        return Response({"error": "Invalid or expired upload session."}, status=400)
+    key = upload["key"]
+    url = object_url(key)
+
+    existing = File.objects.filter(url=url).order_by("uploaded_at").first()
+    if existing is not None:
+        return Response({"task_id": None, "file_id": str(existing.id)}, status=200)
+
+    try:
+        head = head_object(key)
+        # An existing object means an earlier attempt already completed the multipart upload.
+        if head is None and upload["upload_id"]:
+            parts = request.data.get("parts") or []
+            if not parts:
+                return Response({"error": "parts are required for a multipart upload."}, status=400)
+            complete_multipart_upload(key, upload["upload_id"], parts)
+            head = head_object(key)
+    except ClientError:
+        if upload["upload_id"]:
+            _abort_quietly(key, upload["upload_id"])
+        return Response({"error": "Failed to complete the upload."}, status=400)
+    if head is None:
+        return Response({"error": "The file has not been uploaded."}, status=400)
+
+    size = head["ContentLength"]
+    if size != upload["size"]:
+        delete_file_from_s3(key)
+        return Response({"error": f"The uploaded file has {size} bytes, not {upload['size']}."}, status=400)
+    # Only trust the hash if S3 verified it against the body.
+    content_hash = ""
+    if upload["sha256"] and head.get("ChecksumSHA256") == base64.b64encode(bytes.fromhex(upload["sha256"])).decode():
+        content_hash = upload["sha256"]
+
+    serializer = FileSerializer(data={
+        "name": request.data.get("name") or upload["filename"],
+        "url": url,
+        "file_type": request.data.get("file_type") or os.path.splitext(upload["filename"])[1].lstrip(".").lower(),
+        "size_bytes": size,
+        "upload_token": make_upload_token(url, content_hash, size),
+    })
+    if not serializer.is_valid():
+        delete_file_from_s3(key)
+        return Response(serializer.errors, status=400)
+    file_instance = serializer.save(tenant=request.headers.get("X-Tenant-ID", ""))
+    return start_ingest(file_instance)
+
+
+def _abort_quietly(key, upload_id):
+    # The upload may be gone already (e.g. completed or aborted before).
+    try:
+        abort_multipart_upload(key, upload_id)
+    except ClientError:
+        pass
+
+
+@swagger_auto_schema(
+    method="post",
+    tags=["upload"],
+    operation_description="Abort an unfinished multipart upload and free its parts.",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=["session"],
+        properties={
+            "session": openapi.Schema(type=openapi.TYPE_STRING, description="Session from upload-start"),
+        },
+    ),
+    responses={204: "Aborted.", 400: "Invalid session or not a multipart upload."},
+)
+@api_view(["POST"])
+def abort_upload_view(request: HttpRequest):
+    """
+    Abort a multipart upload started by create_upload_view.
+    """
+    try:
+        upload = read_upload_session(request.data.get("session") or "", settings.DIRECT_UPLOAD_SESSION_MAX_AGE)
+    except signing.BadSignature:
+        return Response({"error": "Invalid or expired upload session."}, status=400)
+    if not upload["upload_id"]:
+        return Response({"error": "Not a multipart upload."}, status=400)
+    try:
+        abort_multipart_upload(upload["key"], upload["upload_id"])
+    except ClientError:
+        return Response({"error": "Failed to abort the upload."}, status=500)
+    return Response(status=204)
@@ -1,12 +1,95 @@
 # config/celery.py
 import os
+import time
+from datetime import datetime
+
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, worker_process_shutdown, worker_ready, worker_shutdown
+
+from app.utils.result_serializer import register_result_serializer
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-app = Celery('config', include=['app.tasks.query'])
+try:
+    from gevent import monkey
+except ImportError:  # gevent is optional; only the queries worker may use it.
+    monkey = None
+if monkey is not None and monkey.is_module_patched("socket"):
+    # Celery's gevent pool has patched the stdlib; gRPC (Weaviate) needs its own hook.
+    import grpc.experimental.gevent
+    grpc.experimental.gevent.init_gevent()
+
+# Results are stored with the compact serializer (CELERY_RESULT_SERIALIZER).
+register_result_serializer()
+
+app = Celery('config', include=['app.tasks.query', 'app.tasks.generate_embeddings', 'app.tasks.cleanup'])
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
 
+
+@worker_ready.connect
+def start_worker_metrics_server(**kwargs):
+    """
+    Serve Prometheus metrics from the worker's main process when CELERY_METRICS_PORT is set.
+    """
+    port = os.getenv("CELERY_METRICS_PORT")
+    if port:
+        from app.utils.metrics import register_collector, start_metrics_server
+        from app.utils.scheduling import queue_depth_samples
+        register_collector(queue_depth_samples)
+        start_metrics_server(int(port))
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def close_shared_clients(**kwargs):
+    """
+    Close the process's shared API clients (app.utils.clients) on the way out.
+    """
+    from app.utils.clients import close_all
+    close_all()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def fold_process_metrics(**kwargs):
+    """
+    Fold the process's metrics into METRICS_DIR/merged.json so its file does not outlive it.
+
+    Prefork children leave with os._exit, so atexit handlers do not run there.
+    """
+    from app.utils.metrics import shutdown
+    shutdown()
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    """
+    Record when a task was published so workers can measure its queue wait.
+    """
+    headers.setdefault("enqueued_at", time.time())
+
+
+@task_prerun.connect
+def record_queue_wait(task=None, **kwargs):
+    """
+    Observe how long the task waited in the broker, per queue and task class.
+    """
+    request = task.request
+    enqueued_at = getattr(request, "enqueued_at", None)
+    if enqueued_at is None or request.called_directly or request.is_eager:
+        return
+    # Retries are republished with a countdown; that delay is not queueing.
+    if request.eta:
+        eta = datetime.fromisoformat(request.eta) if isinstance(request.eta, str) else request.eta
+        enqueued_at = max(enqueued_at, eta.timestamp())
+    from app.utils.metrics import observe
+    observe(
+        "ragmatic_queue_wait_seconds",
+        max(0.0, time.time() - enqueued_at),
+        queue=(request.delivery_info or {}).get("routing_key", ""),
+        task_class=getattr(request, "task_class", None) or "default",
+    )
+
 # import app.tasks.generate_embeddings
 # import app.tasks.query
\ No newline at end of file
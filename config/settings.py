@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from kombu import Queue
 
 load_dotenv()
 
@@ -152,3 +153,153 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 # Optionally, if you want to store task results in the database:
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
+# Task results are small status summaries; bulky output (chunks, vector IDs)
+# lives in the database and is looked up by file ID. They are stored with
+# the compact "zjson" serializer (app.utils.result_serializer), which
+# zlib-compresses large results such as query answers, and deleted after
+# CELERY_RESULT_EXPIRES seconds by celery beat's daily backend cleanup.
+CELERY_RESULT_SERIALIZER = os.getenv("CELERY_RESULT_SERIALIZER", "zjson")
+CELERY_RESULT_ACCEPT_CONTENT = ["zjson", "json"]
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", 24 * 3600))
+
+# Both queues are priority queues: small uploads and light tenants overtake
+# bulk uploads (see app.utils.scheduling). RabbitMQ cannot change the
+# arguments of an existing queue, so the old queues must be deleted once
+# before workers with this configuration start.
+CELERY_TASK_QUEUE_MAX_PRIORITY = 10
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_QUEUES = (
+    Queue("embeddings", routing_key="embeddings", queue_arguments={"x-max-priority": CELERY_TASK_QUEUE_MAX_PRIORITY}),
+    Queue("queries", routing_key="queries", queue_arguments={"x-max-priority": CELERY_TASK_QUEUE_MAX_PRIORITY}),
+)
+# Priorities only take effect on messages the worker has not prefetched yet.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Replace a worker process after its current task once its RSS exceeds this
+# many KB, so memory leaked by parsing and OCR libraries is given back.
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = int(os.getenv("CELERY_WORKER_MAX_MEMORY_PER_CHILD", 1024 * 1024))
+CELERY_WORKER_MAX_TASKS_PER_CHILD = int(os.getenv("CELERY_WORKER_MAX_TASKS_PER_CHILD", 0)) or None
+
+# Ingest pipeline
+# Embedding model as "<backend>/<model>" (app.utils.embedding_backends):
+# "openai/<model>", or a local CPU model "onnx/<name>" read from
+# EMBEDDING_MODELS_DIR/<name>/ (tokenizer.json and EMBEDDING_ONNX_FILE).
+# Local models run EMBEDDING_LOCAL_BATCH_SIZE texts per inference on
+# EMBEDDING_THREADS threads per process, truncated to EMBEDDING_MAX_SEQ_LENGTH
+# tokens; they refuse to load if CHUNK_MAX_TOKENS is larger.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "openai/text-embedding-3-small")
+EMBEDDING_MODELS_DIR = os.getenv("EMBEDDING_MODELS_DIR", str(BASE_DIR / "models"))
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "model_quantized.onnx")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 1))
+EMBEDDING_LOCAL_BATCH_SIZE = int(os.getenv("EMBEDDING_LOCAL_BATCH_SIZE", 32))
+EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", 256))
+# Chunks embedded per backend call; progress is checkpointed after each batch.
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+# Retries of process_file_for_embeddings before the file is marked as failed.
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", 3))
+# A file whose content another File is already ingesting is re-queued every
+# INGEST_DUPLICATE_POLL_SECONDS to reuse its vectors, and marked as failed
+# after INGEST_DUPLICATE_MAX_WAIT seconds instead of ingesting it twice.
+INGEST_DUPLICATE_POLL_SECONDS = int(os.getenv("INGEST_DUPLICATE_POLL_SECONDS", 60))
+INGEST_DUPLICATE_MAX_WAIT = int(os.getenv("INGEST_DUPLICATE_MAX_WAIT", 3600))
+# PDFs with more pages than this are split into page-range sub-tasks that run
+# in parallel across the embeddings workers.
+INGEST_FANOUT_PAGE_THRESHOLD = int(os.getenv("INGEST_FANOUT_PAGE_THRESHOLD", 100))
+INGEST_FANOUT_PAGES_PER_TASK = int(os.getenv("INGEST_FANOUT_PAGES_PER_TASK", 25))
+# Size hints (bytes) separating the small, medium and large ingest classes.
+INGEST_SMALL_FILE_BYTES = int(os.getenv("INGEST_SMALL_FILE_BYTES", 1024 * 1024))
+INGEST_LARGE_FILE_BYTES = int(os.getenv("INGEST_LARGE_FILE_BYTES", 20 * 1024 * 1024))
+# Ingest priority drops by one for every this many files a tenant has waiting.
+INGEST_TENANT_BACKLOG_STEP = int(os.getenv("INGEST_TENANT_BACKLOG_STEP", 10))
+# Maximum tokens per chunk. Changing it only needs `manage.py rechunk`, which
+# starts from the cached parse artifacts instead of re-parsing.
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 800))
+
+# Query context (app.utils.context). Each retrieved chunk is expanded with up
+# to QUERY_NEIGHBOR_CHUNKS chunks before and after it (0 disables this), and
+# the merged passages are trimmed to QUERY_CONTEXT_MAX_TOKENS.
+QUERY_NEIGHBOR_CHUNKS = int(os.getenv("QUERY_NEIGHBOR_CHUNKS", 1))
+QUERY_CONTEXT_MAX_TOKENS = int(os.getenv("QUERY_CONTEXT_MAX_TOKENS", 4000))
+
+# Boilerplate stripped before chunking (app.utils.boilerplate). A line among
+# the first or last BOILERPLATE_EDGE_LINES non-blank lines of a page is a
+# running header or footer when, with digits ignored, it appears there on at
+# least BOILERPLATE_PAGE_FRACTION of a document's pages (and
+# BOILERPLATE_MIN_PAGES pages). A block of at least
+# BOILERPLATE_MIN_BLOCK_WORDS words is boilerplate when near-duplicates of it
+# were seen in BOILERPLATE_MIN_FILES other files of the same tenant.
+BOILERPLATE_STRIP = os.getenv("BOILERPLATE_STRIP", "true").lower() == "true"
+BOILERPLATE_EDGE_LINES = int(os.getenv("BOILERPLATE_EDGE_LINES", 3))
+BOILERPLATE_MIN_PAGES = int(os.getenv("BOILERPLATE_MIN_PAGES", 3))
+BOILERPLATE_PAGE_FRACTION = float(os.getenv("BOILERPLATE_PAGE_FRACTION", 0.5))
+BOILERPLATE_MIN_FILES = int(os.getenv("BOILERPLATE_MIN_FILES", 3))
+BOILERPLATE_MIN_BLOCK_WORDS = int(os.getenv("BOILERPLATE_MIN_BLOCK_WORDS", 8))
+
+# Parsers run in a supervised child process (app.utils.parse_supervisor). A
+# PDF page that takes longer than PARSE_PAGE_TIMEOUT seconds, or pushes the
+# child's process tree past PARSE_MAX_RSS_MB, is skipped and parsing resumes
+# in a fresh child; after PARSE_DOCUMENT_TIMEOUT the pages parsed so far are
+# returned.
+PARSE_IN_SUBPROCESS = os.getenv("PARSE_IN_SUBPROCESS", "true").lower() == "true"
+PARSE_PAGE_TIMEOUT = float(os.getenv("PARSE_PAGE_TIMEOUT", 120))
+PARSE_DOCUMENT_TIMEOUT = float(os.getenv("PARSE_DOCUMENT_TIMEOUT", 1800))
+PARSE_MAX_RSS_MB = int(os.getenv("PARSE_MAX_RSS_MB", 2048))
+# OCR runs in one long-lived child per worker thread, which keeps its
+# Tesseract handle between documents; it is replaced after this many.
+OCR_CHILD_MAX_REQUESTS = int(os.getenv("OCR_CHILD_MAX_REQUESTS", 50))
+
+# Streaming TXT, JSON and DOCX parsing. TXT files are read through mmap in
+# windows of at most TXT_WINDOW_BYTES, cut at paragraph breaks; JSON files are
+# parsed incrementally into subtrees of at most JSON_RECORD_MAX_CHARS
+# serialized characters; DOCX files are split into heading sections of at most
+# DOCX_SECTION_MAX_CHARS. All default to roughly one chunk of text.
+TXT_WINDOW_BYTES = int(os.getenv("TXT_WINDOW_BYTES", CHUNK_MAX_TOKENS * 4))
+JSON_RECORD_MAX_CHARS = int(os.getenv("JSON_RECORD_MAX_CHARS", CHUNK_MAX_TOKENS * 3))
+DOCX_SECTION_MAX_CHARS = int(os.getenv("DOCX_SECTION_MAX_CHARS", CHUNK_MAX_TOKENS * 4))
+JSON_READ_BLOCK_CHARS = int(os.getenv("JSON_READ_BLOCK_CHARS", 1024 * 1024))
+
+# OCR of scanned PDF pages (app.utils.ocr). Each page is first rendered at
+# OCR_PROBE_DPI to measure its text line height, then at the DPI that makes
+# lines about OCR_TARGET_LINE_PX high, within [OCR_MIN_DPI, OCR_MAX_DPI] and
+# under OCR_MAX_PIXELS. OCR_DEFAULT_DPI is used when no lines can be measured.
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "eng")
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "true").lower() == "true"
+OCR_PROBE_DPI = int(os.getenv("OCR_PROBE_DPI", 72))
+OCR_TARGET_LINE_PX = int(os.getenv("OCR_TARGET_LINE_PX", 36))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", 150))
+OCR_MAX_DPI = int(os.getenv("OCR_MAX_DPI", 400))
+OCR_DEFAULT_DPI = int(os.getenv("OCR_DEFAULT_DPI", 300))
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", 40_000_000))
+
+# Parse artifact cache: page-level parser output as gzipped JSONL, keyed by
+# content hash and parser version. "local" stores under PARSE_CACHE_DIR,
+# "s3" under PARSE_CACHE_PREFIX in S3_BUCKET_NAME.
+PARSE_CACHE_STORAGE = os.getenv("PARSE_CACHE_STORAGE", "local")
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", str(BASE_DIR / "parse_cache"))
+PARSE_CACHE_PREFIX = os.getenv("PARSE_CACHE_PREFIX", "parsed")
+
+# Direct browser-to-S3 uploads (app.views.upload). Files above the threshold
+# use a multipart upload; S3 allows at most 10,000 parts of at least 5 MB.
+DIRECT_UPLOAD_MAX_BYTES = int(os.getenv("DIRECT_UPLOAD_MAX_BYTES", 5 * 1024 ** 3))
+DIRECT_UPLOAD_MULTIPART_THRESHOLD = int(os.getenv("DIRECT_UPLOAD_MULTIPART_THRESHOLD", 100 * 1024 * 1024))
+DIRECT_UPLOAD_PART_SIZE = int(os.getenv("DIRECT_UPLOAD_PART_SIZE", 64 * 1024 * 1024))
+DIRECT_UPLOAD_URL_EXPIRES = int(os.getenv("DIRECT_UPLOAD_URL_EXPIRES", 3600))
+# How long after it was issued an upload can still be completed.
+DIRECT_UPLOAD_SESSION_MAX_AGE = int(os.getenv("DIRECT_UPLOAD_SESSION_MAX_AGE", 24 * 3600))
+
+# Import budget of the web process, checked by `manage.py check_import_budget`:
+# importing the WSGI application and URLconf must take at most
+# WEB_IMPORT_BUDGET_MS and load none of WEB_FORBIDDEN_IMPORTS, the parser,
+# vector store and ML packages that only workers need.
+WEB_IMPORT_BUDGET_MS = float(os.getenv("WEB_IMPORT_BUDGET_MS", 1000))
+WEB_FORBIDDEN_IMPORTS = os.getenv(
+    "WEB_FORBIDDEN_IMPORTS",
+    "pdfminer,PyPDF2,pdf2image,pytesseract,tesserocr,docx,PIL,weaviate,grpc,openai,"
+    "langchain_core,langchain_openai,tiktoken,onnxruntime,tokenizers,numpy",
+).split(",")
+
+# Vector store snapshots (`manage.py export_vectors` / `import_vectors`, see
+# app.utils.vector_snapshots). "local" stores under VECTOR_SNAPSHOT_DIR, "s3"
+# under VECTOR_SNAPSHOT_PREFIX in S3_BUCKET_NAME.
+VECTOR_SNAPSHOT_STORAGE = os.getenv("VECTOR_SNAPSHOT_STORAGE", "local")
+VECTOR_SNAPSHOT_DIR = os.getenv("VECTOR_SNAPSHOT_DIR", str(BASE_DIR / "vector_snapshots"))
+VECTOR_SNAPSHOT_PREFIX = os.getenv("VECTOR_SNAPSHOT_PREFIX", "vector-snapshots")
@@ -2,6 +2,8 @@ import requests
 
 # Base URL for your files endpoint.
 API_URL = "http://localhost:8000/api/files/"
+# Files deleted per bulk-delete request.
+BATCH_SIZE = 500
 
 def get_all_files():
     """
@@ -33,17 +35,28 @@ def delete_file(file_id: str):
     response.raise_for_status()
     print(f"Deleted file: {file_id}")
 
+def delete_files(file_ids):
+    """
+    Delete many file entries with one request; the server cleans up their storage in bulk.
+
+    Args:
+        file_ids (list[str]): The IDs of the files to delete.
+    """
+    response = requests.post(f"{API_URL}bulk-delete/", json={"ids": file_ids})
+    response.raise_for_status()
+    print(f"Deleted {response.json()['deleted']} files.")
+
 def main():
     files = get_all_files()
     print(f"Found {len(files)} files to delete.")
-    
-    for file in files:
-        file_id = file.get("id")
-        if file_id:
-            try:
-                delete_file(file_id)
-            except Exception as e:
-                print(f"Error deleting file {file_id}: {e}")
+
+    file_ids = [file.get("id") for file in files if file.get("id")]
+    for start in range(0, len(file_ids), BATCH_SIZE):
+        batch = file_ids[start:start + BATCH_SIZE]
+        try:
+            delete_files(batch)
+        except Exception as e:
+            print(f"Error deleting files {batch[0]}..{batch[-1]}: {e}")
 
 if __name__ == "__main__":
     main()